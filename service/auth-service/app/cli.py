@@ -0,0 +1,81 @@
+"""
+cli.py
+──────
+Lệnh `flask ...` của auth-service (đăng ký trong create_app()).
+
+Cách dùng (từ thư mục auth-service, FLASK_APP=run.py):
+    flask hasher calibrate --target-ms 250
+    flask hasher calibrate --algorithm scrypt --target-ms 400 --samples 5
+    flask blacklist cleanup
+    flask blacklist cleanup --batch-size 5000 --pause-ms 0
+"""
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup
+
+from app.utils.blacklist_cleanup import create_cleaner
+from app.utils.password_hasher import HASHERS, calibrate
+
+
+def register_cli(app: Flask) -> None:
+    app.cli.add_command(hasher_cli)
+    app.cli.add_command(blacklist_cli)
+
+
+# AppGroup: lệnh con tự chạy trong app context (đọc current_app.config)
+hasher_cli = AppGroup("hasher", help="Thuật toán / cost hash password.")
+
+
+@hasher_cli.command("calibrate")
+@click.option("--algorithm", type=click.Choice(sorted(HASHERS)), default=None,
+              help="Mặc định: PASSWORD_HASH_ALGORITHM đang cấu hình.")
+@click.option("--target-ms", type=float, default=250, show_default=True,
+              help="Thời gian tối đa cho 1 lần hash.")
+@click.option("--samples", type=int, default=3, show_default=True,
+              help="Số lần đo mỗi mức cost (lấy trung vị).")
+def calibrate_command(algorithm, target_ms, samples):
+    """Đo trên máy hiện tại, chọn cost lớn nhất mà 1 lần hash không vượt --target-ms."""
+    algorithm = algorithm or current_app.config.get("PASSWORD_HASH_ALGORITHM", "bcrypt")
+    click.echo(f"Calibrate {algorithm}, mục tiêu {target_ms:.0f}ms / lần hash:")
+
+    def report(cost, seconds):
+        click.echo(f"  cost={cost:<10} {seconds * 1000:8.1f} ms")
+
+    cost, seconds = calibrate(algorithm, target_ms / 1000, samples, on_measure=report)
+    if seconds * 1000 > target_ms and cost == HASHERS[algorithm].min_cost:
+        click.echo(f"Cost nhỏ nhất ({cost}) đã vượt mục tiêu — máy quá chậm, cân nhắc tăng --target-ms.")
+
+    configured = current_app.config.get("PASSWORD_HASH_ALGORITHM", "bcrypt")
+    configured_cost = current_app.config.get("PASSWORD_HASH_COST") or HASHERS[configured].default_cost
+    click.echo(f"\nĐề xuất ({seconds * 1000:.1f} ms / lần hash; đang dùng {configured} cost={configured_cost}):")
+    click.echo(f"  PASSWORD_HASH_ALGORITHM={algorithm}")
+    click.echo(f"  PASSWORD_HASH_COST={cost}")
+    click.echo("Hash cũ được nâng cấp dần khi user đăng nhập thành công.")
+
+
+blacklist_cli = AppGroup("blacklist", help="Bảng token_blacklist.")
+
+
+@blacklist_cli.command("cleanup")
+@click.option("--batch-size", type=int, default=None,
+              help="Mặc định: BLACKLIST_CLEANUP_BATCH_SIZE.")
+@click.option("--pause-ms", type=float, default=None,
+              help="Mặc định: BLACKLIST_CLEANUP_PAUSE_MS.")
+def cleanup_command(batch_size, pause_ms):
+    """Xóa dòng hết hạn theo lô (như thread nền), in số dòng + thời gian."""
+    cleaner = create_cleaner(current_app.config)
+    if batch_size:
+        cleaner.batch_size = batch_size
+    if pause_ms is not None:
+        cleaner.pause_seconds = pause_ms / 1000
+
+    def report(count):
+        click.echo(f"  lô: {count} dòng")
+
+    result = cleaner.run_once(on_batch=report)
+    if result.get("skipped"):
+        click.echo("Instance khác đang dọn (GET_LOCK), bỏ qua.")
+        return
+    click.echo(f"Đã xóa {result['deleted']} dòng hết hạn "
+               f"({result['batches']} lô, {result['duration_seconds']}s).")
@@ -1,3 +1,4 @@
-from .jwt_middleware import register_jwt_callbacks
-from .role_middleware import require_role
-
+from .jwt_middleware import register_jwt_callbacks
+from .role_middleware import require_role
+from .deadline_middleware import register_deadline_middleware, deadline_exceeded
+from .internal_middleware import require_internal_key
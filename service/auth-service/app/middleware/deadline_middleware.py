@@ -0,0 +1,66 @@
+"""
+deadline_middleware.py
+──────────────────────
+Đọc deadline do Gateway gửi sang (header X-Request-Deadline-Ms).
+
+Vai trò: Gateway đã bỏ cuộc (trả 504 cho client) thì service cũng không
+nên tốn CPU làm tiếp — đặc biệt là bcrypt khi login.
+
+Cách hoạt động:
+    - before_request: header = số ms còn lại → g.deadline = now + ms
+      Header <= 0 → trả 504 ngay, không vào controller
+    - Controller/service gọi deadline_exceeded() trước các bước tốn tài nguyên
+    - Không có header (gọi trực tiếp, không qua Gateway) → không giới hạn
+"""
+
+import time
+
+from flask import Flask, g, request
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+DEADLINE_EXCEEDED_RESPONSE = {
+    "success": False,
+    "error": {
+        "code": "DEADLINE_EXCEEDED",
+        "message": "Request đã hết thời gian xử lý cho phép.",
+    },
+}
+
+
+def remaining_seconds():
+    """Thời gian còn lại (giây) hoặc None nếu request không mang deadline."""
+    deadline = g.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def deadline_exceeded() -> bool:
+    """True nếu request có deadline và deadline đã qua."""
+    remaining = remaining_seconds()
+    return remaining is not None and remaining <= 0
+
+
+def register_deadline_middleware(app: Flask):
+    """
+    Đăng ký before_request đọc deadline.
+    Gọi trong create_app().
+    """
+
+    @app.before_request
+    def read_request_deadline():
+        raw = request.headers.get(DEADLINE_HEADER)
+        if raw is None:
+            return None
+
+        try:
+            remaining_ms = int(raw)
+        except ValueError:
+            return None  # Header sai định dạng → bỏ qua, xử lý như không có deadline
+
+        if remaining_ms <= 0:
+            return DEADLINE_EXCEEDED_RESPONSE, 504
+
+        g.deadline = time.monotonic() + remaining_ms / 1000
+        return None
@@ -0,0 +1,38 @@
+"""
+internal_middleware.py
+──────────────────────
+Decorator bảo vệ endpoint nội bộ (/api/auth/internal/*) chỉ dành cho service khác gọi.
+
+Tại sao cần?
+    Saga đăng ký của Gateway tạo / xóa tài khoản mà không có JWT admin.
+    Không kiểm tra gì thì ai gọi thẳng tới auth-service cũng xóa được user.
+
+Dùng như sau:
+    @auth_bp.delete("/internal/users/<int:user_id>")
+    @require_internal_key      ← header X-Internal-Key phải khớp INTERNAL_API_KEY
+    def delete_user(user_id): ...
+"""
+
+import hmac
+from functools import wraps
+from flask import current_app, jsonify, request
+
+INTERNAL_KEY_HEADER = "X-Internal-Key"
+
+
+def require_internal_key(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get("INTERNAL_API_KEY") or ""
+        provided = request.headers.get(INTERNAL_KEY_HEADER, "")
+        # compare_digest: thời gian so sánh không lộ số ký tự đúng
+        if not expected or not hmac.compare_digest(provided.encode(), expected.encode()):
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "INTERNAL_ONLY",
+                    "message": "Endpoint chỉ dành cho service nội bộ.",
+                },
+            }), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -1,2 +1,3 @@
-from .auth_model import User    
-from .token_blacklist import TokenBlacklist
+from .auth_model import User    
+from .token_blacklist import TokenBlacklist
+from .registration_key import RegistrationKey
@@ -0,0 +1,39 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class RegistrationKey(db.Model):
+    """
+    Idempotency-Key của các lần đăng ký qua Gateway (saga /api/register).
+
+    Tại sao cần?
+        Gateway timeout / mất kết nối SAU khi auth-service đã commit user → Gateway
+        không biết user_id. Retry cùng key phải trả lại đúng user đó (không tạo thêm,
+        không báo trùng username), và compensation "hủy đăng ký theo key" phải tìm được
+        user để xóa.
+
+    Trạng thái:
+        created    Đăng ký với key này đã commit → user_id
+        cancelled  Đã hủy (user bị xóa), hoặc hủy TRƯỚC khi đăng ký kịp commit
+                   (tombstone, user_id = NULL) → request đăng ký tới muộn bị từ chối
+                   do trùng primary key, không tạo user mồ côi
+    """
+
+    __tablename__ = "registration_keys"
+
+    key = db.Column(db.String(128), primary_key=True)
+    # Không FK: user bị xóa (compensation) vẫn giữ lại key đã hủy
+    user_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(
+        db.Enum("created", "cancelled", name="registration_key_status"),
+        nullable=False,
+    )
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def find(cls, key: str):
+        """Tìm theo key. Trả về RegistrationKey hoặc None."""
+        return cls.query.get(key)
+
+    def __repr__(self):
+        return f"<RegistrationKey key={self.key} status={self.status} user_id={self.user_id}>"
@@ -1,82 +1,139 @@
-from datetime import datetime
-from app.extensions import db
-
-
-class TokenBlacklist(db.Model):
-    """
-    Lưu các JWT token đã bị vô hiệu hóa (sau khi logout).
-
-    Tại sao cần?
-        JWT là stateless — server không "biết" token đang dùng.
-        Khi user logout, access token vẫn valid đến khi hết hạn.
-        → Blacklist giải quyết: mỗi request kiểm tra jti có bị blacklist không.
-
-    jti (JWT ID) là unique ID của mỗi token, nằm trong payload.
-    """
-
-    __tablename__ = "token_blacklist"
-
-    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    jti = db.Column(db.String(36), unique=True, nullable=False, index=True)  # UUID
-    token_type = db.Column(
-        db.Enum("access", "refresh", name="token_type"),
-        nullable=False,
-    )
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-
-    # ──────────────────────────────────────────────
-    # CLASS METHODS
-    # ──────────────────────────────────────────────
-
-    @classmethod
-    def is_blacklisted(cls, jti: str) -> bool:
-        """
-        Kiểm tra jti có trong blacklist không.
-        Dùng bởi middleware để block các token đã bị logout.
-
-        Ví dụ:
-            TokenBlacklist.is_blacklisted("abc-123")  → True/False
-        """
-        token = cls.query.filter_by(jti=jti).first()
-        return token is not None
-
-    @classmethod
-    def add(cls, jti: str, token_type: str, user_id: int, expires_at: datetime):
-        """
-        Thêm token vào blacklist.
-        Gọi khi user logout hoặc revoke token.
-
-        Ví dụ:
-            TokenBlacklist.add(
-                jti="abc-123",
-                token_type="access",
-                user_id=1,
-                expires_at=datetime(2025, 2, 20)
-            )
-        """
-        entry = cls(
-            jti=jti,
-            token_type=token_type,
-            user_id=user_id,
-            expires_at=expires_at,
-        )
-        db.session.add(entry)
-        db.session.commit()
-
-    @classmethod
-    def cleanup_expired(cls) -> int:
-        """
-        Xóa các token đã hết hạn khỏi blacklist (tiết kiệm dung lượng DB).
-        Gọi định kỳ bằng cron job hoặc Celery task.
-
-        Trả về số lượng records đã xóa.
-        """
-        now = datetime.utcnow()
-        deleted = cls.query.filter(cls.expires_at < now).delete()
-        db.session.commit()
-        return deleted
-
-    def __repr__(self):
+import time
+from datetime import datetime
+from app.extensions import db
+from app.utils import revocation_cache
+
+
+class TokenBlacklist(db.Model):
+    """
+    Lưu các JWT token đã bị vô hiệu hóa (sau khi logout).
+
+    Tại sao cần?
+        JWT là stateless — server không "biết" token đang dùng.
+        Khi user logout, access token vẫn valid đến khi hết hạn.
+        → Blacklist giải quyết: mỗi request kiểm tra jti có bị blacklist không.
+
+    jti (JWT ID) là unique ID của mỗi token, nằm trong payload.
+    """
+
+    __tablename__ = "token_blacklist"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False, index=True)  # UUID
+    token_type = db.Column(
+        db.Enum("access", "refresh", name="token_type"),
+        nullable=False,
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # ──────────────────────────────────────────────
+    # CLASS METHODS
+    # ──────────────────────────────────────────────
+
+    @classmethod
+    def is_blacklisted(cls, jti: str) -> bool:
+        """
+        Kiểm tra jti có trong blacklist không.
+        Dùng bởi middleware để block các token đã bị logout.
+
+        Ví dụ:
+            TokenBlacklist.is_blacklisted("abc-123")  → True/False
+        """
+        # Negative cache (Bloom filter): jti chắc chắn chưa bị revoke → không chạm DB
+        cache = revocation_cache.revocation_cache
+        if cache is not None and not cache.might_contain(jti):
+            return False
+
+        token = cls.query.filter_by(jti=jti).first()
+        if cache is not None and cache.ready:
+            cache.record_db_result(token is not None)
+        return token is not None
+
+    @classmethod
+    def add(cls, jti: str, token_type: str, user_id: int, expires_at: datetime):
+        """
+        Thêm token vào blacklist.
+        Gọi khi user logout hoặc revoke token.
+
+        Ví dụ:
+            TokenBlacklist.add(
+                jti="abc-123",
+                token_type="access",
+                user_id=1,
+                expires_at=datetime(2025, 2, 20)
+            )
+        """
+        entry = cls(
+            jti=jti,
+            token_type=token_type,
+            user_id=user_id,
+            expires_at=expires_at,
+        )
+        db.session.add(entry)
+        db.session.commit()
+        # Sau commit: request sau của chính process này bị chặn ngay, không chờ refresh
+        if revocation_cache.revocation_cache is not None:
+            revocation_cache.revocation_cache.add(jti)
+
+    @classmethod
+    def active_since(cls, after_id: int = 0) -> list:
+        """
+        (id, jti) của các token chưa hết hạn có id > after_id, theo id tăng dần.
+        Dùng để nạp / refresh negative cache (app/utils/revocation_cache.py).
+        """
+        rows = (
+            db.session.query(cls.id, cls.jti)
+            .filter(cls.id > after_id, cls.expires_at > datetime.utcnow())
+            .order_by(cls.id)
+            .all()
+        )
+        return [(row_id, jti) for row_id, jti in rows]
+
+    @classmethod
+    def cleanup_expired(cls, batch_size: int = 1000, pause_seconds: float = 0.0,
+                        on_batch=None) -> int:
+        """
+        Xóa các token đã hết hạn khỏi blacklist (tiết kiệm dung lượng DB).
+        Chạy định kỳ bởi app/utils/blacklist_cleanup.py hoặc `flask blacklist cleanup`.
+
+        Không DELETE ... WHERE expires_at < now 1 lần (giữ lock InnoDB rất lâu trên bảng lớn,
+        logout phải chờ): đi dọc primary key, mỗi lô lấy tối đa batch_size id hết hạn
+        → DELETE WHERE id IN (...) → commit → nghỉ pause_seconds rồi làm lô tiếp.
+
+        Args:
+            batch_size:    Số dòng tối đa mỗi lô (mỗi transaction)
+            pause_seconds: Nghỉ giữa 2 lô để logout / query khác chen vào
+            on_batch:      callback(số dòng xóa ở lô này) sau mỗi lô
+
+        Trả về số lượng records đã xóa.
+        """
+        now = datetime.utcnow()
+        last_id = 0
+        deleted = 0
+        while True:
+            ids = [
+                row_id for (row_id,) in
+                db.session.query(cls.id)
+                .filter(cls.id > last_id, cls.expires_at < now)
+                .order_by(cls.id)
+                .limit(batch_size)
+                .all()
+            ]
+            if not ids:
+                break
+            count = cls.query.filter(cls.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += count
+            last_id = ids[-1]
+            if on_batch:
+                on_batch(count)
+            if len(ids) < batch_size:
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        return deleted
+
+    def __repr__(self):
         return f"<TokenBlacklist jti={self.jti} type={self.token_type}>"
\ No newline at end of file
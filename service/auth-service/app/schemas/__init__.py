@@ -1,4 +1,4 @@
-from .login_schema import LoginSchema
-from .register_schema import RegisterSchema
-from .refresh_schema import RefreshSchema
+from .login_schema import LoginSchema
+from .register_schema import RegisterSchema
+from .refresh_schema import RefreshSchema
 __all__ = ["LoginSchema", "RegisterSchema", "RefreshSchema"]
\ No newline at end of file
@@ -1,271 +1,407 @@
-from app.models.auth_model import User
-from app.services.token_service import TokenService
-from app.extensions import db
-
-
-class AuthService:
-    """
-    Xử lý business logic của authentication.
-
-    AuthService biết về "việc gì cần làm":
-        - Kiểm tra user tồn tại không
-        - Kiểm tra password đúng không
-        - User có bị inactive không
-        - Gọi TokenService để tạo/hủy tokens
-
-    Tách biệt với TokenService vì:
-        - AuthService quan tâm đến USER (có tồn tại, có hợp lệ)
-        - TokenService quan tâm đến TOKEN (tạo, hủy, kiểm tra)
-    """
-
-    @staticmethod
-    def login(username: str, password: str) -> tuple:
-        """
-        Xử lý đăng nhập.
-
-        Luồng:
-            1. Tìm user theo username
-            2. Kiểm tra user tồn tại
-            3. Kiểm tra user active
-            4. Kiểm tra password
-            5. Tạo và trả về tokens
-
-        Args:
-            username: Tên đăng nhập
-            password: Mật khẩu plain text
-
-        Returns:
-            tuple (result_dict, http_status_code)
-
-            Success (200):
-                {
-                    "success": True,
-                    "data": {
-                        "access_token": "eyJ...",
-                        "refresh_token": "eyJ...",
-                        "token_type": "Bearer",
-                        "expires_in": 3600,
-                        "user": { id, username, email, role }
-                    }
-                }
-
-            Failure (401):
-                {
-                    "success": False,
-                    "error": {
-                        "code": "INVALID_CREDENTIALS",
-                        "message": "Sai username hoặc password."
-                    }
-                }
-        """
-        # 1. Tìm user theo username
-        user = User.find_by_username(username)
-
-        # 2. Kiểm tra user tồn tại
-        #    Dùng thông báo mơ hồ → không tiết lộ username có tồn tại không
-        if user is None:
-            return {
-                "success": False,
-                "error": {
-                    "code": "INVALID_CREDENTIALS",
-                    "message": "Sai username ",
-                },
-            }, 401
-
-        # 3. Kiểm tra user có bị vô hiệu hóa không
-        if not user.is_active:
-            return {
-                "success": False,
-                "error": {
-                    "code": "ACCOUNT_DISABLED",
-                    "message": "Tài khoản đã bị vô hiệu hóa. Vui lòng liên hệ admin.",
-                },
-            }, 403
-
-        # 4. Kiểm tra password
-        if not user.check_password(password):
-            return {
-                "success": False,
-                "error": {
-                    "code": "INVALID_CREDENTIALS",
-                    "message": "Sai password.",
-                },
-            }, 401
-
-        # 5. Tạo tokens
-        tokens = TokenService.create_tokens(user)
-
-        return {
-            "success": True,
-            "data": {
-                **tokens,
-                "user": user.to_dict(),
-            },
-        }, 200
-
-    @staticmethod
-    def logout(access_token_jti: str, refresh_token_jti: str,
-               user_id: int, access_expires_at, refresh_expires_at) -> tuple:
-        """
-        Xử lý đăng xuất.
-
-        Blacklist cả access token VÀ refresh token.
-        Sau đó cả 2 token đều không dùng được nữa.
-
-        Args:
-            access_token_jti:   JTI của access token hiện tại
-            refresh_token_jti:  JTI của refresh token (lấy từ request body)
-            user_id:            ID của user đang logout
-            access_expires_at:  Expiry datetime của access token
-            refresh_expires_at: Expiry datetime của refresh token
-
-        Returns:
-            tuple (result_dict, http_status_code)
-        """
-        # Blacklist access token
-        TokenService.blacklist_token(
-            jti=access_token_jti,
-            token_type="access",
-            user_id=user_id,
-            expires_at=access_expires_at,
-        )
-
-        # Blacklist refresh token (nếu được cung cấp)
-        if refresh_token_jti:
-            TokenService.blacklist_token(
-                jti=refresh_token_jti,
-                token_type="refresh",
-                user_id=user_id,
-                expires_at=refresh_expires_at,
-            )
-
-        return {"success": True, "message": "Đăng xuất thành công."}, 200
-
-    @staticmethod
-    def refresh(user_id: int, refresh_token_jti: str, refresh_expires_at) -> tuple:
-        """
-        Tạo access token mới từ refresh token.
-
-        Luồng:
-            1. Tìm user theo user_id
-            2. Kiểm tra user còn active không
-            3. Blacklist refresh token cũ (optional: rotate refresh token)
-            4. Tạo và trả về access token mới
-
-        Args:
-            user_id:            ID của user (từ JWT identity)
-            refresh_token_jti:  JTI của refresh token hiện tại
-            refresh_expires_at: Expiry của refresh token
-
-        Returns:
-            tuple (result_dict, http_status_code)
-        """
-        # 1. Tìm user
-        user = User.find_by_id(int(user_id))
-
-        if user is None:
-            return {
-                "success": False,
-                "error": {
-                    "code": "USER_NOT_FOUND",
-                    "message": "User không tồn tại.",
-                },
-            }, 404
-
-        # 2. Kiểm tra user còn active (có thể bị disable sau khi lấy refresh token)
-        if not user.is_active:
-            return {
-                "success": False,
-                "error": {
-                    "code": "ACCOUNT_DISABLED",
-                    "message": "Tài khoản đã bị vô hiệu hóa.",
-                },
-            }, 403
-
-        # 3. Tạo access token mới
-        new_tokens = TokenService.create_new_access_token(user)
-
-        return {"success": True, "data": new_tokens}, 200
-
-    @staticmethod
-    def register(username: str, email: str, password: str, phone: str = None) -> tuple:
-        """
-        Đăng ký tài khoản mới.
-
-        Luồng:
-            1. Kiểm tra username đã tồn tại chưa
-            2. Kiểm tra email đã tồn tại chưa
-            3. Tạo user mới với hashed password
-            4. Lưu vào database
-            5. Trả về thông tin user (không trả token — yêu cầu login)
-
-        Args:
-            username: Tên đăng nhập
-            email:    Địa chỉ email
-            password: Mật khẩu plain text (sẽ được hash)
-            phone:    Số điện thoại (optional)
-
-        Returns:
-            tuple (result_dict, http_status_code)
-        """
-        # 1. Kiểm tra username
-        if User.find_by_username(username):
-            return {
-                "success": False,
-                "error": {
-                    "code": "DUPLICATE_USERNAME",
-                    "message": f"Username '{username}' đã được sử dụng.",
-                },
-            }, 409  # 409 Conflict
-
-        # 2. Kiểm tra email
-        if User.find_by_email(email):
-            return {
-                "success": False,
-                "error": {
-                    "code": "DUPLICATE_EMAIL",
-                    "message": f"Email '{email}' đã được đăng ký.",
-                },
-            }, 409
-
-        # 3. Tạo user mới
-        user = User(
-            username=username,
-            email=email,
-            phone=phone,
-            role="user",
-            is_active=True,
-        )
-        user.set_password(password)  # Hash password trước khi lưu
-
-        # 4. Lưu vào database
-        db.session.add(user)
-        db.session.commit()
-
-        # 5. Trả về thông tin user
-        return {
-            "success": True,
-            "message": "Đăng ký thành công. Vui lòng đăng nhập.",
-            "data": {"user": user.to_dict()},
-        }, 201  # 201 Created
-
-    @staticmethod
-    def get_me(user_id: int) -> tuple:
-        """
-        Lấy thông tin user hiện tại từ token.
-
-        Args:
-            user_id: ID của user (từ JWT identity)
-
-        Returns:
-            tuple (result_dict, http_status_code)
-        """
-        user = User.find_by_id(int(user_id))
-
-        if user is None:
-            return {
-                "success": False,
-                "error": {"code": "USER_NOT_FOUND", "message": "User không tồn tại."},
-            }, 404
-
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.models.auth_model import User
+from app.models.registration_key import RegistrationKey
+from app.services.token_service import TokenService
+from app.extensions import db
+from app.middleware.deadline_middleware import deadline_exceeded, DEADLINE_EXCEEDED_RESPONSE
+from app.utils.hash_executor import HashExecutorError
+
+
+class AuthService:
+    """
+    Xử lý business logic của authentication.
+
+    AuthService biết về "việc gì cần làm":
+        - Kiểm tra user tồn tại không
+        - Kiểm tra password đúng không
+        - User có bị inactive không
+        - Gọi TokenService để tạo/hủy tokens
+
+    Tách biệt với TokenService vì:
+        - AuthService quan tâm đến USER (có tồn tại, có hợp lệ)
+        - TokenService quan tâm đến TOKEN (tạo, hủy, kiểm tra)
+    """
+
+    @staticmethod
+    def login(username: str, password: str) -> tuple:
+        """
+        Xử lý đăng nhập.
+
+        Luồng:
+            1. Tìm user theo username
+            2. Kiểm tra user tồn tại
+            3. Kiểm tra user active
+            4. Kiểm tra password
+            5. Hash theo thuật toán / cost cũ → hash lại bằng password vừa nhập
+            6. Tạo và trả về tokens
+
+        Args:
+            username: Tên đăng nhập
+            password: Mật khẩu plain text
+
+        Returns:
+            tuple (result_dict, http_status_code)
+
+            Success (200):
+                {
+                    "success": True,
+                    "data": {
+                        "access_token": "eyJ...",
+                        "refresh_token": "eyJ...",
+                        "token_type": "Bearer",
+                        "expires_in": 3600,
+                        "user": { id, username, email, role }
+                    }
+                }
+
+            Failure (401):
+                {
+                    "success": False,
+                    "error": {
+                        "code": "INVALID_CREDENTIALS",
+                        "message": "Sai username hoặc password."
+                    }
+                }
+        """
+        # 1. Tìm user theo username
+        user = User.find_by_username(username)
+
+        # 2. Kiểm tra user tồn tại
+        #    Dùng thông báo mơ hồ → không tiết lộ username có tồn tại không
+        if user is None:
+            return {
+                "success": False,
+                "error": {
+                    "code": "INVALID_CREDENTIALS",
+                    "message": "Sai username ",
+                },
+            }, 401
+
+        # 3. Kiểm tra user có bị vô hiệu hóa không
+        if not user.is_active:
+            return {
+                "success": False,
+                "error": {
+                    "code": "ACCOUNT_DISABLED",
+                    "message": "Tài khoản đã bị vô hiệu hóa. Vui lòng liên hệ admin.",
+                },
+            }, 403
+
+        # 4. Kiểm tra password
+        #    bcrypt tốn ~250ms CPU → Gateway đã hết deadline thì không hash nữa
+        if deadline_exceeded():
+            return DEADLINE_EXCEEDED_RESPONSE, 504
+
+        if not user.check_password(password):
+            return {
+                "success": False,
+                "error": {
+                    "code": "INVALID_CREDENTIALS",
+                    "message": "Sai password.",
+                },
+            }, 401
+
+        # 5. Nâng cấp hash cũ (đổi PASSWORD_HASH_ALGORITHM / COST) — chỉ lúc này mới có password gốc
+        AuthService._upgrade_password_hash(user, password)
+
+        # 6. Tạo tokens
+        tokens = TokenService.create_tokens(user)
+
+        return {
+            "success": True,
+            "data": {
+                **tokens,
+                "user": user.to_dict(),
+            },
+        }, 200
+
+    @staticmethod
+    def _upgrade_password_hash(user: User, password: str) -> None:
+        """
+        Hash lại password khi hash đang lưu khác thuật toán / cost cấu hình.
+        Lỗi (executor bận, DB lỗi) không làm hỏng login — giữ hash cũ, lần login sau thử lại.
+        """
+        if not user.password_needs_rehash() or deadline_exceeded():
+            return
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except HashExecutorError:
+            return
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Không nâng cấp được password hash của user {user.id}: {e}")
+
+    @staticmethod
+    def logout(access_token_jti: str, refresh_token_jti: str,
+               user_id: int, access_expires_at, refresh_expires_at) -> tuple:
+        """
+        Xử lý đăng xuất.
+
+        Blacklist cả access token VÀ refresh token.
+        Sau đó cả 2 token đều không dùng được nữa.
+
+        Args:
+            access_token_jti:   JTI của access token hiện tại
+            refresh_token_jti:  JTI của refresh token (lấy từ request body)
+            user_id:            ID của user đang logout
+            access_expires_at:  Expiry datetime của access token
+            refresh_expires_at: Expiry datetime của refresh token
+
+        Returns:
+            tuple (result_dict, http_status_code)
+        """
+        # Blacklist access token
+        TokenService.blacklist_token(
+            jti=access_token_jti,
+            token_type="access",
+            user_id=user_id,
+            expires_at=access_expires_at,
+        )
+
+        # Blacklist refresh token (nếu được cung cấp)
+        if refresh_token_jti:
+            TokenService.blacklist_token(
+                jti=refresh_token_jti,
+                token_type="refresh",
+                user_id=user_id,
+                expires_at=refresh_expires_at,
+            )
+
+        return {"success": True, "message": "Đăng xuất thành công."}, 200
+
+    @staticmethod
+    def refresh(user_id: int, refresh_token_jti: str, refresh_expires_at) -> tuple:
+        """
+        Tạo access token mới từ refresh token.
+
+        Luồng:
+            1. Tìm user theo user_id
+            2. Kiểm tra user còn active không
+            3. Blacklist refresh token cũ (optional: rotate refresh token)
+            4. Tạo và trả về access token mới
+
+        Args:
+            user_id:            ID của user (từ JWT identity)
+            refresh_token_jti:  JTI của refresh token hiện tại
+            refresh_expires_at: Expiry của refresh token
+
+        Returns:
+            tuple (result_dict, http_status_code)
+        """
+        # 1. Tìm user
+        user = User.find_by_id(int(user_id))
+
+        if user is None:
+            return {
+                "success": False,
+                "error": {
+                    "code": "USER_NOT_FOUND",
+                    "message": "User không tồn tại.",
+                },
+            }, 404
+
+        # 2. Kiểm tra user còn active (có thể bị disable sau khi lấy refresh token)
+        if not user.is_active:
+            return {
+                "success": False,
+                "error": {
+                    "code": "ACCOUNT_DISABLED",
+                    "message": "Tài khoản đã bị vô hiệu hóa.",
+                },
+            }, 403
+
+        # 3. Tạo access token mới
+        new_tokens = TokenService.create_new_access_token(user)
+
+        return {"success": True, "data": new_tokens}, 200
+
+    @staticmethod
+    def register(username: str, email: str, password: str, phone: str = None,
+                 idempotency_key: str = None) -> tuple:
+        """
+        Đăng ký tài khoản mới.
+
+        Luồng:
+            1. Có Idempotency-Key đã dùng → trả lại kết quả lần trước (không tạo thêm)
+            2. Kiểm tra username đã tồn tại chưa
+            3. Kiểm tra email đã tồn tại chưa
+            4. Tạo user mới với hashed password
+            5. Lưu user + key vào database trong CÙNG 1 transaction
+            6. Trả về thông tin user (không trả token — yêu cầu login)
+
+        Args:
+            username:        Tên đăng nhập
+            email:           Địa chỉ email
+            password:        Mật khẩu plain text (sẽ được hash)
+            phone:           Số điện thoại (optional)
+            idempotency_key: Key của saga đăng ký ở Gateway (optional). Gateway timeout sau khi
+                             user đã commit → retry cùng key nhận lại đúng user_id
+
+        Returns:
+            tuple (result_dict, http_status_code)
+        """
+        # 1. Request lặp (retry sau timeout / mất kết nối)
+        if idempotency_key:
+            record = RegistrationKey.find(idempotency_key)
+            if record is not None:
+                return AuthService._registration_result(record)
+
+        # 2. Kiểm tra username
+        if User.find_by_username(username):
+            return {
+                "success": False,
+                "error": {
+                    "code": "DUPLICATE_USERNAME",
+                    "message": f"Username '{username}' đã được sử dụng.",
+                },
+            }, 409  # 409 Conflict
+
+        # 3. Kiểm tra email
+        if User.find_by_email(email):
+            return {
+                "success": False,
+                "error": {
+                    "code": "DUPLICATE_EMAIL",
+                    "message": f"Email '{email}' đã được đăng ký.",
+                },
+            }, 409
+
+        # 4. Tạo user mới
+        user = User(
+            username=username,
+            email=email,
+            phone=phone,
+            role="user",
+            is_active=True,
+        )
+        user.set_password(password)  # Hash password trước khi lưu
+
+        # 5. Lưu vào database — key commit cùng user: có key là chắc chắn có user và ngược lại
+        db.session.add(user)
+        try:
+            if idempotency_key:
+                db.session.flush()  # lấy user.id
+                db.session.add(RegistrationKey(key=idempotency_key, user_id=user.id, status="created"))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # Request cùng key chạy song song / đã bị hủy (tombstone) → trả kết quả của key đó
+            record = RegistrationKey.find(idempotency_key) if idempotency_key else None
+            if record is not None:
+                return AuthService._registration_result(record)
+            # Request khác vừa tạo cùng username / email giữa bước 2-3 và commit
+            return {
+                "success": False,
+                "error": {
+                    "code": "DUPLICATE_USER",
+                    "message": "Username hoặc email đã được sử dụng.",
+                },
+            }, 409
+
+        # 6. Trả về thông tin user
+        return {
+            "success": True,
+            "message": "Đăng ký thành công. Vui lòng đăng nhập.",
+            "data": {"user": user.to_dict()},
+        }, 201  # 201 Created
+
+    @staticmethod
+    def _registration_result(record: RegistrationKey) -> tuple:
+        """Kết quả của lần đăng ký đã ghi nhận với key (replay cho request lặp)."""
+        user = User.find_by_id(record.user_id) if record.user_id is not None else None
+        if record.status == "cancelled" or user is None:
+            return {
+                "success": False,
+                "error": {
+                    "code": "REGISTRATION_CANCELLED",
+                    "message": "Lần đăng ký với Idempotency-Key này đã bị hủy.",
+                },
+            }, 409
+        return {
+            "success": True,
+            "message": "Đăng ký thành công. Vui lòng đăng nhập.",
+            "data": {"user": user.to_dict()},
+        }, 201
+
+    @staticmethod
+    def cancel_registration(idempotency_key: str) -> tuple:
+        """
+        Hủy lần đăng ký theo Idempotency-Key (compensation của saga khi không biết
+        request đăng ký đã tới auth-service hay chưa).
+
+        Luồng:
+            - Key đã tạo user → xóa user, đánh dấu key 'cancelled'
+            - Key chưa có → ghi tombstone 'cancelled': request đăng ký tới muộn
+              (còn kẹt trên mạng) trùng primary key → bị từ chối, không tạo user mồ côi
+            - Key đã hủy → không làm gì (compensation được retry nhiều lần)
+
+        Returns:
+            tuple (result_dict, 200)
+        """
+        record = RegistrationKey.find(idempotency_key)
+        if record is None:
+            db.session.add(RegistrationKey(key=idempotency_key, status="cancelled"))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Request đăng ký cùng key vừa commit → hủy user nó vừa tạo
+                db.session.rollback()
+                record = RegistrationKey.find(idempotency_key)
+
+        deleted_user_id = None
+        if record is not None and record.status == "created":
+            user = User.find_by_id(record.user_id)
+            if user is not None:
+                db.session.delete(user)
+                deleted_user_id = record.user_id
+            record.status = "cancelled"
+            db.session.commit()
+
+        return {
+            "success": True,
+            "data": {"idempotency_key": idempotency_key, "deleted_user_id": deleted_user_id},
+        }, 200
+
+    @staticmethod
+    def delete_user(user_id: int) -> tuple:
+        """
+        Xóa tài khoản (compensation của saga đăng ký khi bước sau thất bại).
+        Token đã blacklist của user bị xóa theo (cascade).
+
+        Returns:
+            tuple (result_dict, http_status_code) — 404 nếu user không tồn tại (đã xóa)
+        """
+        user = User.find_by_id(user_id)
+        if user is None:
+            return {
+                "success": False,
+                "error": {"code": "USER_NOT_FOUND", "message": "User không tồn tại."},
+            }, 404
+
+        db.session.delete(user)
+        db.session.commit()
+        return {"success": True, "data": {"user_id": user_id}}, 200
+
+    @staticmethod
+    def get_me(user_id: int) -> tuple:
+        """
+        Lấy thông tin user hiện tại từ token.
+
+        Args:
+            user_id: ID của user (từ JWT identity)
+
+        Returns:
+            tuple (result_dict, http_status_code)
+        """
+        user = User.find_by_id(int(user_id))
+
+        if user is None:
+            return {
+                "success": False,
+                "error": {"code": "USER_NOT_FOUND", "message": "User không tồn tại."},
+            }, 404
+
         return {"success": True, "data": {"user": user.to_dict()}}, 200
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+access_log.py
+─────────────
+Access log có cấu trúc (JSON lines), ghi bằng thread nền qua queue giới hạn.
+
+Tại sao cần?
+    Metrics chỉ có số tổng hợp; muốn biết 1 request cụ thể (trace_id, user) chậm ở đâu
+    phải có log từng request. Ghi log đồng bộ (print / logging ra stdout) nằm ngay trên
+    đường xử lý: stdout chậm (pipe đầy, docker log driver nghẽn) → mọi request chậm theo.
+
+Cách hoạt động:
+    - before_request ghi mốc thời gian; after_request dựng 1 dict (route, status,
+      latency, thời gian gọi upstream...) rồi put_nowait vào queue
+    - Queue đầy → BỎ bản ghi + tăng access_log_dropped_total, request không bao giờ chờ log
+    - Thread nền gom lô (ACCESS_LOG_BATCH_SIZE dòng hoặc ACCESS_LOG_FLUSH_INTERVAL giây)
+      rồi ghi 1 lần + flush ra stdout / file
+    - Gọi upstream trong request (record_upstream) được cộng dồn vào g → dòng log có
+      upstream_ms (tổng) + danh sách từng lần gọi
+    - Response stream: latency_ms / upstream_ms tính tới lúc có header response,
+      không gồm thời gian chuyển body
+
+Cấu hình (app.config):
+    ACCESS_LOG_LEVEL    off | errors | all
+                        errors: chỉ ghi status >= 400 hoặc chậm hơn ACCESS_LOG_SLOW_MS
+    ACCESS_LOG_SLOW_MS  Ngưỡng "chậm" khi level = errors
+    ACCESS_LOG_FILE     Rỗng / "-" → stdout, còn lại là đường dẫn file
+    ACCESS_LOG_QUEUE_SIZE, ACCESS_LOG_BATCH_SIZE, ACCESS_LOG_FLUSH_INTERVAL
+
+Cách dùng:
+    register_access_log(app, "auth-service")    ← đăng ký SỚM để before_request chạy đầu,
+                                                   after_request chạy cuối (thấy status cuối cùng)
+"""
+
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+from app.utils.metrics import REGISTRY
+
+LEVELS = ('off', 'errors', 'all')
+
+# Số lần gọi upstream tối đa giữ chi tiết trong 1 dòng log (upstream_ms vẫn cộng đủ)
+MAX_UPSTREAM_CALLS = 8
+
+ACCESS_LOG_DROPPED = REGISTRY.counter(
+    'access_log_dropped_total', 'Dòng access log bị bỏ vì queue đầy')
+
+
+class AccessLogWriter:
+    """Thread nền ghi JSON lines theo lô. Queue đầy → bỏ dòng log (không chặn request)."""
+
+    def __init__(self, path: str = '', max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0):
+        self.path = path if path and path != '-' else None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        threading.Thread(target=self._run, name='access-log', daemon=True).start()
+
+    def submit(self, record: dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            ACCESS_LOG_DROPPED.inc()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                ACCESS_LOG_DROPPED.inc(amount=len(batch))
+                sys.stderr.write(f"[AccessLog] Không ghi được {len(batch)} dòng: {e}\n")
+
+    def write(self, batch: list) -> None:
+        # json.dumps ở thread nền → request chỉ tốn công dựng dict
+        data = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                       for record in batch)
+        if self.path is None:
+            sys.stdout.write(data)
+            sys.stdout.flush()
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "output": self.path or "stdout",
+        }
+
+
+# Khởi tạo trong register_access_log()
+writer = None
+_level = 'off'
+_slow_ms = 0.0
+_service_name = ''
+
+
+def record_upstream(upstream: str, status, seconds: float) -> None:
+    """
+    Ghi nhận 1 lần gọi upstream của request hiện tại (ngoài request / chưa bật log → bỏ qua).
+
+    Args:
+        upstream: Base URL / tên upstream
+        status:   HTTP status, hoặc tên lỗi (VD: "ReadTimeout") khi không có response
+        seconds:  Thời gian tới khi có header response
+    """
+    if writer is None or not has_request_context():
+        return
+    ms = seconds * 1000
+    g.access_upstream_ms = g.get('access_upstream_ms', 0.0) + ms
+    calls = g.get('access_upstream_calls')
+    if calls is None:
+        calls = g.access_upstream_calls = []
+    if len(calls) < MAX_UPSTREAM_CALLS:
+        calls.append({"upstream": upstream, "status": status, "ms": round(ms, 1)})
+
+
+def _start_timer():
+    g.access_started = time.perf_counter()
+
+
+def _route_label() -> str:
+    label = g.get('route_label')
+    if label:
+        return label
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _log_request(response):
+    started = g.pop('access_started', None)
+    if started is None:
+        return response
+    latency_ms = (time.perf_counter() - started) * 1000
+    status = response.status_code
+    if _level == 'errors' and status < 400 and latency_ms < _slow_ms:
+        return response
+
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        "service": _service_name,
+        "method": request.method,
+        "route": _route_label(),
+        "path": request.path,
+        "status": status,
+        "latency_ms": round(latency_ms, 1),
+        "bytes": response.content_length,
+        "remote_addr": request.remote_addr,
+        "trace_id": response.headers.get('X-Trace-Id'),
+    }
+    # User do Gateway gửi kèm (không decode JWT lần nữa chỉ để ghi log)
+    user_id = request.headers.get('X-User-ID')
+    if user_id:
+        record["user_id"] = user_id
+    calls = g.get('access_upstream_calls')
+    if calls:
+        record["upstream_ms"] = round(g.get('access_upstream_ms', 0.0), 1)
+        record["upstream"] = calls
+    writer.submit(record)
+    return response
+
+
+def register_access_log(app, service_name: str) -> None:
+    """
+    Bật access log cho app. Gọi trong create_app(), TRƯỚC tracing / metrics / nén:
+    before_request chạy đầu (đo trọn request), after_request chạy cuối (status,
+    kích thước body, X-Trace-Id đều đã có).
+    """
+    global writer, _level, _slow_ms, _service_name
+    level = str(app.config.get('ACCESS_LOG_LEVEL', 'all')).lower()
+    if level not in LEVELS:
+        raise ValueError(f"ACCESS_LOG_LEVEL không hợp lệ: {level!r} (chọn {LEVELS})")
+    if level == 'off':
+        return
+
+    _level = level
+    _slow_ms = float(app.config.get('ACCESS_LOG_SLOW_MS', 1000))
+    _service_name = service_name
+    if writer is None:
+        writer = AccessLogWriter(
+            app.config.get('ACCESS_LOG_FILE', ''),
+            max_queue=int(app.config.get('ACCESS_LOG_QUEUE_SIZE', 10000)),
+            batch_size=int(app.config.get('ACCESS_LOG_BATCH_SIZE', 500)),
+            flush_interval=float(app.config.get('ACCESS_LOG_FLUSH_INTERVAL', 1.0)),
+        )
+    app.before_request(_start_timer)
+    app.after_request(_log_request)
+
+
+def get_access_log_stats() -> dict:
+    if writer is None:
+        return {"enabled": False}
+    return {"enabled": True, "level": _level, "slow_ms": _slow_ms, **writer.stats()}
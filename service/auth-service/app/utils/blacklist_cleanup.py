@@ -0,0 +1,187 @@
+"""
+blacklist_cleanup.py
+────────────────────
+Thread nền định kỳ xóa dòng hết hạn trong token_blacklist, theo lô nhỏ.
+
+Tại sao cần?
+    cleanup_expired() trước đây không ai gọi (bảng lớn mãi), và khi gọi thì là 1 câu
+    DELETE ... WHERE expires_at < now không giới hạn → transaction dài, giữ lock InnoDB
+    → logout (INSERT vào cùng bảng) bị chặn tới khi DELETE xong.
+
+Cách hoạt động:
+    - Mỗi BLACKLIST_CLEANUP_INTERVAL_SECONDS gọi TokenBlacklist.cleanup_expired():
+      lô tối đa BLACKLIST_CLEANUP_BATCH_SIZE id theo primary key, mỗi lô 1 transaction,
+      nghỉ BLACKLIST_CLEANUP_PAUSE_MS giữa 2 lô
+    - Nhiều worker / instance cùng chạy scheduler → chỉ 1 nơi dọn mỗi lượt nhờ MySQL
+      GET_LOCK (nơi khác bỏ qua lượt đó). DB khác (sqlite khi test) → không khóa
+    - Mỗi lượt ghi lại số dòng xóa + thời gian (log, metrics, GET /api/auth/revocation-cache)
+
+Metrics:
+    blacklist_cleanup_deleted_total        Tổng số dòng đã xóa
+    blacklist_cleanup_duration_seconds     Thời gian 1 lượt dọn
+    blacklist_cleanup_last_run_timestamp   Unix time lượt dọn gần nhất (xong)
+
+Cách dùng:
+    register_blacklist_cleanup(app)    ← trong create_app()
+    flask blacklist cleanup            ← chạy tay 1 lượt (xem app/cli.py)
+
+Cấu hình (app.config):
+    BLACKLIST_CLEANUP_ENABLED, BLACKLIST_CLEANUP_INTERVAL_SECONDS,
+    BLACKLIST_CLEANUP_BATCH_SIZE, BLACKLIST_CLEANUP_PAUSE_MS
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Flask
+
+from app.extensions import db
+from app.models.token_blacklist import TokenBlacklist
+from app.utils.metrics import REGISTRY
+
+# Tên lock MySQL (GET_LOCK) dùng chung mọi instance auth-service
+LOCK_NAME = "auth-service:blacklist-cleanup"
+
+CLEANUP_DELETED = REGISTRY.counter(
+    'blacklist_cleanup_deleted_total', 'Số dòng token_blacklist hết hạn đã xóa')
+CLEANUP_DURATION = REGISTRY.histogram(
+    'blacklist_cleanup_duration_seconds', 'Thời gian 1 lượt dọn token_blacklist', (),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+
+
+@contextmanager
+def _cleanup_lock():
+    """
+    yield True nếu process này được dọn lượt này. Lock MySQL gắn với connection
+    → giữ 1 connection riêng suốt lượt dọn (session commit sau mỗi lô trả connection về pool).
+    """
+    if db.engine.dialect.name != "mysql":
+        yield True
+        return
+    with db.engine.connect() as conn:
+        acquired = conn.execute(db.text("SELECT GET_LOCK(:name, 0)"), {"name": LOCK_NAME}).scalar()
+        try:
+            yield acquired == 1
+        finally:
+            if acquired == 1:
+                conn.execute(db.text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+
+
+class BlacklistCleaner:
+
+    def __init__(self, interval: float = 3600, batch_size: int = 1000, pause_seconds: float = 0.1):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.running = False
+        self.last_run = None
+        self.last_error = None
+        self.total_deleted = 0
+
+    def run_once(self, on_batch=None) -> dict:
+        """
+        1 lượt dọn (cần app context).
+
+        Returns:
+            {"skipped": True} nếu instance khác đang dọn, còn lại
+            {"deleted", "batches", "duration_seconds", "finished_at"}
+        """
+        with _cleanup_lock() as acquired:
+            if not acquired:
+                return {"skipped": True}
+
+            batches = 0
+
+            def count_batch(count):
+                nonlocal batches
+                batches += 1
+                CLEANUP_DELETED.inc(amount=count)
+                if on_batch:
+                    on_batch(count)
+
+            self.running = True
+            started = time.perf_counter()
+            try:
+                deleted = TokenBlacklist.cleanup_expired(
+                    batch_size=self.batch_size, pause_seconds=self.pause_seconds, on_batch=count_batch)
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                self.running = False
+            duration = time.perf_counter() - started
+
+        CLEANUP_DURATION.observe(duration)
+        self.total_deleted += deleted
+        self.last_run = {
+            "deleted": deleted,
+            "batches": batches,
+            "duration_seconds": round(duration, 3),
+            "finished_at": time.time(),
+        }
+        return self.last_run
+
+    def start(self, app: Flask) -> None:
+        threading.Thread(target=self._run, args=(app,), name='blacklist-cleanup', daemon=True).start()
+
+    def _run(self, app: Flask) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    result = self.run_once()
+                self.last_error = None
+                if not result.get("skipped"):
+                    app.logger.info(
+                        f"[BlacklistCleanup] Xóa {result['deleted']} dòng hết hạn "
+                        f"({result['batches']} lô, {result['duration_seconds']}s)")
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                app.logger.warning(f"[BlacklistCleanup] Lượt dọn lỗi: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "pause_seconds": self.pause_seconds,
+            "running": self.running,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+            "total_deleted": self.total_deleted,
+        }
+
+
+# Khởi tạo trong register_blacklist_cleanup() (chưa bật → chỉ chạy tay bằng CLI)
+blacklist_cleaner = None
+
+
+def create_cleaner(config) -> BlacklistCleaner:
+    return BlacklistCleaner(
+        interval=float(config.get("BLACKLIST_CLEANUP_INTERVAL_SECONDS", 3600)),
+        batch_size=int(config.get("BLACKLIST_CLEANUP_BATCH_SIZE", 1000)),
+        pause_seconds=float(config.get("BLACKLIST_CLEANUP_PAUSE_MS", 100)) / 1000,
+    )
+
+
+def register_blacklist_cleanup(app: Flask) -> None:
+    """Gọi trong create_app(); mỗi process 1 thread, GET_LOCK chọn 1 process dọn mỗi lượt."""
+    global blacklist_cleaner
+    if blacklist_cleaner is not None or not app.config.get("BLACKLIST_CLEANUP_ENABLED", True):
+        return
+    blacklist_cleaner = create_cleaner(app.config)
+    blacklist_cleaner.start(app)
+
+
+def get_blacklist_cleanup_stats() -> dict:
+    if blacklist_cleaner is None:
+        return {"enabled": False}
+    return blacklist_cleaner.stats()
+
+
+REGISTRY.gauge_callback(
+    'blacklist_cleanup_last_run_timestamp', 'Unix time lượt dọn token_blacklist gần nhất', (),
+    lambda: [((), blacklist_cleaner.last_run["finished_at"])]
+    if blacklist_cleaner is not None and blacklist_cleaner.last_run else [],
+)
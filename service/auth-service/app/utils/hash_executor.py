@@ -0,0 +1,297 @@
+"""
+hash_executor.py
+────────────────
+Executor riêng cho hash / verify password (bcrypt...), hàng đợi có giới hạn.
+
+Tại sao cần?
+    bcrypt rounds=12 tốn ~250ms CPU mỗi lần. Chạy thẳng trên thread xử lý request
+    → login / đổi password chiếm trọn 1 worker gunicorn (Dockerfile chỉ có 2),
+    vài request login đồng thời là mọi request khác (refresh, validate-token...) phải xếp hàng.
+
+Cách hoạt động:
+    - Hash chạy trong ProcessPoolExecutor (HASH_EXECUTOR=process, mặc định) với
+      HASH_WORKERS process = số core / số worker gunicorn (WEB_CONCURRENCY)
+      → tổng process hash của cả container không vượt số core
+    - Thread request chỉ chờ Future (gunicorn gthread: thread chờ không chiếm worker,
+      các thread khác của worker vẫn phục vụ request nhẹ)
+    - Số việc đang chờ + đang chạy vượt HASH_WORKERS + HASH_QUEUE_SIZE → từ chối ngay
+      (HashQueueFullError → 503 + Retry-After), không để hàng đợi dài vô hạn
+    - Request có deadline (Gateway gửi sang) → chỉ chờ tới deadline; hết hạn mà việc
+      chưa chạy thì hủy luôn (HashTimeoutError → 504)
+    - Pool tạo lười ở lần dùng đầu → tạo SAU khi gunicorn fork worker; process con
+      khởi động bằng spawn (không fork từ process đang có nhiều thread)
+
+    HASH_EXECUTOR=thread: ThreadPoolExecutor (bcrypt >= 4.1 nhả GIL khi hash) — dùng cho
+    `python run.py`: spawn sẽ import lại run.py (gọi create_app) trong mỗi process con.
+    inline: chạy thẳng trên thread gọi (test / script).
+
+Metrics:
+    password_hash_queue_depth          Việc đang chờ + đang chạy
+    password_hash_duration_seconds     Thời gian hash chạy thật (theo op)
+    password_hash_wait_seconds         Thời gian chờ trong hàng đợi (theo op)
+    password_hash_rejected_total       Bị từ chối (queue_full / deadline / broken_pool)
+
+Thuật toán + cost: PASSWORD_HASH_ALGORITHM / PASSWORD_HASH_COST (xem password_hasher.py).
+
+Cách dùng:
+    password_hash = hash_password("Password123!")
+    ok = verify_password("Password123!", password_hash)
+    needs_rehash(password_hash)     ← hash theo thuật toán / cost cũ
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import Flask, current_app, has_app_context, has_request_context
+
+from app.middleware.deadline_middleware import DEADLINE_EXCEEDED_RESPONSE, remaining_seconds
+from app.utils.metrics import REGISTRY
+from app.utils.password_hasher import PasswordHasher, get_hasher, verify_encoded
+
+# Thời gian ~1 lần hash, dùng ước lượng Retry-After khi hàng đợi đầy
+TYPICAL_HASH_SECONDS = 0.25
+
+EXECUTOR_KINDS = ("process", "thread", "inline")
+
+# Bucket latency (giây): 1 lần hash ~0.1 - 1s tùy thuật toán / cost / CPU
+HASH_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HASH_DURATION = REGISTRY.histogram(
+    'password_hash_duration_seconds', 'Thời gian hash chạy trong executor', ('op',), buckets=HASH_BUCKETS)
+HASH_WAIT = REGISTRY.histogram(
+    'password_hash_wait_seconds', 'Thời gian chờ trong hàng đợi hash', ('op',), buckets=HASH_BUCKETS)
+HASH_REJECTED = REGISTRY.counter(
+    'password_hash_rejected_total', 'Việc hash bị từ chối', ('op', 'reason'))
+
+
+class HashExecutorError(Exception):
+    """Không hash được lúc này — error handler trả status + body tương ứng."""
+
+    status = 503
+    body = {
+        "success": False,
+        "error": {
+            "code": "HASHER_BUSY",
+            "message": "Hệ thống đang bận xử lý mật khẩu. Vui lòng thử lại sau.",
+        },
+    }
+
+    def __init__(self, message: str = "", retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HashQueueFullError(HashExecutorError):
+    """Hàng đợi hash đã đầy → 503."""
+
+
+class HashTimeoutError(HashExecutorError):
+    """Hết deadline của request trong lúc chờ hash → 504."""
+
+    status = 504
+    body = DEADLINE_EXCEEDED_RESPONSE
+
+
+# ─────────────────────────────────────────────────────────────
+# CHẠY TRONG PROCESS / THREAD CỦA EXECUTOR
+# Trả kèm thời gian chạy để tách thời gian chờ khỏi thời gian hash
+# ─────────────────────────────────────────────────────────────
+
+def _hash(algorithm: str, cost: int, password: bytes) -> tuple:
+    started = time.perf_counter()
+    hashed = get_hasher(algorithm, cost).hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _verify(password: bytes, password_hash: str) -> tuple:
+    started = time.perf_counter()
+    # Thuật toán lấy từ chính chuỗi hash; hash hỏng / không nhận ra → coi như sai password
+    ok = verify_encoded(password, password_hash)
+    return ok, time.perf_counter() - started
+
+
+class HashExecutor:
+
+    def __init__(self, kind: str = "process", workers: int = 0, queue_size: int = 32):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"HASH_EXECUTOR không hợp lệ: {kind!r} (chọn {EXECUTOR_KINDS})")
+        self.kind = kind
+        self.workers = workers or _default_workers()
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor = None
+        self._pid = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self):
+        # Tạo lười + tạo lại nếu đang ở process khác (gunicorn fork sau khi import)
+        if self._executor is None or self._pid != os.getpid():
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+            self._pid = os.getpid()
+        return self._executor
+
+    def run(self, op: str, fn, *args):
+        """
+        Chạy fn(*args) → (kết quả, thời gian chạy) trong executor, chờ kết quả.
+
+        Raises:
+            HashQueueFullError: hàng đợi đã đầy
+            HashTimeoutError:   hết deadline của request trước khi có kết quả
+        """
+        if self.kind == "inline":
+            result, elapsed = fn(*args)
+            HASH_DURATION.observe(elapsed, op)
+            return result
+
+        timeout = remaining_seconds() if has_request_context() else None
+        if timeout is not None and timeout <= 0:
+            HASH_REJECTED.inc(op, "deadline")
+            raise HashTimeoutError("Request đã hết deadline")
+
+        with self._lock:
+            if self._pending >= self.capacity:
+                HASH_REJECTED.inc(op, "queue_full")
+                raise HashQueueFullError(
+                    f"Hàng đợi hash đầy ({self._pending}/{self.capacity})", self._retry_after())
+            self._pending += 1
+            executor = self._get_executor()
+
+        started = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._on_done(None)
+            raise
+        future.add_done_callback(self._on_done)
+        try:
+            result, elapsed = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Chưa chạy thì bỏ luôn; đang chạy thì để chạy xong (không ngắt được hàm hash)
+            future.cancel()
+            HASH_REJECTED.inc(op, "deadline")
+            raise HashTimeoutError("Hết deadline khi đang chờ hash")
+        except BrokenExecutor:
+            # Process con chết (OOM kill...) → pool hỏng vĩnh viễn, lần sau tạo pool mới
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            HASH_REJECTED.inc(op, "broken_pool")
+            raise HashExecutorError("Pool hash bị hỏng, đã tạo lại")
+        HASH_DURATION.observe(elapsed, op)
+        HASH_WAIT.observe(max(0.0, time.perf_counter() - started - elapsed), op)
+        return result
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _retry_after(self) -> float:
+        # Ước lượng thời gian xả hết hàng đợi hiện tại, ít nhất 1 giây
+        return max(1.0, math.ceil(self._pending / self.workers * TYPICAL_HASH_SECONDS))
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self._pending,
+        }
+
+
+def _default_workers() -> int:
+    """Số core chia đều cho các worker gunicorn của container (WEB_CONCURRENCY)."""
+    gunicorn_workers = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+    return max(1, (os.cpu_count() or 1) // gunicorn_workers)
+
+
+# Khởi tạo trong register_hash_executor() (script ngoài app → tạo theo giá trị mặc định)
+hash_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hash_executor() -> HashExecutor:
+    global hash_executor
+    if hash_executor is None:
+        with _executor_lock:
+            if hash_executor is None:
+                config = current_app.config if has_app_context() else {}
+                hash_executor = HashExecutor(
+                    str(config.get("HASH_EXECUTOR", "process")).lower(),
+                    workers=int(config.get("HASH_WORKERS", 0)),
+                    queue_size=int(config.get("HASH_QUEUE_SIZE", 32)),
+                )
+    return hash_executor
+
+
+# Thuật toán + cost đang cấu hình, khởi tạo cùng executor
+password_hasher = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global password_hasher
+    if password_hasher is None:
+        config = current_app.config if has_app_context() else {}
+        password_hasher = get_hasher(
+            str(config.get("PASSWORD_HASH_ALGORITHM", "bcrypt")).lower(),
+            int(config.get("PASSWORD_HASH_COST", 0)),
+        )
+    return password_hasher
+
+
+def hash_password(plain_password: str) -> str:
+    """Hash password bằng thuật toán / cost đang cấu hình (chạy trong executor)."""
+    hasher = get_password_hasher()
+    return get_hash_executor().run(
+        "hash", _hash, hasher.algorithm, hasher.cost, plain_password.encode("utf-8"))
+
+
+def verify_password(plain_password: str, password_hash: str) -> bool:
+    """password có khớp hash không (chạy trong executor); hash hỏng → False."""
+    if not password_hash:
+        return False
+    return get_hash_executor().run("verify", _verify, plain_password.encode("utf-8"), password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Hash tạo bằng thuật toán / cost khác cấu hình hiện tại (chỉ đọc chuỗi, không hash)."""
+    return bool(password_hash) and get_password_hasher().needs_rehash(password_hash)
+
+
+def register_hash_executor(app: Flask) -> None:
+    """
+    Tạo executor theo config của app + đăng ký error handler (503 / 504).
+    Gọi trong create_app(). Pool process chỉ được tạo ở lần hash đầu tiên.
+    """
+    with app.app_context():
+        get_hash_executor()
+        get_password_hasher()   # PASSWORD_HASH_ALGORITHM / COST sai → lỗi ngay lúc khởi động
+
+    @app.errorhandler(HashExecutorError)
+    def hash_executor_error(error):
+        headers = {}
+        if error.status == 503:
+            headers["Retry-After"] = str(int(math.ceil(error.retry_after)))
+        return error.body, error.status, headers
+
+
+REGISTRY.gauge_callback(
+    'password_hash_queue_depth', 'Việc hash đang chờ + đang chạy', (),
+    lambda: [((), hash_executor.pending)] if hash_executor is not None else [],
+)
@@ -1,47 +1,38 @@
-import bcrypt
-
-def hash_password(password: str) -> str:
-    """
-    Hash a password using bcrypt
-    
-    Args:
-        password: Plain text password
-        
-    Returns:
-        Hashed password as string
-    """
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-def verify_password(password: str, password_hash: str) -> bool:
-    """
-    Verify a password against its hash
-    
-    Args:
-        password: Plain text password
-        password_hash: Hashed password
-        
-    Returns:
-        True if password matches, False otherwise
-    """
-    try:
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            password_hash.encode('utf-8')
-        )
-    except Exception as e:
-        print(f"Password verification error: {e}")
-        return False
-
-def generate_test_hash():
-    """Generate hash for 'Password123!' for testing"""
-    return hash_password('Password123!')
-
-if __name__ == '__main__':
-    # Test
-    password = 'Password123!'
-    hashed = hash_password(password)
-    print(f"Password: {password}")
-    print(f"Hash: {hashed}")
+from app.utils import hash_executor
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the configured algorithm (runs in the hash executor)
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Hashed password as string
+    """
+    return hash_executor.hash_password(password)
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """
+    Verify a password against its hash (runs in the hash executor)
+    
+    Args:
+        password: Plain text password
+        password_hash: Hashed password
+        
+    Returns:
+        True if password matches, False otherwise
+    """
+    return hash_executor.verify_password(password, password_hash)
+
+def generate_test_hash():
+    """Generate hash for 'Password123!' for testing"""
+    return hash_password('Password123!')
+
+if __name__ == '__main__':
+    # Test
+    password = 'Password123!'
+    hashed = hash_password(password)
+    print(f"Password: {password}")
+    print(f"Hash: {hashed}")
     print(f"Verify: {verify_password(password, hashed)}")
\ No newline at end of file
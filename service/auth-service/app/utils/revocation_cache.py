@@ -0,0 +1,283 @@
+"""
+revocation_cache.py
+───────────────────
+Negative cache cho token blacklist: Bloom filter các jti đã bị revoke, nằm trong RAM của process.
+
+Tại sao cần?
+    Mọi request @jwt_required đều gọi check_if_token_revoked → TokenBlacklist.is_blacklisted
+    → 1 câu SELECT ... WHERE jti=? xuống MySQL. Gần như tất cả trả "chưa revoke"
+    → tốn 1 round-trip DB + 1 connection của pool cho câu trả lời gần như luôn là "không".
+
+Cách hoạt động:
+    - Bloom filter: "không có" là CHẮC CHẮN không có, "có" chỉ là CÓ THỂ có
+      → jti không có trong filter: trả False ngay, không chạm DB
+      → jti có thể có: hỏi DB như cũ (DB nói không → đếm là false positive)
+    - Khởi động: nạp jti của các token CHƯA hết hạn (token hết hạn bị JWT-Extended
+      từ chối trước khi tới bước kiểm tra blacklist)
+    - TokenBlacklist.add → thêm jti vào filter ngay sau commit (process hiện tại thấy ngay)
+    - Thread nền mỗi BLACKLIST_CACHE_REFRESH_SECONDS nạp các dòng mới (id > mốc) do
+      process / instance KHÁC ghi. Mỗi khoảng id được quét 2 lần liên tiếp → dòng có id
+      nhỏ nhưng commit muộn (auto-increment không commit theo thứ tự) vẫn được nạp
+    - Bloom không xóa được phần tử → mỗi BLACKLIST_CACHE_REBUILD_SECONDS (hoặc khi số
+      jti vượt capacity) dựng lại filter từ DB, bỏ jti đã hết hạn, capacity tăng theo số jti
+    - Refresh lỗi quá lâu (> 3 chu kỳ) → cache coi như hỏng, mọi lookup về DB như cũ
+
+Đánh đổi: token bị revoke ở process / instance khác có thể còn dùng được tối đa
+~BLACKLIST_CACHE_REFRESH_SECONDS (token revoke ở chính process này bị chặn ngay).
+
+Bộ nhớ: m = -n·ln(p) / ln(2)² bit. 100000 jti, p = 0.1% → ~176KB, 10 hàm hash.
+
+Metrics:
+    revocation_cache_lookups_total{result}   negative | db_hit | false_positive | bypass
+    revocation_cache_entries                 Số jti đã thêm vào filter hiện tại
+    revocation_cache_bytes                   Bộ nhớ của bit array
+    revocation_cache_fp_rate                 Tỉ lệ false positive ước lượng theo số jti đang có
+
+Cấu hình (app.config):
+    BLACKLIST_CACHE_ENABLED            false → luôn hỏi DB
+    BLACKLIST_CACHE_CAPACITY           Số jti dự kiến (filter tự lớn lên nếu vượt)
+    BLACKLIST_CACHE_FP_RATE            Tỉ lệ false positive mục tiêu
+    BLACKLIST_CACHE_REFRESH_SECONDS    0 → không chạy thread nền (test / 1 process duy nhất)
+    BLACKLIST_CACHE_REBUILD_SECONDS
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from flask import Flask
+
+from app.utils.metrics import REGISTRY
+
+LOOKUPS = REGISTRY.counter(
+    'revocation_cache_lookups_total', 'Kết quả tra cứu negative cache của token blacklist', ('result',))
+
+# Refresh lỗi liên tục quá số chu kỳ này → không tin cache nữa
+MAX_MISSED_REFRESHES = 3
+
+
+class BloomFilter:
+    """Bloom filter trên bytearray, k vị trí bit bằng double hashing từ 1 lần blake2b."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.size_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        # Refresh quét chồng khoảng id → cùng jti được add nhiều lần, chỉ đếm lần đầu
+        added = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self._bits[pos >> 3] & mask:
+                self._bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_fp_rate(self) -> float:
+        """(1 - e^(-kn/m))^k theo số phần tử đã thêm."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.size_bits)) ** self.num_hashes
+
+
+class RevocationCache:
+
+    def __init__(self, loader, capacity: int = 100_000, fp_rate: float = 0.001,
+                 refresh_interval: float = 2.0, rebuild_interval: float = 3600.0):
+        """
+        Args:
+            loader: loader(after_id) → list (id, jti) của token chưa hết hạn có id > after_id
+                    (chạy trong app context)
+        """
+        self.loader = loader
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._filter = None
+        self._floor_id = 0      # lần refresh tới quét id > _floor_id
+        self._max_id = 0        # id lớn nhất đã thấy
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+        self.last_error = None
+        self.negatives = 0
+        self.db_hits = 0
+        self.false_positives = 0
+        self.bypassed = 0
+
+    @property
+    def ready(self) -> bool:
+        if self._filter is None:
+            return False
+        if not self.refresh_interval:
+            return True
+        return time.monotonic() - self._last_refresh < self.refresh_interval * MAX_MISSED_REFRESHES
+
+    def might_contain(self, jti: str) -> bool:
+        """False → chắc chắn chưa bị revoke; True → phải hỏi DB."""
+        if not self.ready:
+            self.bypassed += 1
+            LOOKUPS.inc("bypass")
+            return True
+        if jti in self._filter:
+            return True
+        self.negatives += 1
+        LOOKUPS.inc("negative")
+        return False
+
+    def record_db_result(self, revoked: bool) -> None:
+        """Kết quả DB cho jti mà filter báo "có thể có"."""
+        if revoked:
+            self.db_hits += 1
+            LOOKUPS.inc("db_hit")
+        else:
+            self.false_positives += 1
+            LOOKUPS.inc("false_positive")
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def rebuild(self) -> None:
+        """Dựng filter mới từ toàn bộ token chưa hết hạn (bỏ jti cũ), rồi thay filter cũ."""
+        rows = self.loader(0)
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.fp_rate)
+        for _, jti in rows:
+            bloom.add(jti)
+        max_id = max((row_id for row_id, _ in rows), default=0)
+        with self._lock:
+            self._filter = bloom
+            # Dòng ghi trong lúc dựng (kể cả add() vào filter cũ) → refresh ngay dưới đây nạp lại
+            self._floor_id = min(self._max_id, max_id) if self._max_id else max_id
+            self._max_id = max(self._max_id, max_id)
+            self._last_rebuild = time.monotonic()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Nạp các dòng mới do process / instance khác ghi."""
+        rows = self.loader(self._floor_id)
+        with self._lock:
+            for _, jti in rows:
+                self._filter.add(jti)
+            # Khoảng (floor, max cũ] đã quét 2 lần → lần sau bắt đầu từ max cũ
+            self._floor_id = self._max_id
+            self._max_id = max([self._max_id] + [row_id for row_id, _ in rows])
+            self._last_refresh = time.monotonic()
+
+    def start(self, app: Flask) -> None:
+        threading.Thread(target=self._run, args=(app,), name='revocation-cache', daemon=True).start()
+
+    def _run(self, app: Flask) -> None:
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                with app.app_context():
+                    if (self._filter is None
+                            or time.monotonic() - self._last_rebuild >= self.rebuild_interval
+                            or self._filter.count > self._filter.capacity):
+                        self.rebuild()
+                    else:
+                        self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                app.logger.warning(f"[RevocationCache] Refresh lỗi: {e}")
+
+    def stats(self) -> dict:
+        bloom = self._filter
+        checked = self.negatives + self.db_hits + self.false_positives
+        possible = self.db_hits + self.false_positives
+        return {
+            "enabled": True,
+            "ready": self.ready,
+            "entries": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else self.capacity,
+            "bytes": bloom.nbytes if bloom else 0,
+            "num_hashes": bloom.num_hashes if bloom else 0,
+            "estimated_fp_rate": bloom.estimated_fp_rate() if bloom else None,
+            # Trên các jti CHƯA bị revoke: tỉ lệ bị filter báo nhầm "có thể có"
+            "observed_fp_rate": (self.false_positives / (self.negatives + self.false_positives)
+                                 if self.negatives + self.false_positives else None),
+            "lookups": checked + self.bypassed,
+            "negatives": self.negatives,
+            "db_hits": self.db_hits,
+            "false_positives": self.false_positives,
+            "db_queries_saved": round(self.negatives / checked, 4) if checked else None,
+            "possible_hits": possible,
+            "bypassed": self.bypassed,
+            "refresh_interval": self.refresh_interval,
+            "last_error": self.last_error,
+        }
+
+
+# Khởi tạo trong register_revocation_cache() (chưa bật → TokenBlacklist luôn hỏi DB)
+revocation_cache = None
+
+
+def register_revocation_cache(app: Flask, loader) -> None:
+    """
+    Nạp filter từ DB + chạy thread refresh. Gọi trong create_app() SAU db.create_all().
+    Nạp lỗi (DB chưa sẵn sàng...) → vẫn khởi động, thread nền thử dựng lại ở chu kỳ sau.
+    """
+    global revocation_cache
+    if not app.config.get("BLACKLIST_CACHE_ENABLED", True):
+        return
+    cache = RevocationCache(
+        loader,
+        capacity=int(app.config.get("BLACKLIST_CACHE_CAPACITY", 100_000)),
+        fp_rate=float(app.config.get("BLACKLIST_CACHE_FP_RATE", 0.001)),
+        refresh_interval=float(app.config.get("BLACKLIST_CACHE_REFRESH_SECONDS", 2.0)),
+        rebuild_interval=float(app.config.get("BLACKLIST_CACHE_REBUILD_SECONDS", 3600)),
+    )
+    try:
+        with app.app_context():
+            cache.rebuild()
+    except Exception as e:
+        cache.last_error = f"{type(e).__name__}: {e}"
+        app.logger.warning(f"[RevocationCache] Không nạp được blacklist lúc khởi động: {e}")
+    if cache.refresh_interval:
+        cache.start(app)
+    revocation_cache = cache
+
+
+def get_revocation_cache_stats() -> dict:
+    if revocation_cache is None:
+        return {"enabled": False}
+    return revocation_cache.stats()
+
+
+def _filter_samples(attr):
+    def samples():
+        bloom = revocation_cache._filter if revocation_cache is not None else None
+        return [((), attr(bloom))] if bloom is not None else []
+    return samples
+
+
+REGISTRY.gauge_callback(
+    'revocation_cache_entries', 'Số jti trong Bloom filter của token blacklist', (),
+    _filter_samples(lambda bloom: bloom.count))
+REGISTRY.gauge_callback(
+    'revocation_cache_bytes', 'Bộ nhớ bit array của Bloom filter', (),
+    _filter_samples(lambda bloom: bloom.nbytes))
+REGISTRY.gauge_callback(
+    'revocation_cache_fp_rate', 'Tỉ lệ false positive ước lượng của Bloom filter', (),
+    _filter_samples(lambda bloom: bloom.estimated_fp_rate()))
@@ -0,0 +1,232 @@
+"""
+revocation_store.py
+───────────────────
+Nơi lưu jti của token đã bị revoke (logout) — chọn được backend.
+
+Tại sao cần?
+    Bảng token_blacklist chỉ lớn lên (không ai nhớ chạy cleanup_expired) và mỗi lần
+    tra cứu là 1 lần dò index trên đĩa. jti chỉ cần nhớ tới lúc token hết hạn
+    → hợp với key-value store có TTL từng key: hết hạn là tự biến mất.
+
+3 backend:
+    MysqlRevocationStore   Bảng token_blacklist (qua TokenBlacklist, có Bloom filter
+                           phía trước — xem revocation_cache.py). Dùng chung mọi instance.
+    RedisRevocationStore   SET auth:revoked:<jti> EX <thời gian sống còn lại của token>
+                           → Redis tự xóa, không cần cleanup. Dùng chung mọi instance.
+    MemoryRevocationStore  dict trong RAM của process, hết hạn theo TTL — cho test /
+                           chạy 1 process (mỗi worker gunicorn nhớ riêng)
+
+Fallback (REVOCATION_FALLBACK=mysql, chỉ áp dụng khi backend chính khác mysql):
+    - Ghi vào backend chính lỗi (Redis sập / timeout) → ghi vào MySQL, logout vẫn thành công
+    - Kiểm tra: backend chính HOẶC MySQL → jti ghi vào MySQL lúc Redis sập vẫn bị chặn
+      sau khi Redis chạy lại. Bloom filter chặn trước nên gần như không tốn query MySQL
+    - Backend chính lỗi khi kiểm tra → chỉ còn MySQL trả lời (jti chỉ có trong Redis
+      tạm thời không bị chặn cho tới khi Redis chạy lại)
+    REVOCATION_FALLBACK=none: Redis lỗi → request lỗi 500 (không cho token đi qua khi
+    không kiểm tra được)
+
+Cấu hình (app.config):
+    REVOCATION_BACKEND     mysql | redis | memory
+    REVOCATION_FALLBACK    mysql | none
+    REDIS_URL              redis://:password@host:port/db (backend redis)
+
+Cách dùng:
+    store = get_revocation_store()
+    store.add(jti, "access", user_id, expires_at)
+    store.contains(jti)
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask
+
+from app.models.token_blacklist import TokenBlacklist
+from app.utils.metrics import REGISTRY
+
+BACKENDS = ("mysql", "redis", "memory")
+
+STORE_ERRORS = REGISTRY.counter(
+    'revocation_store_errors_total', 'Lỗi backend lưu token bị revoke', ('backend', 'op'))
+
+
+class RevocationStoreError(Exception):
+    """Backend không đọc / ghi được (mất kết nối, timeout...)."""
+
+
+def _ttl_seconds(expires_at: datetime) -> int:
+    """Số giây tới khi token hết hạn (expires_at là UTC naive như trong bảng token_blacklist)."""
+    return math.ceil((expires_at - datetime.utcnow()).total_seconds())
+
+
+class MysqlRevocationStore:
+
+    name = "mysql"
+
+    def add(self, jti: str, token_type: str, user_id: int, expires_at: datetime) -> None:
+        TokenBlacklist.add(jti=jti, token_type=token_type, user_id=user_id, expires_at=expires_at)
+
+    def contains(self, jti: str) -> bool:
+        return TokenBlacklist.is_blacklisted(jti)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryRevocationStore:
+
+    name = "memory"
+
+    def __init__(self):
+        self._entries = {}      # jti -> thời điểm hết hạn (time.monotonic())
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def add(self, jti: str, token_type: str, user_id: int, expires_at: datetime) -> None:
+        ttl = _ttl_seconds(expires_at)
+        if ttl <= 0:
+            return  # token đã hết hạn, JWT-Extended tự từ chối
+        now = time.monotonic()
+        with self._lock:
+            self._entries[jti] = now + ttl
+            self._prune(now)
+
+    def contains(self, jti: str) -> bool:
+        expires = self._entries.get(jti)
+        return expires is not None and expires > time.monotonic()
+
+    def _prune(self, now: float) -> None:
+        # Dọn jti hết hạn tối đa 1 lần / phút, không quét dict ở mỗi lần ghi
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 60
+        for jti in [jti for jti, expires in self._entries.items() if expires <= now]:
+            del self._entries[jti]
+
+    def stats(self) -> dict:
+        return {"keys": len(self._entries)}
+
+
+class RedisRevocationStore:
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "auth:revoked:", socket_timeout: float = 0.1):
+        """
+        Args:
+            url:            redis://:password@host:port/db
+            prefix:         Prefix cho mọi key jti
+            socket_timeout: Timeout (giây) mỗi lệnh — Redis chậm không được làm chậm mọi request
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("REVOCATION_BACKEND=redis cần cài package 'redis'") from e
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout
+        )
+        self._redis_error = redis.RedisError
+
+    def add(self, jti: str, token_type: str, user_id: int, expires_at: datetime) -> None:
+        ttl = _ttl_seconds(expires_at)
+        if ttl <= 0:
+            return
+        try:
+            # Giá trị chỉ để debug (redis-cli GET); kiểm tra chỉ cần EXISTS
+            self._client.set(self.prefix + jti, f"{token_type}:{user_id}", ex=ttl)
+        except self._redis_error as e:
+            raise RevocationStoreError(f"Redis SET lỗi: {e}") from e
+
+    def contains(self, jti: str) -> bool:
+        try:
+            return bool(self._client.exists(self.prefix + jti))
+        except self._redis_error as e:
+            raise RevocationStoreError(f"Redis EXISTS lỗi: {e}") from e
+
+    def stats(self) -> dict:
+        return {"prefix": self.prefix}
+
+
+class FallbackRevocationStore:
+    """Backend chính + MySQL dự phòng (xem docstring module)."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+        self._lock = threading.Lock()
+        self._errors = {"add": 0, "contains": 0}
+
+    def _record_error(self, op: str) -> None:
+        STORE_ERRORS.inc(self.primary.name, op)
+        with self._lock:
+            self._errors[op] += 1
+
+    def add(self, jti: str, token_type: str, user_id: int, expires_at: datetime) -> None:
+        try:
+            self.primary.add(jti, token_type, user_id, expires_at)
+        except RevocationStoreError:
+            self._record_error("add")
+            self.fallback.add(jti, token_type, user_id, expires_at)
+
+    def contains(self, jti: str) -> bool:
+        try:
+            if self.primary.contains(jti):
+                return True
+        except RevocationStoreError:
+            self._record_error("contains")
+        return self.fallback.contains(jti)
+
+    def stats(self) -> dict:
+        with self._lock:
+            errors = dict(self._errors)
+        return {
+            "primary": self.primary.stats(),
+            "fallback": self.fallback.stats(),
+            "primary_errors": errors,
+        }
+
+
+def create_revocation_store(config) -> object:
+    """Tạo store theo REVOCATION_BACKEND / REVOCATION_FALLBACK."""
+    backend = str(config.get("REVOCATION_BACKEND", "mysql")).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"REVOCATION_BACKEND không hợp lệ: {backend!r} (chọn {BACKENDS})")
+    if backend == "mysql":
+        return MysqlRevocationStore()
+
+    if backend == "redis":
+        primary = RedisRevocationStore(config.get("REDIS_URL", "redis://localhost:6379/0"))
+    else:
+        primary = MemoryRevocationStore()
+    if str(config.get("REVOCATION_FALLBACK", "mysql")).lower() == "mysql":
+        return FallbackRevocationStore(primary, MysqlRevocationStore())
+    return primary
+
+
+# Khởi tạo trong register_revocation_store()
+revocation_store = None
+
+
+def register_revocation_store(app: Flask):
+    """Gọi trong create_app(). Backend sai / thiếu package redis → lỗi ngay lúc khởi động."""
+    global revocation_store
+    revocation_store = create_revocation_store(app.config)
+    return revocation_store
+
+
+def get_revocation_store():
+    global revocation_store
+    if revocation_store is None:
+        # Script ngoài create_app() → bảng token_blacklist như trước
+        revocation_store = MysqlRevocationStore()
+    return revocation_store
+
+
+def get_revocation_store_stats() -> dict:
+    store = get_revocation_store()
+    return {"backend": store.name, **store.stats()}
@@ -1,57 +1,112 @@
-import os
-from datetime import timedelta
-from dotenv import load_dotenv
-
-load_dotenv()
-
-
-class Config:
-    # Flask
-    SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
-    DEBUG = False
-    TESTING = False
-
-    # Database (SQLAlchemy)
-    DB_HOST = os.getenv("DB_HOST", "localhost")
-    DB_PORT = os.getenv("DB_PORT", "3306")
-    DB_NAME = os.getenv("DB_NAME", "iot_monitoring")
-    DB_USER = os.getenv("DB_USER", "root")
-    DB_PASSWORD = os.getenv("DB_PASSWORD", "RootPassword123!")
-    SQLALCHEMY_DATABASE_URI = (
-        f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    )
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_POOL_SIZE = 5
-    SQLALCHEMY_POOL_RECYCLE = 300  # reconnect after 5 phút (tránh timeout)
-
-    # JWT
-    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-change-me")
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
-    JWT_TOKEN_LOCATION = ["headers"]
-    JWT_HEADER_NAME = "Authorization"
-    JWT_HEADER_TYPE = "Bearer"
-
-    # CORS
-    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
-
-
-class DevelopmentConfig(Config):
-    DEBUG = True
-
-
-class TestingConfig(Config):
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"  # dùng SQLite khi test
-
-
-class ProductionConfig(Config):
-    DEBUG = False
-
-
-config = {
-    "development": DevelopmentConfig,
-    "testing": TestingConfig,
-    "production": ProductionConfig,
-    "default": DevelopmentConfig,
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Config:
+    # Flask
+    SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
+    DEBUG = False
+    TESTING = False
+
+    # Database (SQLAlchemy)
+    DB_HOST = os.getenv("DB_HOST", "localhost")
+    DB_PORT = os.getenv("DB_PORT", "3306")
+    DB_NAME = os.getenv("DB_NAME", "iot_monitoring")
+    DB_USER = os.getenv("DB_USER", "root")
+    DB_PASSWORD = os.getenv("DB_PASSWORD", "RootPassword123!")
+    SQLALCHEMY_DATABASE_URI = (
+        f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_POOL_SIZE = 5
+    SQLALCHEMY_POOL_RECYCLE = 300  # reconnect after 5 phút (tránh timeout)
+
+    # JWT
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-change-me")
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    JWT_TOKEN_LOCATION = ["headers"]
+    JWT_HEADER_NAME = "Authorization"
+    JWT_HEADER_TYPE = "Bearer"
+
+    # CORS
+    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+
+    # Tracing W3C traceparent (xem app/utils/tracing.py)
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()    # none | file | http
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.1))   # chỉ áp dụng khi không có traceparent
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces-auth.jsonl")
+    TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "")      # VD: http://zipkin:9411/api/v2/spans
+
+    # Executor riêng cho bcrypt (xem app/utils/hash_executor.py)
+    HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "process").lower()   # process | thread | inline
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 0))                 # 0 → số core / WEB_CONCURRENCY
+    HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 32))          # việc chờ tối đa, quá → 503
+    # Thuật toán hash password (xem app/utils/password_hasher.py). Chọn cost: flask hasher calibrate
+    PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "bcrypt").lower()  # bcrypt | pbkdf2_sha256 | scrypt
+    PASSWORD_HASH_COST = int(os.getenv("PASSWORD_HASH_COST", 0))     # 0 → mặc định của thuật toán (bcrypt: 12)
+
+    # Nơi lưu jti đã revoke (xem app/utils/revocation_store.py)
+    REVOCATION_BACKEND = os.getenv("REVOCATION_BACKEND", "mysql").lower()    # mysql | redis | memory
+    REVOCATION_FALLBACK = os.getenv("REVOCATION_FALLBACK", "mysql").lower()  # mysql | none — khi backend chính lỗi
+    # Redis dùng chung — cùng biến môi trường với docker-compose
+    REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+    REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
+    REDIS_URL = os.getenv("REDIS_URL", f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/0")
+
+    # Negative cache Bloom filter trước bảng token_blacklist (xem app/utils/revocation_cache.py)
+    BLACKLIST_CACHE_ENABLED = os.getenv("BLACKLIST_CACHE_ENABLED", "true").lower() == "true"
+    BLACKLIST_CACHE_CAPACITY = int(os.getenv("BLACKLIST_CACHE_CAPACITY", 100000))       # số jti dự kiến
+    BLACKLIST_CACHE_FP_RATE = float(os.getenv("BLACKLIST_CACHE_FP_RATE", 0.001))        # false positive mục tiêu
+    BLACKLIST_CACHE_REFRESH_SECONDS = float(os.getenv("BLACKLIST_CACHE_REFRESH_SECONDS", 2))  # revoke ở process khác trễ tối đa ~chừng này
+    BLACKLIST_CACHE_REBUILD_SECONDS = float(os.getenv("BLACKLIST_CACHE_REBUILD_SECONDS", 3600))  # dựng lại, bỏ jti hết hạn
+
+    # Dọn token_blacklist hết hạn theo lô (xem app/utils/blacklist_cleanup.py)
+    BLACKLIST_CLEANUP_ENABLED = os.getenv("BLACKLIST_CLEANUP_ENABLED", "true").lower() == "true"
+    BLACKLIST_CLEANUP_INTERVAL_SECONDS = float(os.getenv("BLACKLIST_CLEANUP_INTERVAL_SECONDS", 3600))
+    BLACKLIST_CLEANUP_BATCH_SIZE = int(os.getenv("BLACKLIST_CLEANUP_BATCH_SIZE", 1000))   # dòng / transaction
+    BLACKLIST_CLEANUP_PAUSE_MS = float(os.getenv("BLACKLIST_CLEANUP_PAUSE_MS", 100))      # nghỉ giữa 2 lô
+
+    # Access log JSON lines, ghi bằng thread nền (xem app/utils/access_log.py)
+    ACCESS_LOG_LEVEL = os.getenv("ACCESS_LOG_LEVEL", "all").lower()          # off | errors | all
+    ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", 1000))        # level errors: vẫn ghi request chậm hơn ngưỡng
+    ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE", "")                       # rỗng / "-" → stdout
+    ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))   # đầy → bỏ dòng log, không chặn request
+    ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", 500))
+    ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", 1.0))  # giây
+
+    # Endpoint /api/auth/internal/* (saga đăng ký của Gateway) — Gateway gửi header X-Internal-Key
+    INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "change-me-internal")
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    # python run.py: process con spawn sẽ import lại run.py → dùng thread
+    HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread").lower()
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"  # dùng SQLite khi test
+    HASH_EXECUTOR = "inline"
+    REVOCATION_BACKEND = "memory"
+    REVOCATION_FALLBACK = "none"
+    # sqlite :memory: mỗi connection 1 DB riêng → không chạy thread refresh
+    BLACKLIST_CACHE_REFRESH_SECONDS = 0
+    BLACKLIST_CLEANUP_ENABLED = False
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+
+
+config = {
+    "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
+    "default": DevelopmentConfig,
 }
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""updated_at microseconds
+
+Revision ID: b7e4d2a91c05
+Revises: ca2f873200a6
+Create Date: 2026-10-18 09:00:00.000000
+
+updated_at của users / user_preferences → DATETIME(6). user-service tính ETag từ
+updated_at; DATETIME mặc định của MySQL chỉ lưu tới giây → 2 lần UPDATE trong cùng
+1 giây giữ nguyên ETag. Chỉ áp dụng cho MySQL (SQLite đã lưu micro giây).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4d2a91c05'
+down_revision = 'ca2f873200a6'
+branch_labels = None
+depends_on = None
+
+# user_preferences do user-service tạo → có thể chưa tồn tại ở DB này
+TABLES = ('users', 'user_preferences')
+
+
+def _alter_updated_at(type_):
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        if inspector.has_table(table):
+            op.alter_column(table, 'updated_at', existing_nullable=False,
+                            type_=type_, existing_type=mysql.DATETIME())
+
+
+def upgrade():
+    _alter_updated_at(mysql.DATETIME(fsp=6))
+
+
+def downgrade():
+    _alter_updated_at(mysql.DATETIME())
@@ -1,30 +1,78 @@
-# backend\gateway-service\app\__init__.py
-from flask import Flask
-from flask_cors import CORS 
-from app.config import Config
-
-def create_app():
-    app = Flask(__name__)
-
-    app.config.from_object(Config)
-
-    CORS(app, resources={
-        r"/api/*": {
-            "origins": ["http://localhost:5173", "http://localhost:5000"],
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": "*", # Cho phép tất cả headers để tránh lỗi header không khớp
-            "supports_credentials": True 
-        }
-    })
-    
-
-    # Đăng ký các Blueprint (Routes)
-    from app.routes.user_routes import user_bp
-    from app.routes.auth_routes import auth_bp
-    # from app.routes.user_routes import user_routes_bp # (Tự tạo file tương tự auth)
-
-    # Prefix giúp URL đẹp hơn: localhost:5000/api/auth/...
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(user_bp, url_prefix='/api/user')
-
+# backend\gateway-service\app\__init__.py
+from flask import Flask
+from flask_cors import CORS 
+from app.config import Config
+
+def create_app():
+    app = Flask(__name__)
+
+    app.config.from_object(Config)
+
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": ["http://localhost:5173", "http://localhost:5000"],
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": "*", # Cho phép tất cả headers để tránh lỗi header không khớp
+            "supports_credentials": True 
+        }
+    })
+    
+
+    # Đăng ký các Blueprint (Routes)
+    from app.routes.gateway_routes import gateway_bp
+    from app.routes.aggregate_routes import aggregate_bp
+    from app.routes.register_route import register_bp
+
+    # Prefix giúp URL đẹp hơn: localhost:5000/api/gateway/...
+    app.register_blueprint(gateway_bp, url_prefix='/api/gateway')
+    app.register_blueprint(aggregate_bp, url_prefix='/api/aggregate')
+    app.register_blueprint(register_bp)     # Route đã có sẵn /api/register
+
+    # Access log JSON lines qua queue + thread nền — đăng ký đầu tiên: đo trọn request
+    # và after_request chạy cuối cùng (status / kích thước body đã chốt)
+    from app.utils.access_log import register_access_log
+    register_access_log(app, "gateway")
+
+    # Route proxy /api/auth, /api/user... khai báo trong routes.json, không cần view riêng.
+    # Đăng ký trước tracing / metrics để nhãn route (prefix) có sẵn khi đo
+    from app.routes.proxy_routes import register_proxy_routes
+    register_proxy_routes(app)
+
+    # Nén response — after_request chạy theo thứ tự ngược đăng ký, đăng ký đầu tiên
+    # để nén là bước CUỐI (metrics / tracing vẫn đọc được body chưa nén)
+    from app.utils.compression import register_compression
+    register_compression(app)
+
+    # ETag / 304 — đăng ký sau nén để chạy TRƯỚC nén (ETag tính trên body gốc)
+    from app.utils.conditional_get import register_conditional_get
+    register_conditional_get(app)
+
+    # Tracing (traceparent) — span SERVER bao trọn request
+    from app.utils.tracing import register_tracing
+    register_tracing(app, "gateway")
+
+    # Metrics Prometheus (GET /metrics) — đăng ký trước rate limit để đếm cả request bị 429
+    from app.utils.metrics import register_metrics
+    register_metrics(app, "gateway")
+
+    # Rate limit token bucket theo IP / user / route — chặn trước khi gọi upstream
+    from app.middleware.rate_limit import register_rate_limit
+    register_rate_limit(app)
+
+    # Deadline cho từng request (budget theo route, xem app/utils/deadline.py)
+    from app.utils.deadline import register_deadline
+    register_deadline(app)
+
+    # Tạo sẵn connection pool keep-alive cho các upstream
+    from app.utils.upstream_pool import init_upstream_pools
+    init_upstream_pools()
+
+    # Thread nền probe /health của từng instance, instance unhealthy bị rút khỏi load balancer
+    from app.utils.health_checker import start_health_checker
+    start_health_checker(app)
+
+    # Thread nền gửi lại compensation của saga đăng ký (outbox)
+    from app.services.saga import start_outbox_worker
+    start_outbox_worker(app)
+
     return app
\ No newline at end of file
@@ -1,10 +1,214 @@
-# backend\gateway-service\app\config.py
-import os
-
-class Config:
-    SECRET_KEY = "SECRET_KEY" 
-
-    AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://localhost:5001/api/auth')
-    USER_SERVICE_URL = os.getenv('USER_SERVICE_URL', 'http://localhost:5002/api/user')
-    DATA_SERVICE_URL = os.getenv('DATA_SERVICE_URL', 'http://localhost:5003')
-
+# backend\gateway-service\app\config.py
+import os
+
+
+def _weighted_url_list(env_name: str, default: str) -> list:
+    """
+    "http://a:5001/api/auth;weight=3, http://b:5001/api/auth" → [(url, 3), (url, 1)]
+    Không khai báo → [(default, 1)]
+    """
+    raw = os.getenv(env_name, '')
+    instances = []
+    for item in raw.split(','):
+        url, _, params = item.strip().partition(';')
+        if not url:
+            continue
+        weight = 1
+        key, sep, value = params.strip().partition('=')
+        if sep and key.strip() == 'weight':
+            try:
+                weight = max(1, int(value))
+            except ValueError:
+                pass
+        instances.append((url.strip(), weight))
+    if default not in [url for url, _ in instances]:
+        instances.insert(0, (default, 1))
+    return instances
+
+
+def _url_list(env_name: str, default: str) -> list:
+    """"http://a:5001/api/auth, http://b:5001/api/auth" → list URL; không khai báo → [default]"""
+    return [url for url, _ in _weighted_url_list(env_name, default)]
+
+
+def _route_budgets(raw: str) -> dict:
+    """"/api/auth/login=3000,/api/user=1500" → {"/api/auth/login": 3000, "/api/user": 1500}"""
+    budgets = {}
+    for item in raw.split(','):
+        prefix, sep, ms = item.strip().partition('=')
+        if sep and prefix and ms.strip().isdigit():
+            budgets[prefix.strip()] = int(ms)
+    return budgets
+
+
+def _rate_limit(raw: str):
+    """"10:20" → (10.0, 20.0) = (token nạp mỗi giây, burst tối đa); rỗng / sai → None (không giới hạn)"""
+    rate, sep, burst = raw.strip().partition(':')
+    try:
+        rate = float(rate)
+        burst = float(burst) if sep else max(1.0, rate)
+    except ValueError:
+        return None
+    if rate <= 0 or burst <= 0:
+        return None
+    return rate, burst
+
+
+def _route_rate_limits(raw: str) -> dict:
+    """"/api/auth/login=0.2:5,/api/auth/register=0.05:3" → {prefix: (rate, burst)}"""
+    limits = {}
+    for item in raw.split(','):
+        prefix, sep, spec = item.strip().partition('=')
+        limit = _rate_limit(spec) if sep else None
+        if prefix and limit:
+            limits[prefix.strip()] = limit
+    return limits
+
+
+class Config:
+    SECRET_KEY = "SECRET_KEY" 
+
+    AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://localhost:5001/api/auth')
+    USER_SERVICE_URL = os.getenv('USER_SERVICE_URL', 'http://localhost:5002/api/user')
+    DATA_SERVICE_URL = os.getenv('DATA_SERVICE_URL', 'http://localhost:5003')
+    # Path preferences trên host user-service (nằm ngoài prefix /api/user của USER_SERVICE_URL)
+    USER_PREFERENCES_PATH = os.getenv('USER_PREFERENCES_PATH', '/api/users/me/preferences')
+
+    # Bảng route proxy khai báo (xem app/utils/route_table.py)
+    GATEWAY_ROUTES_FILE = os.getenv(
+        'GATEWAY_ROUTES_FILE', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'routes.json'))
+
+    # Các instance của cùng 1 service (instance đầu là *_SERVICE_URL) — dùng cho load balancing + hedging.
+    # Trọng số tùy chọn: AUTH_SERVICE_URLS="http://auth-1:5001/api/auth;weight=3,http://auth-2:5001/api/auth"
+    AUTH_SERVICE_INSTANCES = _url_list('AUTH_SERVICE_URLS', AUTH_SERVICE_URL)
+    USER_SERVICE_INSTANCES = _url_list('USER_SERVICE_URLS', USER_SERVICE_URL)
+    DATA_SERVICE_INSTANCES = _url_list('DATA_SERVICE_URLS', DATA_SERVICE_URL)
+    SERVICE_INSTANCE_WEIGHTS = dict(
+        _weighted_url_list('AUTH_SERVICE_URLS', AUTH_SERVICE_URL)
+        + _weighted_url_list('USER_SERVICE_URLS', USER_SERVICE_URL)
+        + _weighted_url_list('DATA_SERVICE_URLS', DATA_SERVICE_URL)
+    )
+
+    # Chọn instance cho mỗi request (xem app/utils/load_balancer.py)
+    LB_STRATEGY = os.getenv('LB_STRATEGY', 'least_outstanding')   # round_robin | weighted | least_outstanding
+    LB_SLOW_START_SECONDS = float(os.getenv('LB_SLOW_START_SECONDS', 30))   # instance vừa hồi phục nhận tải tăng dần
+
+    # Health check chủ động các instance upstream (xem app/utils/health_checker.py)
+    HEALTH_CHECK_ENABLED = os.getenv('HEALTH_CHECK_ENABLED', 'true').lower() == 'true'
+    # Service được probe — thêm "data" khi đã khai báo route tới DATA_SERVICE_URL
+    HEALTH_CHECK_SERVICES = [s.strip() for s in os.getenv('HEALTH_CHECK_SERVICES', 'auth,user').split(',') if s.strip()]
+    HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', 5))        # giây giữa 2 vòng probe
+    HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', 1))          # giây / probe
+    HEALTH_CHECK_UNHEALTHY_THRESHOLD = int(os.getenv('HEALTH_CHECK_UNHEALTHY_THRESHOLD', 2))  # lỗi liên tiếp → loại
+    HEALTH_CHECK_HEALTHY_THRESHOLD = int(os.getenv('HEALTH_CHECK_HEALTHY_THRESHOLD', 2))      # OK liên tiếp → nhận lại
+    # Path health tính từ gốc instance (scheme://host:port). user-service: /health có kiểm tra DB
+    AUTH_HEALTH_PATH = os.getenv('AUTH_HEALTH_PATH', '/api/auth/health')
+    USER_HEALTH_PATH = os.getenv('USER_HEALTH_PATH', '/health')
+    DATA_HEALTH_PATH = os.getenv('DATA_HEALTH_PATH', '/health')
+
+    # Connection pool tới upstream (xem app/utils/upstream_pool.py)
+    UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 20))              # connection keep-alive / upstream
+    UPSTREAM_POOL_BLOCK = os.getenv('UPSTREAM_POOL_BLOCK', 'false').lower() == 'true'
+    UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 2))  # giây
+    UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 10))       # giây
+
+    # Chế độ proxy: "stream" = passthrough byte theo chunk (mặc định), "json" = parse/jsonify như cũ
+    PROXY_STREAMING = os.getenv('GATEWAY_PROXY_MODE', 'stream').lower() == 'stream'
+    PROXY_CHUNK_SIZE = int(os.getenv('GATEWAY_PROXY_CHUNK_SIZE', 64 * 1024))   # byte / chunk
+
+    # Cache token đã verify trong check_user (xem app/utils/token_cache.py)
+    TOKEN_CACHE_ENABLED = os.getenv('TOKEN_CACHE_ENABLED', 'true').lower() == 'true'
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_MAX_TTL = float(os.getenv('TOKEN_CACHE_MAX_TTL', 300))   # giây
+
+    # Cache response GET theo user (xem app/utils/response_cache.py)
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 30))      # giây
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+
+    # Gộp GET/HEAD giống hệt nhau đang bay thành 1 lần gọi upstream (xem app/utils/single_flight.py)
+    COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', 'true').lower() == 'true'
+
+    # Circuit breaker + bulkhead / upstream (xem app/utils/circuit_breaker.py)
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))      # lỗi liên tiếp → mở circuit
+    BREAKER_RECOVERY_TIMEOUT = float(os.getenv('BREAKER_RECOVERY_TIMEOUT', 10))     # giây mở trước khi thử lại
+    BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv('BREAKER_HALF_OPEN_MAX_CALLS', 1))  # request thử ở half-open
+    BULKHEAD_MAX_CONCURRENT = int(os.getenv('BULKHEAD_MAX_CONCURRENT', 50))         # request đồng thời / upstream
+
+    # Deadline / route (xem app/utils/deadline.py): prefix path dài nhất khớp được dùng
+    DEFAULT_DEADLINE_MS = int(os.getenv('GATEWAY_DEADLINE_MS', 10000))
+    ROUTE_DEADLINES_MS = _route_budgets(os.getenv(
+        'GATEWAY_ROUTE_DEADLINES', '/api/auth/login=3000,/api/auth/register=3000,/api/register=5000,/api/user/profile=1500'
+    ))
+
+    # Hedged GET sang instance khác khi instance đầu chậm (xem app/utils/hedging.py)
+    HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'true').lower() == 'true'
+    HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 95))            # gửi hedge sau p95 latency
+    HEDGE_MIN_DELAY_MS = float(os.getenv('HEDGE_MIN_DELAY_MS', 10))
+    HEDGE_INITIAL_DELAY_MS = float(os.getenv('HEDGE_INITIAL_DELAY_MS', 100))  # khi chưa đủ mẫu latency
+    HEDGE_MAX_WORKERS = int(os.getenv('HEDGE_MAX_WORKERS', 32))
+    LATENCY_WINDOW_SIZE = int(os.getenv('LATENCY_WINDOW_SIZE', 512))       # mẫu latency gần nhất / upstream
+
+    # Redis dùng chung (rate limit store...) — cùng biến môi trường với docker-compose
+    REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
+    REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+    REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', '')
+    REDIS_URL = os.getenv('REDIS_URL', f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/0")
+
+    # Rate limit token bucket (xem app/middleware/rate_limit.py). Định dạng "rate/giây:burst"
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'memory').lower()     # memory | redis
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))    # chỉ store memory
+    RATE_LIMIT_PER_IP = _rate_limit(os.getenv('RATE_LIMIT_PER_IP', '50:100'))
+    RATE_LIMIT_PER_USER = _rate_limit(os.getenv('RATE_LIMIT_PER_USER', '20:40'))
+    RATE_LIMIT_ROUTES = _route_rate_limits(os.getenv(
+        'RATE_LIMIT_ROUTES', '/api/auth/login=0.2:5,/api/auth/register=0.05:3,/api/register=0.05:3'
+    ))
+    # Gateway đứng sau reverse proxy → lấy IP client từ X-Forwarded-For
+    RATE_LIMIT_TRUST_PROXY = os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+
+    # Tracing W3C traceparent (xem app/utils/tracing.py)
+    TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none').lower()          # none | file | http
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.1))         # tỉ lệ trace mới được ghi
+    TRACE_FILE = os.getenv('TRACE_FILE', 'traces-gateway.jsonl')
+    TRACE_COLLECTOR_URL = os.getenv('TRACE_COLLECTOR_URL', '')            # VD: http://zipkin:9411/api/v2/spans
+
+    # Access log JSON lines, ghi bằng thread nền (xem app/utils/access_log.py)
+    ACCESS_LOG_LEVEL = os.getenv('ACCESS_LOG_LEVEL', 'all').lower()          # off | errors | all
+    ACCESS_LOG_SLOW_MS = float(os.getenv('ACCESS_LOG_SLOW_MS', 1000))        # level errors: vẫn ghi request chậm hơn ngưỡng
+    ACCESS_LOG_FILE = os.getenv('ACCESS_LOG_FILE', '')                       # rỗng / "-" → stdout
+    ACCESS_LOG_QUEUE_SIZE = int(os.getenv('ACCESS_LOG_QUEUE_SIZE', 10000))   # đầy → bỏ dòng log, không chặn request
+    ACCESS_LOG_BATCH_SIZE = int(os.getenv('ACCESS_LOG_BATCH_SIZE', 500))
+    ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv('ACCESS_LOG_FLUSH_INTERVAL', 1.0))  # giây
+
+    # Nén response brotli / gzip theo Accept-Encoding (xem app/utils/compression.py)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))       # byte, nhỏ hơn thì không nén
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))      # 1 (nhanh) - 9 (nhỏ)
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))  # 0 (nhanh) - 11 (nhỏ)
+    # Load / core vượt ngưỡng → tự hạ xuống mức nén nhanh nhất
+    COMPRESSION_CPU_AWARE = os.getenv('COMPRESSION_CPU_AWARE', 'true').lower() == 'true'
+    COMPRESSION_HIGH_LOAD = float(os.getenv('COMPRESSION_HIGH_LOAD', 0.75))
+
+    # ETag + If-None-Match → 304 cho response GET (xem app/utils/conditional_get.py)
+    ETAG_ENABLED = os.getenv('ETAG_ENABLED', 'true').lower() == 'true'
+
+    # Endpoint gộp /api/aggregate/me (xem app/routes/aggregate_routes.py)
+    AGGREGATE_TIMEOUT_MS = int(os.getenv('AGGREGATE_TIMEOUT_MS', 1500))   # timeout riêng mỗi call con
+    AGGREGATE_MAX_WORKERS = int(os.getenv('AGGREGATE_MAX_WORKERS', 32))
+
+    # Saga đăng ký tài khoản /api/register (xem app/services/saga.py)
+    SAGA_DB_PATH = os.getenv('SAGA_DB_PATH', 'saga.sqlite3')                 # SQLite: saga log + outbox + idempotency
+    SAGA_STEP_TIMEOUT_MS = int(os.getenv('SAGA_STEP_TIMEOUT_MS', 3000))       # timeout mỗi bước gọi service
+    SAGA_MAX_WORKERS = int(os.getenv('SAGA_MAX_WORKERS', 32))                 # thread chạy các bước song song
+    SAGA_STALE_AFTER = float(os.getenv('SAGA_STALE_AFTER', 60))               # giây — saga 'running' lâu hơn → coi như process đã chết, hoàn tác
+    SAGA_RETENTION = float(os.getenv('SAGA_RETENTION', 604800))               # giây giữ saga đã xong trong log
+    SAGA_IDEMPOTENCY_TTL = float(os.getenv('SAGA_IDEMPOTENCY_TTL', 86400))    # giây giữ response theo Idempotency-Key
+    # giây — key 'in_progress' lâu hơn (Gateway chết giữa request) → request cùng key được chạy lại thay vì 409
+    SAGA_IDEMPOTENCY_LEASE = float(os.getenv('SAGA_IDEMPOTENCY_LEASE', SAGA_STALE_AFTER))
+    # Header X-Internal-Key cho endpoint /internal/* của auth-service / user-service (phải khớp INTERNAL_API_KEY bên đó)
+    INTERNAL_API_KEY = os.getenv('INTERNAL_API_KEY', 'change-me-internal')
+    OUTBOX_WORKER_ENABLED = os.getenv('OUTBOX_WORKER_ENABLED', 'true').lower() == 'true'
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 1.0))      # giây giữa 2 lần quét outbox
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 20))           # quá số lần → 'dead', chờ xử lý tay
+    OUTBOX_MAX_BACKOFF = float(os.getenv('OUTBOX_MAX_BACKOFF', 300))          # giây, trần của backoff lũy thừa
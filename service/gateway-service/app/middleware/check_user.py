@@ -1,49 +1,72 @@
-import jwt
-from flask import request, jsonify, current_app
-
-def check_user():
-    """
-    Kiểm tra Token (Ưu tiên lấy từ Cookie -> sau đó mới check Header nếu cần)
-
-    Trả về tuple:
-      (True, payload, None) khi thành công
-      (False, error_dict, status_code) khi thất bại
-    """
-    token = None
-
-    # CÁCH 1: Lấy từ Cookie (Khuyên dùng cho Web App)
-    token = request.cookies.get('access_token_cookie')
-
-    # CÁCH 2: Nếu không có cookie, thử tìm trong Header (Cho Mobile/Postman check nhanh)
-    if not token:
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-
-    # Nếu tìm cả 2 nơi đều không thấy
-    if not token:
-        return False, {"error": "Unauthorized", "message": "Không tìm thấy Access Token"}, 401
-
-    # Giải mã Token
-    try:
-        secret_key = current_app.config.get("SECRET_KEY")
-
-        payload = jwt.decode(
-            token,
-            secret_key,
-            algorithms=["HS256"]
-        )
-
-        if payload.get("type") != "access":
-            return False, {"error": "Invalid Token Type", "message": "Đây không phải là Access Token"}, 401
-
-        # --- THÀNH CÔNG ---
-        # Trả về payload để dùng nếu cần (ví dụ lấy user_id forward sang service khác)
-        return True, payload, None
-
-    except jwt.ExpiredSignatureError:
-        return False, {"error": "Token Expired", "message": "Phiên đăng nhập hết hạn"}, 401
-    except jwt.InvalidTokenError:
-        return False, {"error": "Invalid Token", "message": "Token không hợp lệ"}, 401
-    except Exception as e:
+import jwt
+from flask import request, jsonify, current_app
+from app.config import Config
+from app.utils.token_cache import VerifiedTokenCache
+
+# Cache các token đã verify chữ ký — dùng chung cho mọi request của process
+token_cache = VerifiedTokenCache(
+    max_size=Config.TOKEN_CACHE_SIZE,
+    max_ttl=Config.TOKEN_CACHE_MAX_TTL,
+)
+
+def get_request_token():
+    """Lấy access token của request (Cookie trước, sau đó Header). Không có → None."""
+    token = None
+
+    # CÁCH 1: Lấy từ Cookie (Khuyên dùng cho Web App)
+    token = request.cookies.get('access_token_cookie')
+
+    # CÁCH 2: Nếu không có cookie, thử tìm trong Header (Cho Mobile/Postman check nhanh)
+    if not token:
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+
+    return token
+
+def check_user():
+    """
+    Kiểm tra Token (Ưu tiên lấy từ Cookie -> sau đó mới check Header nếu cần)
+
+    Trả về tuple:
+      (True, payload, None) khi thành công
+      (False, error_dict, status_code) khi thất bại
+    """
+    token = get_request_token()
+
+    # Nếu tìm cả 2 nơi đều không thấy
+    if not token:
+        return False, {"error": "Unauthorized", "message": "Không tìm thấy Access Token"}, 401
+
+    # Token đã verify trước đó và chưa hết hạn → bỏ qua verify chữ ký + parse claims
+    if Config.TOKEN_CACHE_ENABLED:
+        cached_payload = token_cache.get(token)
+        if cached_payload is not None:
+            return True, cached_payload, None
+
+    # Giải mã Token
+    try:
+        secret_key = current_app.config.get("SECRET_KEY")
+
+        payload = jwt.decode(
+            token,
+            secret_key,
+            algorithms=["HS256"]
+        )
+
+        if payload.get("type") != "access":
+            return False, {"error": "Invalid Token Type", "message": "Đây không phải là Access Token"}, 401
+
+        if Config.TOKEN_CACHE_ENABLED:
+            token_cache.put(token, payload)
+
+        # --- THÀNH CÔNG ---
+        # Trả về payload để dùng nếu cần (ví dụ lấy user_id forward sang service khác)
+        return True, payload, None
+
+    except jwt.ExpiredSignatureError:
+        return False, {"error": "Token Expired", "message": "Phiên đăng nhập hết hạn"}, 401
+    except jwt.InvalidTokenError:
+        return False, {"error": "Invalid Token", "message": "Token không hợp lệ"}, 401
+    except Exception as e:
         return False, {"error": "Internal Error", "message": str(e)}, 500
\ No newline at end of file
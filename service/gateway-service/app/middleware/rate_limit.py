@@ -0,0 +1,176 @@
+"""
+rate_limit.py
+─────────────
+Admission control của Gateway: rate limit token bucket theo IP, theo user
+và theo route, chạy trong before_request — TRƯỚC khi chạm tới upstream.
+
+Tại sao cần?
+    /api/auth/login tốn ~250ms CPU bcrypt ở auth-service. 1 client spam login
+    là đủ chiếm hết worker của auth-service, mọi user khác bị chậm theo.
+
+Các bucket (cấu hình trong Config, định dạng "rate/giây:burst"):
+    RATE_LIMIT_ROUTES    Theo route (prefix path), đếm riêng cho từng user/IP
+    RATE_LIMIT_PER_USER  Theo user — chỉ khi token đã có sẵn trong token_cache
+                         (không verify JWT ở đây để giữ chi phí từ chối thấp)
+    RATE_LIMIT_PER_IP    Theo IP client, mọi route
+
+Response:
+    Mọi response có header RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset
+    của bucket chặt nhất. Bị chặn → 429 + Retry-After, không gọi upstream.
+"""
+
+import math
+import threading
+
+from flask import g, jsonify, request
+
+from app.config import Config
+from app.middleware.check_user import get_request_token, token_cache
+from app.utils.rate_limit_store import create_bucket_store
+
+
+class RateLimiter:
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._stats = {"allowed": 0, "rejected": 0}
+
+    @staticmethod
+    def client_ip() -> str:
+        if Config.RATE_LIMIT_TRUST_PROXY:
+            forwarded = request.headers.get('X-Forwarded-For', '')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.remote_addr or 'unknown'
+
+    @staticmethod
+    def _user_id():
+        """User của request nếu token đã được verify trước đó (chỉ tra cache)."""
+        token = get_request_token()
+        if not token:
+            return None
+        payload = token_cache.peek(token)
+        if payload is None:
+            return None
+        return str(payload.get('sub'))
+
+    @staticmethod
+    def _route_limit(path: str):
+        """(prefix, (rate, burst)) của prefix dài nhất khớp path, hoặc None."""
+        best = None
+        for prefix, limit in Config.RATE_LIMIT_ROUTES.items():
+            if path.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, limit)
+        return best
+
+    def _buckets(self) -> list:
+        """Danh sách (key, rate, burst) áp dụng cho request hiện tại, chặt nhất trước."""
+        ip = self.client_ip()
+        user_id = self._user_id()
+        buckets = []
+
+        route = self._route_limit(request.path)
+        if route:
+            prefix, (rate, burst) = route
+            identity = f"user:{user_id}" if user_id else f"ip:{ip}"
+            buckets.append((f"route:{prefix}:{identity}", rate, burst))
+        if user_id and Config.RATE_LIMIT_PER_USER:
+            buckets.append((f"user:{user_id}", *Config.RATE_LIMIT_PER_USER))
+        if Config.RATE_LIMIT_PER_IP:
+            buckets.append((f"ip:{ip}", *Config.RATE_LIMIT_PER_IP))
+        return buckets
+
+    def check(self):
+        """
+        Lấy 1 token ở mọi bucket của request — hoặc không bucket nào nếu có 1
+        bucket thiếu (request bị chặn không tiêu token của các bucket còn lại).
+
+        Returns:
+            (allowed, state) — state = (rate, burst, tokens_left) của bucket chặt nhất
+            (bucket đã chặn nếu allowed=False), None nếu không có bucket nào
+        """
+        buckets = self._buckets()
+        if not buckets:
+            self._count("allowed")
+            return True, None
+        allowed, tokens = self.store.consume_all(buckets)
+        states = [(rate, burst, left) for (_, rate, burst), left in zip(buckets, tokens)]
+        if not allowed:
+            self._count("rejected")
+            return False, next(state for state in states if state[2] < 1)
+        self._count("allowed")
+        return True, min(states, key=lambda state: state[2])
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot.update({
+            "store": self.store.name,
+            "store_stats": self.store.stats(),
+            "per_ip": Config.RATE_LIMIT_PER_IP,
+            "per_user": Config.RATE_LIMIT_PER_USER,
+            "routes": Config.RATE_LIMIT_ROUTES,
+        })
+        return snapshot
+
+
+# Endpoint cho hệ thống giám sát (Prometheus scrape...) — không giới hạn
+EXEMPT_PATHS = ('/metrics',)
+
+# Khởi tạo trong register_rate_limit() (store Redis cần kết nối lúc tạo app)
+rate_limiter = None
+
+
+def _rate_limit_headers(state) -> dict:
+    rate, burst, tokens = state
+    return {
+        'RateLimit-Limit': str(int(burst)),
+        'RateLimit-Remaining': str(max(0, int(tokens))),
+        'RateLimit-Reset': str(math.ceil(max(0.0, burst - tokens) / rate)),
+    }
+
+
+def enforce_rate_limit():
+    """before_request: vượt giới hạn → 429 ngay tại Gateway."""
+    if request.method == 'OPTIONS' or request.path in EXEMPT_PATHS:
+        return None  # CORS preflight / scrape metrics không tính
+
+    allowed, state = rate_limiter.check()
+    if state is None:
+        return None
+
+    headers = _rate_limit_headers(state)
+    if allowed:
+        g.rate_limit_headers = headers
+        return None
+
+    rate, _, tokens = state
+    headers['Retry-After'] = str(max(1, math.ceil((1 - tokens) / rate)))
+    response = jsonify({
+        "error": "Too Many Requests",
+        "message": "Vượt quá số request cho phép, vui lòng thử lại sau"
+    })
+    response.status_code = 429
+    response.headers.extend(headers)
+    return response
+
+
+def add_rate_limit_headers(response):
+    headers = g.get('rate_limit_headers')
+    if headers:
+        response.headers.extend(headers)
+    return response
+
+
+def register_rate_limit(app) -> None:
+    global rate_limiter
+    if not Config.RATE_LIMIT_ENABLED:
+        return
+    rate_limiter = RateLimiter(create_bucket_store())
+    app.before_request(enforce_rate_limit)
+    app.after_request(add_rate_limit_headers)
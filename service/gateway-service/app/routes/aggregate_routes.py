@@ -0,0 +1,139 @@
+"""
+aggregate_routes.py
+───────────────────
+Endpoint gộp dữ liệu cho trang Profile / Admin trong 1 round trip.
+
+Tại sao cần?
+    Frontend gọi lần lượt auth /me, user profile, preferences qua Gateway
+    → 3 round trip nối tiếp trước khi vẽ được trang đầu tiên.
+
+Cách hoạt động:
+    GET /api/aggregate/me
+    - Verify token 1 lần tại Gateway (check_user)
+    - Gọi SONG SONG các upstream, mỗi call có timeout riêng (AGGREGATE_TIMEOUT_MS,
+      không vượt deadline còn lại của request)
+    - Mọi call đi qua send_request như proxy: load balancer chọn instance (bỏ instance
+      unhealthy / circuit OPEN), connection pool, circuit breaker + bulkhead, hedging
+    - Call nào lỗi / timeout → data = null, ghi vào "errors", "partial" = true;
+      các phần còn lại vẫn trả về bình thường
+    - Mọi call đều lỗi → 502
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from flask import Blueprint, jsonify, request
+
+from app.config import Config
+from app.middleware.check_user import check_user, get_request_token
+from app.utils.circuit_breaker import UpstreamRejectedError
+from app.utils.deadline import DEADLINE_HEADER, remaining_seconds
+from app.utils.hedging import send_request
+from app.utils.load_balancer import service_origin
+from app.utils.tracing import inject_trace_headers, start_client_span
+from app.utils.upstream_pool import get_upstream_pool
+
+aggregate_bp = Blueprint('aggregate_bp', __name__)
+
+_executor = ThreadPoolExecutor(max_workers=Config.AGGREGATE_MAX_WORKERS, thread_name_prefix='aggregate')
+
+# (tên phần dữ liệu, base URL service, URL đầy đủ trên instance chính) — mỗi phần là 1 call song song
+PROFILE_PAGE_CALLS = (
+    ('account', Config.AUTH_SERVICE_URL, Config.AUTH_SERVICE_URL.rstrip('/') + '/me'),
+    ('profile', Config.USER_SERVICE_URL, Config.USER_SERVICE_URL.rstrip('/') + '/me'),
+    # Cùng pool / load balancer / breaker với user-service, path ngoài prefix /api/user
+    ('preferences', Config.USER_SERVICE_URL,
+     service_origin(Config.USER_SERVICE_URL) + Config.USER_PREFERENCES_PATH),
+)
+
+
+def _fetch(service_url: str, url: str, headers: dict, timeout: float):
+    """Chạy trong thread của executor: trả về (status, body JSON) hoặc raise."""
+    connect_timeout = get_upstream_pool(service_url).connect_timeout
+    resp = send_request(service_url, url, 'GET', headers,
+                        timeout=(min(connect_timeout, timeout), timeout))
+    try:
+        body = resp.json() if resp.content else {}
+    except ValueError:
+        body = {}
+    return resp.status_code, body
+
+
+def _error_entry(error: Exception) -> dict:
+    if isinstance(error, (requests.exceptions.Timeout, TimeoutError)):
+        return {"status": 504, "error": "Timeout"}
+    if isinstance(error, UpstreamRejectedError):
+        # Circuit OPEN / bulkhead đầy ở mọi instance → không gửi request
+        return {"status": 503, "error": type(error).__name__}
+    return {"status": 503, "error": "Service Unavailable"}
+
+
+@aggregate_bp.route('/me', methods=['GET'])
+def profile_page():
+    is_valid, payload_or_error, status = check_user()
+    if not is_valid:
+        return jsonify(payload_or_error), status
+
+    user_id = str(payload_or_error.get('sub'))
+    timeout = Config.AGGREGATE_TIMEOUT_MS / 1000
+    remaining = remaining_seconds()
+    if remaining is not None:
+        timeout = min(timeout, remaining)
+
+    # Header chung cho mọi call: token dạng Bearer (service chỉ đọc header) + danh tính user
+    base_headers = {
+        'Authorization': f"Bearer {get_request_token()}",
+        'X-User-ID': user_id,
+        DEADLINE_HEADER: str(int(timeout * 1000)),
+    }
+    if request.headers.get('Cookie'):
+        base_headers['Cookie'] = request.headers['Cookie']
+
+    # Span + header được tạo ở thread request (thread của executor không có request context)
+    calls = {}
+    for name, service_url, url in PROFILE_PAGE_CALLS:
+        headers = dict(base_headers)
+        span = start_client_span(f'GET {url}')
+        inject_trace_headers(headers, span)
+        calls[name] = (span, _executor.submit(_fetch, service_url, url, headers, timeout))
+
+    started = time.monotonic()
+    wait([future for _, future in calls.values()], timeout=timeout)
+
+    data, errors = {}, {}
+    for name, (span, future) in calls.items():
+        data[name] = None
+        if not future.done():
+            # Thread vẫn chạy tiếp tới timeout của requests rồi tự kết thúc
+            errors[name] = {"status": 504, "error": "Timeout"}
+        elif future.exception() is not None:
+            errors[name] = _error_entry(future.exception())
+        else:
+            sub_status, body = future.result()
+            if sub_status == 200:
+                data[name] = body.get('data', body) if isinstance(body, dict) else body
+            else:
+                errors[name] = {"status": sub_status, "error": body.get('error') if isinstance(body, dict) else None}
+
+        if span is not None:
+            span.set_attribute('aggregate.part', name)
+            if name in errors:
+                span.set_attribute('error', errors[name]['error'])
+            span.end()
+
+    if len(errors) == len(calls):
+        return jsonify({
+            "success": False,
+            "partial": False,
+            "data": data,
+            "errors": errors,
+        }), 502
+
+    return jsonify({
+        "success": not errors,
+        "partial": bool(errors),
+        "data": data,
+        "errors": errors,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    }), 200
@@ -0,0 +1,142 @@
+from flask import Blueprint, jsonify
+from app.middleware.check_user import check_user, token_cache
+from app.utils.upstream_pool import get_pool_stats, get_breaker_stats
+from app.utils.response_cache import user_response_cache
+from app.utils.proxy_handler import single_flight
+from app.utils.hedging import get_hedging_stats
+from app.utils.load_balancer import get_load_balancer_stats
+from app.utils.health_checker import get_health_matrix
+from app.middleware import rate_limit
+from app.services.saga import get_saga_stats
+from app.utils.access_log import get_access_log_stats
+
+gateway_bp = Blueprint('gateway_bp', __name__)
+
+# --- GATEWAY ADMIN ROUTES (chỉ admin) ---
+
+def _require_admin():
+    """
+    Kiểm tra token + role admin.
+    Trả về None nếu hợp lệ, ngược lại trả về (response, status) để view return luôn.
+    """
+    is_valid, payload_or_error, status = check_user()
+
+    if not is_valid:
+        return jsonify(payload_or_error), status
+
+    if payload_or_error.get('role') != 'admin':
+        return jsonify({"error": "Forbidden", "message": "Chỉ admin mới được truy cập"}), 403
+
+    return None
+
+
+@gateway_bp.route('/pools', methods=['GET'])
+def pool_stats():
+    # Metrics connection pool của từng upstream (requests, in_flight, pool_exhausted...)
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_pool_stats()), 200
+
+
+@gateway_bp.route('/token-cache', methods=['GET'])
+def token_cache_stats():
+    # Hit/miss của cache token đã verify trong check_user
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(token_cache.stats()), 200
+
+
+@gateway_bp.route('/response-cache', methods=['GET'])
+def response_cache_stats():
+    # Hit/miss/invalidate của cache response GET theo user
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(user_response_cache.stats()), 200
+
+
+@gateway_bp.route('/coalescing', methods=['GET'])
+def coalescing_stats():
+    # Số request leader / follower đã được gộp bởi single-flight
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(single_flight.stats()), 200
+
+
+@gateway_bp.route('/breakers', methods=['GET'])
+def breaker_stats():
+    # Trạng thái circuit breaker (closed/open/half_open) + bulkhead của từng upstream
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_breaker_stats()), 200
+
+
+@gateway_bp.route('/hedging', methods=['GET'])
+def hedging_stats():
+    # Số request đã hedge, bên thắng (instance chính / bản sao) và danh sách instance
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_hedging_stats()), 200
+
+
+@gateway_bp.route('/load-balancer', methods=['GET'])
+def load_balancer_stats():
+    # Chiến lược, trọng số (gồm slow start), request đang bay và trạng thái eject của từng instance
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_load_balancer_stats()), 200
+
+
+@gateway_bp.route('/health', methods=['GET'])
+def health_matrix():
+    # Kết quả health check chủ động của từng instance (healthy, lỗi gần nhất, latency probe)
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_health_matrix()), 200
+
+
+@gateway_bp.route('/rate-limit', methods=['GET'])
+def rate_limit_stats():
+    # Số request cho qua / bị chặn 429 và cấu hình bucket hiện tại
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    if rate_limit.rate_limiter is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify(rate_limit.rate_limiter.stats()), 200
+
+
+@gateway_bp.route('/sagas', methods=['GET'])
+def saga_stats():
+    # Số saga theo trạng thái + compensation đang chờ / đã bỏ (dead) trong outbox
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_saga_stats()), 200
+
+
+@gateway_bp.route('/access-log', methods=['GET'])
+def access_log_stats():
+    # Dòng access log đang chờ ghi / đã ghi / bị bỏ vì queue đầy
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    return jsonify(get_access_log_stats()), 200
@@ -0,0 +1,74 @@
+"""
+proxy_routes.py
+───────────────
+1 view duy nhất chuyển tiếp mọi path /api/... theo bảng route (app/utils/route_table.py).
+
+Route Flask cụ thể (/api/gateway/..., /api/aggregate/..., /api/register) vẫn
+được Werkzeug ưu tiên hơn rule bắt-tất-cả /api/<path:path> → không bị ảnh hưởng.
+"""
+
+from flask import g, jsonify, request
+
+from app.middleware.check_user import check_user
+from app.utils.proxy_handler import forward_request
+from app.utils.response_cache import cached_user_get
+from app.utils.route_table import load_route_table
+
+DISPATCH_ENDPOINT = 'gateway_dispatch'
+DISPATCH_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+# Biên dịch trong register_proxy_routes()
+route_table = None
+
+
+def _match_route():
+    """before_request: tìm route sớm để metrics / tracing gắn nhãn theo prefix."""
+    if request.endpoint != DISPATCH_ENDPOINT:
+        return None
+    route, rest = route_table.match(request.path, request.method)
+    g.gateway_route = route
+    g.route_rest = rest
+    if route is not None:
+        g.route_label = route.prefix
+    return None
+
+
+def dispatch(path):
+    route = g.get('gateway_route')
+    if route is None:
+        if g.get('route_rest'):
+            return jsonify({"error": "Method Not Allowed"}), 405
+        return jsonify({"error": "Not Found", "message": f"Không có route cho {request.path}"}), 404
+
+    extra_headers = None
+    user_id = None
+    if route.auth != 'none':
+        is_valid, payload_or_error, status = check_user()
+        if not is_valid:
+            return jsonify(payload_or_error), status
+        if route.auth == 'admin' and payload_or_error.get('role') != 'admin':
+            return jsonify({"error": "Forbidden", "message": "Chỉ admin mới được truy cập"}), 403
+        # Thêm header X-User-ID để service biết ai đang gọi
+        user_id = str(payload_or_error.get('sub'))
+        g.user_id = user_id     # cho access log
+        extra_headers = {'X-User-ID': user_id}
+
+    endpoint = route.target_path(g.route_rest)
+    if route.cache and request.method == 'GET':
+        return cached_user_get(
+            user_id,
+            lambda: forward_request(route.upstream, endpoint, extra_headers=extra_headers),
+        )
+    return forward_request(route.upstream, endpoint, extra_headers=extra_headers)
+
+
+def register_proxy_routes(app) -> None:
+    """
+    Biên dịch bảng route + đăng ký view chung. Gọi trong create_app(), TRƯỚC
+    register_tracing / register_metrics để nhãn route có sẵn khi đo.
+    Bảng route sai → RouteConfigError ngay lúc khởi động.
+    """
+    global route_table
+    route_table = load_route_table()
+    app.before_request(_match_route)
+    app.add_url_rule('/api/<path:path>', DISPATCH_ENDPOINT, dispatch, methods=DISPATCH_METHODS)
@@ -1,69 +1,62 @@
 from flask import Blueprint, request, jsonify
-import requests 
-from app.services.auth_client import register_auth
-from app.services.user_client import create_user_profile
+
+from app.config import Config
+from app.services.registration import REGISTER_SAGA, REQUIRED_FIELDS, split_input
+from app.services.saga import StepFailed, get_saga_store
+from app.utils.deadline import remaining_seconds
+from app.utils.tracing import TRACEPARENT_HEADER, current_span
 
 register_bp = Blueprint("register", __name__)
 
+
 @register_bp.route("/api/register", methods=["POST"])
 def register():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
 
     # 0️⃣ Validate input
-    required_fields = ["username", "password", "name", "email", "telphone"]
-    missing = [f for f in required_fields if f not in data]
+    missing = [f for f in REQUIRED_FIELDS if f not in data]
     if missing:
         return jsonify({
             "error": "Missing required fields",
             "missing_fields": missing
         }), 400
 
-    # 1️⃣ Auth payload
-    auth_payload = {
-        "username": data["username"],
-        "password": data["password"]
-    }
-
-    try:
-        auth_res = requests.post(
-            "http://localhost:5001/api/auth/register",
-            json=auth_payload,
-            timeout=5
-        )
-    except requests.exceptions.RequestException:
-        return jsonify({"error": "Auth service unavailable"}), 503
-
-    if auth_res.status_code != 201:
-        return auth_res.json(), auth_res.status_code
-
-    user_id = auth_res.json()["user_id"]
-
-    # 2️⃣ User payload
-    user_payload = {
-        "user_id": user_id,
-        "name": data["name"],
-        "email": data["email"],
-        "telphone": data["telphone"]
-    }
-
-    try:
-        user_res = requests.post(
-            "http://localhost:5002/api/user/internal/users",
-            json=user_payload,
-            timeout=5
-        )
-    except requests.exceptions.RequestException:
-        return jsonify({"error": "User service unavailable"}), 503
-
-    if user_res.status_code != 201:
-        # rollback auth
-        requests.delete(
-            f"http://localhost:5001/api/auth/internal/users/{user_id}",
-            timeout=5
-        )
-        return user_res.json(), user_res.status_code
-
-    return jsonify({
-        "message": "Register successful",
-        "user_id": user_id
-    }), 201
+    # 1️⃣ Idempotency-Key: client retry cùng key → trả lại đúng response lần trước
+    store = get_saga_store()
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        claimed, previous = store.claim_idempotency_key(
+            idempotency_key, Config.SAGA_IDEMPOTENCY_TTL, Config.SAGA_IDEMPOTENCY_LEASE)
+        if not claimed:
+            if previous is None:
+                return jsonify({"error": "Request with this Idempotency-Key is in progress"}), 409
+            status, body = previous
+            return jsonify(body), status
+
+    # 2️⃣ Chạy saga — lỗi thì compensation đã nằm trong outbox, không rollback inline
+    headers = {}
+    span = current_span()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent
+    # Mật khẩu đi qua secrets (RAM) → saga log chỉ giữ username / name / email / telphone
+    saga_input, secrets = split_input(data)
+    result = REGISTER_SAGA.run(saga_input, idempotency_key, headers, budget=remaining_seconds(),
+                               secrets=secrets)
+
+    if result.ok:
+        status, body = 201, {
+            "message": "Register successful",
+            "user_id": result.context["account"]["user_id"]
+        }
+    elif isinstance(result.error, StepFailed):
+        status, body = result.error.status, result.error.body
+    else:
+        status, body = 500, {"error": "Register failed"}
+
+    if idempotency_key:
+        if status >= 500:
+            store.release_idempotency_key(idempotency_key)
+        else:
+            store.complete_idempotency_key(idempotency_key, status, body)
+
+    return jsonify(body), status
@@ -1,10 +1,44 @@
-import requests
+from urllib.parse import quote
+
 from app.config import Config
+from app.utils.hedging import send_request
+
+# Endpoint /internal/* của auth-service chỉ nhận request có header này (khớp INTERNAL_API_KEY)
+INTERNAL_KEY_HEADER = 'X-Internal-Key'
+
+
+def _url(path: str) -> str:
+    return f"{Config.AUTH_SERVICE_URL.rstrip('/')}{path}"
+
+
+def _internal_headers(headers=None) -> dict:
+    headers = dict(headers or {})
+    headers[INTERNAL_KEY_HEADER] = Config.INTERNAL_API_KEY
+    return headers
+
+
+def register_auth(data, headers=None, timeout=None):
+    """
+    POST /internal/register tới auth-service qua connection pool (breaker / bulkhead).
+    headers có Idempotency-Key → auth-service trả lại đúng user đã tạo nếu request bị gửi lặp.
+    """
+    return send_request(
+        Config.AUTH_SERVICE_URL, _url('/internal/register'), 'POST', _internal_headers(headers),
+        json=data, timeout=timeout or Config.SAGA_STEP_TIMEOUT_MS / 1000,
+    )
+
+
+def delete_auth_user(user_id, headers=None, timeout=None):
+    """Xóa tài khoản auth (compensation khi tạo profile thất bại)."""
+    return send_request(
+        Config.AUTH_SERVICE_URL, _url(f'/internal/users/{user_id}'), 'DELETE', _internal_headers(headers),
+        timeout=timeout or Config.SAGA_STEP_TIMEOUT_MS / 1000,
+    )
+
 
-def register_auth(data):
-    response = requests.post(
-        Config.AUTH_SERVICE_URL,
-        json=data,
-        timeout=Config.TIMEOUT
+def cancel_auth_registration(idempotency_key, headers=None, timeout=None):
+    """Hủy đăng ký theo Idempotency-Key (compensation khi không rõ đăng ký đã commit chưa)."""
+    return send_request(
+        Config.AUTH_SERVICE_URL, _url(f'/internal/registrations/{quote(idempotency_key, safe="")}'), 'DELETE',
+        _internal_headers(headers), timeout=timeout or Config.SAGA_STEP_TIMEOUT_MS / 1000,
     )
-    return response
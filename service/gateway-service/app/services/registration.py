@@ -0,0 +1,113 @@
+"""
+registration.py
+───────────────
+Saga đăng ký tài khoản: tạo account ở auth-service rồi profile ở user-service.
+
+    account  POST auth /internal/register  → user_id (Idempotency-Key: <saga_id>:account)
+             compensation: DELETE auth /internal/users/<user_id> (qua outbox)
+             không rõ kết quả (timeout / mất kết nối / 5xx — auth có thể đã commit):
+             DELETE auth /internal/registrations/<key> → xóa user tạo bởi key đó, hoặc
+             chặn trước request đăng ký còn kẹt trên mạng
+    profile  POST user /internal/users      (cần user_id → phụ thuộc account)
+
+Thêm bước không cần user_id (gửi email chào mừng, audit...) chỉ cần khai báo
+SagaStep không có depends_on → engine tự chạy song song với các bước khác.
+"""
+
+import requests
+
+from app.services.auth_client import cancel_auth_registration, delete_auth_user, register_auth
+from app.services.saga import Saga, SagaStep, StepFailed, register_compensation, step_idempotency_key
+from app.services.user_client import create_user_profile
+
+REQUIRED_FIELDS = ("username", "password", "name", "email", "telphone")
+# Chỉ truyền cho saga qua secrets (RAM), không bao giờ ghi vào saga log
+SECRET_FIELDS = ("password",)
+
+
+def split_input(data: dict):
+    """Body đăng ký → (input lưu vào saga log, secrets chỉ giữ trong RAM)."""
+    persisted = {f: data[f] for f in REQUIRED_FIELDS if f not in SECRET_FIELDS}
+    secrets = {f: data[f] for f in SECRET_FIELDS}
+    return persisted, secrets
+
+
+def _json(resp) -> dict:
+    try:
+        body = resp.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def _unavailable(service: str, error: Exception) -> StepFailed:
+    status = 504 if isinstance(error, requests.exceptions.Timeout) else 503
+    return StepFailed(status, {"error": f"{service} service unavailable"})
+
+
+def _create_account(context: dict, secrets: dict, headers: dict, timeout: float) -> dict:
+    data = context["input"]
+    try:
+        resp = register_auth(
+            {"username": data["username"], "email": data["email"], "password": secrets["password"]},
+            headers, timeout)
+    except requests.exceptions.RequestException as e:
+        raise _unavailable("Auth", e)
+
+    body = _json(resp)
+    if resp.status_code != 201:
+        raise StepFailed(resp.status_code, body)
+    # auth-service trả {"user_id"} hoặc {"data": {"user": {"id"}}}
+    user_id = body.get("user_id") or (body.get("data") or {}).get("user", {}).get("id")
+    if user_id is None:
+        raise StepFailed(502, {"error": "Auth service returned no user_id"})
+    return {"user_id": user_id}
+
+
+def _delete_account(result: dict, context: dict):
+    return "auth.delete_user", {"user_id": result["user_id"]}
+
+
+def _cancel_account(context: dict):
+    return "auth.cancel_registration", {"idempotency_key": step_idempotency_key(context, "account")}
+
+
+def _create_profile(context: dict, secrets: dict, headers: dict, timeout: float) -> dict:
+    data = context["input"]
+    payload = {
+        "user_id": context["account"]["user_id"],
+        "name": data["name"],
+        "email": data["email"],
+        "telphone": data["telphone"],
+    }
+    try:
+        resp = create_user_profile(payload, headers, timeout)
+    except requests.exceptions.RequestException as e:
+        raise _unavailable("User", e)
+    if resp.status_code != 201:
+        raise StepFailed(resp.status_code, _json(resp))
+    return {}
+
+
+def _handle_delete_user(payload: dict) -> None:
+    """Chạy trong OutboxWorker: 2xx hoặc 404 (đã xóa) là xong, còn lại raise để retry."""
+    resp = delete_auth_user(payload["user_id"])
+    if resp.status_code >= 300 and resp.status_code != 404:
+        raise RuntimeError(f"DELETE auth user {payload['user_id']} → {resp.status_code}")
+
+
+def _handle_cancel_registration(payload: dict) -> None:
+    """Chạy trong OutboxWorker: auth-service trả 2xx kể cả khi key chưa từng tới (ghi tombstone)."""
+    resp = cancel_auth_registration(payload["idempotency_key"])
+    if resp.status_code >= 300:
+        raise RuntimeError(f"DELETE auth registration {payload['idempotency_key']} → {resp.status_code}")
+
+
+register_compensation("auth.delete_user", _handle_delete_user)
+register_compensation("auth.cancel_registration", _handle_cancel_registration)
+
+REGISTER_SAGA = Saga("register", [
+    SagaStep("account", _create_account, compensation=_delete_account,
+             uncertain_compensation=_cancel_account),
+    SagaStep("profile", _create_profile, depends_on=("account",)),
+])
@@ -0,0 +1,308 @@
+"""
+saga.py
+───────
+Saga engine nhỏ cho các luồng ghi trải trên nhiều service (VD: đăng ký tài khoản).
+
+Tại sao cần?
+    /api/register gọi auth-service rồi user-service nối tiếp bằng requests.post,
+    lỗi ở bước sau thì DELETE rollback ngay trong request. Rollback cũng lỗi
+    (auth-service quá tải, Gateway restart...) → tài khoản mồ côi, không ai dọn.
+
+Cách hoạt động:
+    - Saga = danh sách SagaStep, mỗi bước khai báo depends_on
+      → các bước không phụ thuộc nhau được chạy SONG SONG trên thread pool
+    - Trước khi gọi, bước được ghi 'started' vào saga log (SQLite, xem saga_store.py);
+      kết quả ghi ngay khi xong
+    - Mỗi bước gửi Idempotency-Key: <saga_id>:<bước> → service nhận request lặp trả lại
+      kết quả cũ, và hoàn tác được theo key dù Gateway chưa nhận được kết quả
+    - 1 bước lỗi → không chạy bước mới, chờ các bước đang chạy, rồi ghi
+      compensation của các bước đã xong vào OUTBOX cùng transaction với trạng thái saga.
+      Bước KHÔNG RÕ kết quả (timeout, mất kết nối, 5xx — service có thể đã commit)
+      → uncertain_compensation (hoàn tác theo Idempotency-Key) thay vì bỏ qua
+      → response trả về ngay, không chờ rollback
+    - OutboxWorker (thread nền) gửi compensation, lỗi thì retry với backoff lũy thừa
+    - Process chết giữa chừng → saga kẹt ở 'running'; worker tìm saga quá
+      SAGA_STALE_AFTER giây và tự sinh compensation từ context đã lưu
+
+Cách dùng:
+    saga = Saga('register', [
+        SagaStep('account', create_account, compensation=delete_account,
+                 uncertain_compensation=cancel_account),
+        SagaStep('profile', create_profile, depends_on=('account',)),
+    ])
+    register_compensation('auth.delete_user', handler)   ← handler(payload) chạy trong worker
+    result = saga.run({"username": ...}, idempotency_key, headers, budget=remaining_seconds(),
+                      secrets={"password": ...})   ← chỉ nằm trong RAM, không vào saga log
+"""
+
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.config import Config
+from app.services.saga_store import SagaStore
+from app.utils.deadline import DEADLINE_HEADER
+from app.utils.metrics import REGISTRY
+
+SAGA_RUNS = REGISTRY.counter(
+    'saga_runs_total', 'Số saga đã chạy theo kết quả', ('saga', 'outcome'))
+OUTBOX_DELIVERIES = REGISTRY.counter(
+    'saga_outbox_deliveries_total', 'Số lần gửi compensation từ outbox', ('kind', 'outcome'))
+
+_executor = ThreadPoolExecutor(max_workers=Config.SAGA_MAX_WORKERS, thread_name_prefix='saga')
+
+_store = None
+_store_lock = threading.Lock()
+_sagas = {}             # tên saga → Saga (để worker hoàn tác saga kẹt)
+_compensations = {}     # kind → handler(payload)
+
+
+class StepFailed(Exception):
+    """Bước saga thất bại với response có thể trả thẳng cho client."""
+
+    def __init__(self, status: int, body: dict, definite: bool = None):
+        """
+        Args:
+            definite: True → service chắc chắn KHÔNG thực hiện (4xx); False → không rõ
+                      (timeout, mất kết nối, 5xx). Mặc định theo status
+        """
+        super().__init__(f'{status}: {body}')
+        self.status = status
+        self.body = body
+        self.definite = status < 500 if definite is None else definite
+
+
+class SagaStep:
+
+    def __init__(self, name: str, action, compensation=None, depends_on: tuple = (),
+                 uncertain_compensation=None):
+        """
+        Args:
+            action:       action(context, secrets, headers, timeout) → dict kết quả (JSON được),
+                          lưu vào context[name]. Raise StepFailed / exception bất kỳ khi lỗi
+            compensation: compensation(result, context) → (kind, payload) đưa vào outbox,
+                          None nếu bước không cần hoàn tác
+            depends_on:   tên các bước phải xong trước
+            uncertain_compensation: uncertain_compensation(context) → (kind, payload) cho bước
+                          đã gửi request nhưng không rõ kết quả (VD: hủy theo Idempotency-Key
+                          step_idempotency_key(context, name)), None → bỏ qua
+        """
+        self.name = name
+        self.action = action
+        self.compensation = compensation
+        self.depends_on = tuple(depends_on)
+        self.uncertain_compensation = uncertain_compensation
+
+
+class SagaResult:
+
+    def __init__(self, saga_id: str, context: dict, failed_step=None, error=None):
+        self.saga_id = saga_id
+        self.context = context
+        self.failed_step = failed_step
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_step is None
+
+
+class Saga:
+
+    def __init__(self, name: str, steps: list):
+        names = {step.name for step in steps}
+        for step in steps:
+            missing = set(step.depends_on) - names
+            if missing:
+                raise ValueError(f"Saga '{name}': bước '{step.name}' phụ thuộc bước không tồn tại {missing}")
+        self.name = name
+        self.steps = steps
+        _sagas[name] = self
+
+    def run(self, data: dict, idempotency_key: str = None, headers: dict = None,
+            budget: float = None, secrets: dict = None) -> SagaResult:
+        """
+        Args:
+            data:    Input lưu vào saga log (context["input"]) — chỉ để trường KHÔNG bí mật
+                     mà các bước / compensation cần (log giữ SAGA_RETENTION giây)
+            headers: Header gửi kèm mọi bước (traceparent...) — KHÔNG lưu vào saga log
+            budget:  Số giây còn lại cho cả saga (deadline của request), None → không giới hạn
+            secrets: Dữ liệu bí mật (mật khẩu...) chỉ truyền cho action trong RAM,
+                     KHÔNG lưu vào saga log → saga khôi phục sau khi process chết chỉ hoàn tác, không chạy tiếp
+        """
+        store = get_saga_store()
+        deadline = time.monotonic() + budget if budget is not None else None
+        saga_id = uuid.uuid4().hex
+        context = {
+            "saga_id": saga_id,
+            # Idempotency-Key của client (chỉ để tra cứu); mỗi bước gửi key theo saga_id
+            # → compensation của saga trước không hủy nhầm kết quả của lần client retry
+            "idempotency_key": idempotency_key,
+            "input": data,
+            "steps": {},    # tên bước → started | done | failed
+        }
+        store.begin_saga(saga_id, self.name, context)
+
+        pending = list(self.steps)
+        running = {}
+        done = set()
+        failure = None
+
+        while pending or running:
+            if failure is None:
+                ready = [s for s in pending if all(dep in done for dep in s.depends_on)]
+                timeout = _step_timeout(deadline)
+                if ready and timeout <= 0:
+                    # Chưa gửi request → không cần hoàn tác
+                    failure = (ready[0].name, StepFailed(504, {"error": "Deadline exceeded"}))
+                elif ready:
+                    # Ghi 'started' TRƯỚC khi gửi request: timeout / process chết sau đó
+                    # → vẫn biết bước có thể đã chạy ở service để hoàn tác theo key
+                    for step in ready:
+                        context["steps"][step.name] = "started"
+                    store.save_context(saga_id, context)
+                    for step in ready:
+                        pending.remove(step)
+                        step_headers = dict(headers or {})
+                        step_headers[DEADLINE_HEADER] = str(int(timeout * 1000))
+                        step_headers['Idempotency-Key'] = step_idempotency_key(context, step.name)
+                        future = _executor.submit(step.action, dict(context), secrets or {}, step_headers, timeout)
+                        running[future] = step
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                try:
+                    context[step.name] = future.result()
+                except Exception as e:
+                    if isinstance(e, StepFailed) and e.definite:
+                        context["steps"][step.name] = "failed"
+                    # Còn lại giữ 'started': không rõ service đã thực hiện chưa
+                    if failure is None:
+                        failure = (step.name, e)
+                    continue
+                context["steps"][step.name] = "done"
+                done.add(step.name)
+                store.save_context(saga_id, context)
+
+        if failure is None:
+            store.complete_saga(saga_id)
+            SAGA_RUNS.inc(self.name, 'completed')
+            return SagaResult(saga_id, context)
+
+        store.fail_saga(saga_id, self.compensations_for(context))
+        SAGA_RUNS.inc(self.name, 'compensated')
+        return SagaResult(saga_id, context, failure[0], failure[1])
+
+    def compensations_for(self, context: dict) -> list:
+        """
+        Compensation theo thứ tự ngược:
+            - bước đã xong (có kết quả trong context) → compensation(result, context)
+            - bước đã gửi nhưng không rõ kết quả ('started') → uncertain_compensation(context)
+        """
+        entries = []
+        states = context.get("steps", {})
+        for step in reversed(self.steps):
+            if step.name in context:
+                if step.compensation is not None:
+                    entries.append(step.compensation(context[step.name], context))
+            elif states.get(step.name) == "started" and step.uncertain_compensation is not None:
+                entries.append(step.uncertain_compensation(context))
+        return entries
+
+
+def step_idempotency_key(context: dict, step_name: str) -> str:
+    """Idempotency-Key gửi kèm request của 1 bước (cũng là key để hoàn tác bước đó)."""
+    return f"{context['saga_id']}:{step_name}"
+
+
+def _step_timeout(deadline) -> float:
+    timeout = Config.SAGA_STEP_TIMEOUT_MS / 1000
+    if deadline is not None:
+        timeout = min(timeout, deadline - time.monotonic())
+    return timeout
+
+
+def register_compensation(kind: str, handler) -> None:
+    """handler(payload) raise exception khi lỗi → entry được retry sau."""
+    _compensations[kind] = handler
+
+
+def get_saga_store() -> SagaStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SagaStore(Config.SAGA_DB_PATH)
+    return _store
+
+
+class OutboxWorker:
+
+    def __init__(self, store: SagaStore, poll_interval: float):
+        self.store = store
+        self.poll_interval = poll_interval
+
+    def start(self, app) -> None:
+        threading.Thread(target=self._run, args=(app,), name='saga-outbox', daemon=True).start()
+
+    def _run(self, app) -> None:
+        while True:
+            try:
+                self.recover_stale()
+                self.deliver_due(app.logger)
+                self.store.purge_finished(Config.SAGA_RETENTION)
+            except Exception as e:
+                app.logger.warning(f"[Saga] Outbox worker lỗi: {e}")
+            time.sleep(self.poll_interval)
+
+    def recover_stale(self) -> None:
+        for saga_id, name, context in self.store.stale_sagas(Config.SAGA_STALE_AFTER):
+            saga = _sagas.get(name)
+            if saga is None:
+                continue
+            self.store.fail_saga(saga_id, saga.compensations_for(context))
+            SAGA_RUNS.inc(name, 'recovered')
+
+    def deliver_due(self, logger=None) -> None:
+        lease = Config.SAGA_STEP_TIMEOUT_MS / 1000 * 2
+        for entry_id, kind, payload, attempts in self.store.claim_due(lease):
+            handler = _compensations.get(kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"Chưa đăng ký compensation '{kind}'")
+                handler(payload)
+            except Exception as e:
+                dead = attempts + 1 >= Config.OUTBOX_MAX_ATTEMPTS
+                # Backoff lũy thừa + jitter → nhiều entry lỗi cùng lúc không retry dồn 1 nhịp
+                retry_in = min(Config.OUTBOX_MAX_BACKOFF, 2 ** attempts) * random.uniform(0.5, 1.0)
+                self.store.mark_failed(entry_id, str(e), retry_in, dead)
+                OUTBOX_DELIVERIES.inc(kind, 'dead' if dead else 'retry')
+                if dead and logger is not None:
+                    # Không retry nữa → cần xử lý tay (VD: tài khoản mồ côi ở auth-service)
+                    logger.warning(f"[Saga] Compensation {kind} {payload} bỏ cuộc sau {attempts + 1} lần: {e}")
+            else:
+                self.store.mark_done(entry_id)
+                OUTBOX_DELIVERIES.inc(kind, 'delivered')
+
+
+_worker_started = False
+
+
+def start_outbox_worker(app) -> None:
+    """Gọi trong create_app(); mỗi process chỉ chạy 1 worker."""
+    global _worker_started
+    if _worker_started or not Config.OUTBOX_WORKER_ENABLED:
+        return
+    _worker_started = True
+    OutboxWorker(get_saga_store(), Config.OUTBOX_POLL_INTERVAL).start(app)
+
+
+def get_saga_stats() -> dict:
+    stats = get_saga_store().stats()
+    stats["worker_running"] = _worker_started
+    return stats
@@ -0,0 +1,245 @@
+"""
+saga_store.py
+─────────────
+Lưu trữ bền (SQLite) cho saga engine của Gateway.
+
+3 bảng:
+    sagas        Trạng thái từng saga (running / completed / compensating / compensated)
+                 + context
+                 → Gateway chết giữa chừng vẫn biết bước nào đã chạy để hoàn tác
+    outbox       Việc hoàn tác (compensation) cần gửi tới service, được thread nền
+                 gửi lại tới khi thành công (backoff lũy thừa) thay vì gọi inline
+    idempotency  Response đã trả cho mỗi Idempotency-Key → client retry không tạo
+                 thêm tài khoản
+
+Nhiều worker / process dùng chung 1 file: entry outbox được "claim" bằng
+UPDATE có điều kiện (lease) → mỗi entry chỉ 1 worker xử lý tại 1 thời điểm.
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sagas (
+    id          TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    context     TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sagas_status ON sagas (status, updated_at);
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    saga_id         TEXT NOT NULL,
+    kind            TEXT NOT NULL,
+    payload         TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    locked_until    REAL NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    created_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS idempotency (
+    key         TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    http_status INTEGER,
+    body        TEXT,
+    created_at  REAL NOT NULL
+);
+"""
+
+
+class SagaStore:
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Mỗi thao tác 1 connection ngắn → an toàn giữa các thread, không giữ lock lâu
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ─────────────────────────────────────────────────────────
+    # SAGA LOG
+    # ─────────────────────────────────────────────────────────
+
+    def begin_saga(self, saga_id: str, name: str, context: dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sagas (id, name, status, context, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (saga_id, name, json.dumps(context), time.time()),
+            )
+
+    def save_context(self, saga_id: str, context: dict) -> None:
+        """Ghi lại context sau mỗi bước thành công (kết quả bước dùng để hoàn tác)."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sagas SET context = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(context), time.time(), saga_id),
+            )
+
+    def complete_saga(self, saga_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sagas SET status = 'completed', updated_at = ? WHERE id = ?",
+                (time.time(), saga_id),
+            )
+
+    def fail_saga(self, saga_id: str, compensations: list) -> None:
+        """
+        Đánh dấu saga thất bại + thêm các compensation vào outbox trong CÙNG 1 transaction.
+
+        Args:
+            compensations: list (kind, payload)
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for kind, payload in compensations:
+                    conn.execute(
+                        "INSERT INTO outbox (saga_id, kind, payload, next_attempt_at, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (saga_id, kind, json.dumps(payload), now, now),
+                    )
+                conn.execute(
+                    "UPDATE sagas SET status = 'compensating', updated_at = ? WHERE id = ?",
+                    (now, saga_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def purge_finished(self, older_than: float) -> None:
+        """Xóa saga đã xong (completed / compensated) cũ hơn older_than giây."""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM sagas WHERE status IN ('completed', 'compensated') AND updated_at < ?",
+                (time.time() - older_than,),
+            )
+
+    def stale_sagas(self, older_than: float, limit: int = 50) -> list:
+        """Saga vẫn 'running' quá lâu (process chết giữa chừng) → list (id, name, context)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, context FROM sagas WHERE status = 'running' AND updated_at < ? LIMIT ?",
+                (time.time() - older_than, limit),
+            ).fetchall()
+        return [(saga_id, name, json.loads(context)) for saga_id, name, context in rows]
+
+    # ─────────────────────────────────────────────────────────
+    # OUTBOX
+    # ─────────────────────────────────────────────────────────
+
+    def claim_due(self, lease: float, limit: int = 20) -> list:
+        """Lấy các entry đến hạn và giữ lease → list (id, kind, payload, attempts)."""
+        now = time.time()
+        claimed = []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? AND locked_until <= ? LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            for entry_id, kind, payload, attempts in rows:
+                cur = conn.execute(
+                    "UPDATE outbox SET locked_until = ? WHERE id = ? AND locked_until <= ?",
+                    (now + lease, entry_id, now),
+                )
+                if cur.rowcount == 1:   # Worker khác chưa claim trước
+                    claimed.append((entry_id, kind, json.loads(payload), attempts))
+        return claimed
+
+    def mark_done(self, entry_id: int) -> None:
+        """Xóa entry đã gửi; saga không còn entry nào trong outbox → 'compensated'."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT saga_id FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+            if row is not None:
+                conn.execute(
+                    "UPDATE sagas SET status = 'compensated', updated_at = ? WHERE id = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM outbox WHERE saga_id = ?)",
+                    (time.time(), row[0], row[0]),
+                )
+
+    def mark_failed(self, entry_id: int, error: str, retry_in: float, dead: bool) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, "
+                "locked_until = 0, status = ? WHERE id = ?",
+                (error[:500], time.time() + retry_in, 'dead' if dead else 'pending', entry_id),
+            )
+
+    # ─────────────────────────────────────────────────────────
+    # IDEMPOTENCY
+    # ─────────────────────────────────────────────────────────
+
+    def claim_idempotency_key(self, key: str, ttl: float, lease: float):
+        """
+        Giữ key cho request hiện tại.
+
+        Args:
+            ttl:   Giây giữ response đã trả theo key
+            lease: Key 'in_progress' lâu hơn chừng này giây → request giữ key coi như đã chết
+                   (Gateway restart giữa chừng) → request mới cùng key được nhận lại key.
+                   Phải lớn hơn thời gian tối đa của 1 request (deadline của route)
+
+        Returns:
+            (True, None)            key mới / key bị bỏ dở → được xử lý
+            (False, None)           request khác cùng key đang chạy
+            (False, (status, body)) đã xử lý xong → trả lại response cũ
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND created_at < ?", (key, now - ttl))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO idempotency (key, status, created_at) VALUES (?, 'in_progress', ?)",
+                (key, now),
+            )
+            if cur.rowcount == 1:
+                return True, None
+            # UPDATE có điều kiện → 2 request cùng nhận lại 1 key bỏ dở thì chỉ 1 request thắng
+            cur = conn.execute(
+                "UPDATE idempotency SET created_at = ? WHERE key = ? AND status = 'in_progress' AND created_at < ?",
+                (now, key, now - lease),
+            )
+            if cur.rowcount == 1:
+                return True, None
+            row = conn.execute(
+                "SELECT status, http_status, body FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[0] == 'in_progress':
+            return False, None
+        return False, (row[1], json.loads(row[2]))
+
+    def complete_idempotency_key(self, key: str, http_status: int, body: dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE idempotency SET status = 'done', http_status = ?, body = ? WHERE key = ?",
+                (http_status, json.dumps(body), key),
+            )
+
+    def release_idempotency_key(self, key: str) -> None:
+        """Lỗi tạm thời (5xx) → bỏ key để client retry cùng key được xử lý lại."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ?", (key,))
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            sagas = dict(conn.execute("SELECT status, COUNT(*) FROM sagas GROUP BY status").fetchall())
+            outbox = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {"sagas": sagas, "outbox": outbox}
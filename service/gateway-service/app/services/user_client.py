@@ -1,10 +1,13 @@
-import requests
 from app.config import Config
+from app.services.auth_client import INTERNAL_KEY_HEADER
+from app.utils.hedging import send_request
 
-def create_user_profile(data):
-    response = requests.post(
-        Config.USER_SERVICE_URL,
-        json=data,
-        timeout=Config.TIMEOUT
+
+def create_user_profile(data, headers=None, timeout=None):
+    """POST /internal/users tới user-service qua connection pool (breaker / bulkhead)."""
+    headers = dict(headers or {})
+    headers[INTERNAL_KEY_HEADER] = Config.INTERNAL_API_KEY
+    return send_request(
+        Config.USER_SERVICE_URL, f"{Config.USER_SERVICE_URL.rstrip('/')}/internal/users", 'POST',
+        headers, json=data, timeout=timeout or Config.SAGA_STEP_TIMEOUT_MS / 1000,
     )
-    return response
@@ -0,0 +1,180 @@
+"""
+circuit_breaker.py
+──────────────────
+Circuit breaker + bulkhead cho từng upstream của Gateway.
+
+Tại sao cần?
+    auth-service chết → mọi request vẫn cố connect rồi chờ timeout
+    → worker Gateway dồn ứ, kéo sập luôn các route không liên quan.
+
+Circuit breaker (3 trạng thái):
+    CLOSED     Bình thường. Đếm lỗi liên tiếp; đủ failure_threshold → OPEN
+    OPEN       Từ chối NGAY mọi request (không chạm network) trong recovery_timeout giây
+    HALF_OPEN  Hết recovery_timeout → cho tối đa half_open_max_calls request thử:
+               thành công → CLOSED, lỗi → OPEN lại
+
+Bulkhead:
+    Giới hạn số request đồng thời tới 1 upstream. Vượt giới hạn → từ chối
+    ngay thay vì xếp hàng → 1 service chậm không chiếm hết worker của Gateway.
+"""
+
+import threading
+import time
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamRejectedError(requests.exceptions.RequestException):
+    """Gateway tự từ chối gọi upstream (không có request nào được gửi đi)."""
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamRejectedError):
+    pass
+
+
+class BulkheadFullError(UpstreamRejectedError):
+    pass
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 recovery_timeout: float = 10, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self) -> bool:
+        """
+        Gọi TRƯỚC khi gửi request.
+
+        Returns:
+            True nếu request này là request thử (half-open probe)
+
+        Raises:
+            CircuitOpenError nếu circuit đang mở
+        """
+        with self._lock:
+            if self._state == OPEN:
+                elapsed = time.monotonic() - self._opened_at
+                if elapsed < self.recovery_timeout:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError(
+                        f"Circuit '{self.name}' đang mở",
+                        retry_after=self.recovery_timeout - elapsed,
+                    )
+                self._state = HALF_OPEN
+                self._half_open_in_flight = 0
+
+            if self._state == HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_max_calls:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError(f"Circuit '{self.name}' đang thử lại", retry_after=1)
+                self._half_open_in_flight += 1
+                return True
+
+            return False
+
+    def release(self, probe: bool) -> None:
+        """Huỷ lượt đã giữ ở before_call() khi request không được gửi đi."""
+        if probe:
+            with self._lock:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def on_success(self, probe: bool) -> None:
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            if probe:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+
+    def on_failure(self, probe: bool) -> None:
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            if probe:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats["opened"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    @property
+    def available(self) -> bool:
+        """Có nên gửi request tới không: CLOSED / HALF_OPEN, hoặc OPEN đã hết recovery_timeout."""
+        with self._lock:
+            if self._state != OPEN:
+                return True
+            return time.monotonic() - self._opened_at >= self.recovery_timeout
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+            })
+            if self._state == OPEN:
+                snapshot["retry_in"] = round(
+                    max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 3
+                )
+        return snapshot
+
+
+class Bulkhead:
+
+    def __init__(self, name: str, max_concurrent: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._rejected = 0
+
+    def acquire(self) -> None:
+        """Giữ 1 slot, không chờ. Raises BulkheadFullError nếu đã đủ max_concurrent."""
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise BulkheadFullError(f"Bulkhead '{self.name}' đã đầy ({self.max_concurrent})")
+        with self._lock:
+            self._in_use += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "in_use": self._in_use,
+                "rejected": self._rejected,
+            }
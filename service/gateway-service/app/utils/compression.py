@@ -0,0 +1,140 @@
+"""
+compression.py
+──────────────
+Nén response (brotli / gzip) tại Gateway theo Accept-Encoding của client.
+
+Tại sao cần?
+    Danh sách user (UserService.list_users) và audit log (AuditService.get_logs)
+    là JSON dài, lặp nhiều key → nén được 5-10 lần, nhưng hiện đi về client nguyên bản.
+
+Cách hoạt động (after_request):
+    - Bỏ qua: body < COMPRESSION_MIN_SIZE, Content-Type không phải text/JSON,
+      Cache-Control: no-transform, response không có body (HEAD, 204, 304)
+    - Upstream đã nén sẵn (có Content-Encoding) → chuyển nguyên, KHÔNG nén lại
+    - Ưu tiên br (nếu đã cài package brotli) rồi tới gzip, theo q-value của client
+    - Response stream từ upstream → nén từng chunk trên đường đi, không buffer cả body
+    - CPU-aware: load trung bình / số core vượt COMPRESSION_HIGH_LOAD → dùng mức nén
+      nhanh nhất (gzip 1 / br 0), tránh nén làm Gateway nghẽn CPU đúng lúc tải cao
+"""
+
+import os
+import time
+import zlib
+
+from flask import request
+
+from app.config import Config
+
+try:
+    import brotli
+except ImportError:     # brotli không bắt buộc — chỉ dùng gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml',
+    'application/problem+json', 'image/svg+xml',
+)
+
+_load_cache = {"checked_at": 0.0, "high": False}
+
+
+def _is_compressible(content_type: str) -> bool:
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def _under_high_load() -> bool:
+    """Load average 1 phút / số core > ngưỡng? Đọc lại tối đa mỗi 5 giây."""
+    if not Config.COMPRESSION_CPU_AWARE:
+        return False
+    now = time.monotonic()
+    if now - _load_cache["checked_at"] >= 5:
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):   # Windows không có getloadavg
+            load = 0.0
+        _load_cache["high"] = load > Config.COMPRESSION_HIGH_LOAD
+        _load_cache["checked_at"] = now
+    return _load_cache["high"]
+
+
+def _compressor(encoding: str):
+    """Object có compress(bytes) và flush() cho encoding đã chọn."""
+    fast = _under_high_load()
+    if encoding == 'br':
+        quality = 0 if fast else Config.COMPRESSION_BROTLI_QUALITY
+        return _BrotliCompressor(quality)
+    level = 1 if fast else Config.COMPRESSION_GZIP_LEVEL
+    return zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31 = định dạng gzip
+
+
+class _BrotliCompressor:
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _compress_stream(chunks, compressor):
+    try:
+        for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+    finally:
+        # Đóng iterator gốc → generator của proxy trả connection upstream về pool
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _choose_encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_response(response):
+    if not Config.COMPRESSION_ENABLED:
+        return response
+
+    if (request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')
+            or not _is_compressible(response.headers.get('Content-Type'))):
+        return response
+
+    content_length = response.content_length
+    if not response.is_streamed:
+        content_length = len(response.get_data())
+    if content_length is not None and content_length < Config.COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    compressor = _compressor(encoding)
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compressor.compress(response.get_data()) + compressor.flush())
+
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # Body đã khác byte với bản gốc → ETag mạnh phải chuyển thành ETag yếu
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
+
+
+def register_compression(app) -> None:
+    app.after_request(compress_response)
@@ -0,0 +1,48 @@
+"""
+conditional_get.py
+──────────────────
+ETag + If-None-Match (304 Not Modified) cho response GET tại Gateway.
+
+Tại sao cần?
+    Frontend poll profile / preferences liên tục, mỗi lần tải lại nguyên payload
+    JSON dù không có gì thay đổi.
+
+Cách hoạt động (after_request, chỉ GET / HEAD + status 200):
+    - Upstream đã gửi ETag (user-service tính từ updated_at) → dùng luôn
+    - Chưa có ETag, body JSON nằm sẵn trong RAM (json mode, cache HIT, route
+      của Gateway) → ETag mạnh = hash của body
+    - Response stream chưa có ETag → bỏ qua (muốn hash phải đọc hết body)
+    - If-None-Match khớp (so sánh yếu theo RFC 7232) → 304, không body; body stream
+      từ upstream (nếu có) được đóng để trả connection về pool
+
+    Header If-None-Match của client vẫn được forward → service tự trả 304 được
+    thì Gateway chỉ chuyển tiếp, không tốn công đọc body.
+
+Đăng ký SAU register_compression (after_request chạy ngược thứ tự) → ETag tính trên
+body chưa nén; nén xong ETag mạnh được chuyển thành ETag yếu (xem compression.py).
+"""
+
+from flask import request
+
+from app.config import Config
+
+
+def conditional_get(response):
+    if (not Config.ETAG_ENABLED
+            or request.method not in ('GET', 'HEAD')
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    etag, _ = response.get_etag()
+    if etag is None:
+        if response.is_streamed or not response.is_json:
+            return response
+        response.add_etag()     # sha1 của body → ETag mạnh
+
+    # make_conditional: If-None-Match khớp → 304 + bỏ body / header thực thể
+    return response.make_conditional(request.environ)
+
+
+def register_conditional_get(app) -> None:
+    app.after_request(conditional_get)
@@ -0,0 +1,60 @@
+"""
+deadline.py
+───────────
+Ngân sách thời gian (deadline) cho từng request đi qua Gateway.
+
+Tại sao cần?
+    Client chỉ chờ được vài giây; quá thời gian đó kết quả không còn ai dùng.
+    Không có deadline thì Gateway vẫn chờ upstream tới read timeout (10s) và
+    service phía sau vẫn làm nốt việc (bcrypt, query DB) một cách vô ích.
+
+Cách hoạt động:
+    - before_request: deadline = now + budget của route (Config.ROUTE_DEADLINES_MS,
+      prefix dài nhất khớp với path, không khớp → DEFAULT_DEADLINE_MS).
+      Client gửi sẵn X-Request-Deadline-Ms nhỏ hơn → dùng giá trị của client.
+    - forward_request gửi phần thời gian CÒN LẠI sang service qua header
+      X-Request-Deadline-Ms và dùng nó làm timeout của request upstream.
+    - Service đọc header đó để bỏ việc khi deadline đã qua.
+"""
+
+import time
+
+from flask import g, request
+
+from app.config import Config
+
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+
+
+def route_budget_ms(path: str) -> int:
+    """Budget (ms) của route: prefix dài nhất trong ROUTE_DEADLINES_MS khớp với path."""
+    best_prefix = None
+    for prefix in Config.ROUTE_DEADLINES_MS:
+        if path.startswith(prefix) and (best_prefix is None or len(prefix) > len(best_prefix)):
+            best_prefix = prefix
+    if best_prefix is None:
+        return Config.DEFAULT_DEADLINE_MS
+    return Config.ROUTE_DEADLINES_MS[best_prefix]
+
+
+def start_request_deadline() -> None:
+    """before_request: gắn g.deadline (time.monotonic) cho request hiện tại."""
+    budget_ms = route_budget_ms(request.path)
+
+    client_ms = request.headers.get(DEADLINE_HEADER, '')
+    if client_ms.isdigit():
+        budget_ms = min(budget_ms, int(client_ms))
+
+    g.deadline = time.monotonic() + budget_ms / 1000
+
+
+def remaining_seconds():
+    """Thời gian còn lại (giây, có thể <= 0) hoặc None nếu request không có deadline."""
+    deadline = g.get('deadline')
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def register_deadline(app) -> None:
+    app.before_request(start_request_deadline)
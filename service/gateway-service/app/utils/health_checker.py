@@ -0,0 +1,197 @@
+"""
+health_checker.py
+─────────────────
+Health check chủ động: thread nền gọi /health của từng instance upstream theo chu kỳ.
+
+Tại sao cần?
+    Gateway chỉ biết 1 service chết khi request THẬT của user bị timeout
+    (circuit breaker cần đủ N lần lỗi mới mở) → user chịu lỗi thay cho hệ thống.
+
+Cách hoạt động:
+    - Mỗi HEALTH_CHECK_INTERVAL giây: GET <gốc instance><*_HEALTH_PATH> song song
+      cho mọi instance (auth: /api/auth/health, user: /health — có kiểm tra DB)
+    - 2xx = OK; status khác / lỗi kết nối / timeout = lỗi
+    - HEALTH_CHECK_UNHEALTHY_THRESHOLD lỗi liên tiếp → unhealthy: load balancer
+      bỏ instance khỏi vòng chọn (instance có DB pool hỏng trả 503 → bị rút tải)
+    - HEALTH_CHECK_HEALTHY_THRESHOLD lần OK liên tiếp → healthy lại, nhận tải
+      tăng dần theo slow start của load balancer
+    - Instance chưa probe lần nào được coi là healthy → Gateway khởi động không bị chặn
+
+Probe dùng Session keep-alive của pool instance nhưng KHÔNG đi qua circuit breaker /
+bulkhead / metrics request → không chiếm slot và không làm lệch số liệu của traffic thật.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from app.config import Config
+from app.utils.metrics import REGISTRY
+from app.utils.upstream_pool import get_upstream_pool
+
+
+class InstanceHealth:
+
+    __slots__ = ('service', 'instance', 'health_url', 'healthy', 'consecutive_successes',
+                 'consecutive_failures', 'last_checked', 'last_status', 'last_error', 'latency_ms')
+
+    def __init__(self, service: str, instance: str, health_url: str):
+        self.service = service
+        self.instance = instance
+        self.health_url = health_url
+        self.healthy = True
+        self.consecutive_successes = 0
+        self.consecutive_failures = 0
+        self.last_checked = None
+        self.last_status = None
+        self.last_error = None
+        self.latency_ms = None
+
+    def to_dict(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "health_url": self.health_url,
+            "consecutive_successes": self.consecutive_successes,
+            "consecutive_failures": self.consecutive_failures,
+            "last_checked": self.last_checked,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "latency_ms": self.latency_ms,
+        }
+
+
+def _health_url(instance: str, path: str) -> str:
+    parts = urlsplit(instance)
+    return f"{parts.scheme}://{parts.netloc}{path}"
+
+
+class HealthChecker:
+
+    def __init__(self, targets: dict, interval: float, timeout: float,
+                 unhealthy_threshold: int, healthy_threshold: int, logger):
+        """
+        Args:
+            targets: {tên service: (list base URL instance, health path)}
+            logger:  app.logger — thread probe không có app context
+        """
+        self.logger = logger
+        self.interval = interval
+        self.timeout = timeout
+        self.unhealthy_threshold = unhealthy_threshold
+        self.healthy_threshold = healthy_threshold
+        self._lock = threading.Lock()
+        self._instances = {}    # base URL instance → InstanceHealth
+        for service, (instances, path) in targets.items():
+            for instance in instances:
+                self._instances[instance] = InstanceHealth(service, instance, _health_url(instance, path))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(16, len(self._instances))), thread_name_prefix='health-probe')
+
+    def is_healthy(self, instance: str) -> bool:
+        state = self._instances.get(instance)
+        return state is None or state.healthy
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name='health-checker', daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                self.check_all()
+            except Exception as e:
+                self.logger.warning(f"[HealthCheck] Vòng probe lỗi: {e}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def check_all(self) -> None:
+        list(self._executor.map(self._probe, list(self._instances.values())))
+
+    def _probe(self, state: InstanceHealth) -> None:
+        session = get_upstream_pool(state.instance).session
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            resp = session.get(state.health_url, timeout=self.timeout)
+            status = resp.status_code
+            resp.close()
+            ok = 200 <= status < 300
+            if not ok:
+                error = f"HTTP {status}"
+        except Exception as e:
+            ok = False
+            error = f"{type(e).__name__}: {e}"
+        self._record(state, ok, status, error, (time.perf_counter() - started) * 1000)
+
+    def _record(self, state: InstanceHealth, ok: bool, status, error, latency_ms: float) -> None:
+        with self._lock:
+            state.last_checked = time.time()
+            state.last_status = status
+            state.last_error = error
+            state.latency_ms = round(latency_ms, 1)
+            if ok:
+                state.consecutive_successes += 1
+                state.consecutive_failures = 0
+                if not state.healthy and state.consecutive_successes >= self.healthy_threshold:
+                    state.healthy = True
+                    self.logger.info(f"[HealthCheck] {state.instance} healthy trở lại")
+            else:
+                state.consecutive_failures += 1
+                state.consecutive_successes = 0
+                if state.healthy and state.consecutive_failures >= self.unhealthy_threshold:
+                    state.healthy = False
+                    self.logger.warning(f"[HealthCheck] {state.instance} unhealthy: {error}")
+
+    def matrix(self) -> dict:
+        """{service: {instance: trạng thái}}"""
+        result = {}
+        with self._lock:
+            for state in self._instances.values():
+                result.setdefault(state.service, {})[state.instance] = state.to_dict()
+        return result
+
+    def samples(self) -> list:
+        with self._lock:
+            return [((s.service, s.instance), 1 if s.healthy else 0) for s in self._instances.values()]
+
+
+# Khởi tạo trong start_health_checker()
+health_checker = None
+
+
+def is_instance_healthy(instance: str) -> bool:
+    """False chỉ khi probe đã xác nhận instance unhealthy (chưa bật checker → luôn True)."""
+    return health_checker is None or health_checker.is_healthy(instance)
+
+
+def start_health_checker(app) -> None:
+    """Gọi trong create_app(); mỗi process 1 thread probe."""
+    global health_checker
+    if health_checker is not None or not Config.HEALTH_CHECK_ENABLED:
+        return
+    targets = {
+        "auth": (Config.AUTH_SERVICE_INSTANCES, Config.AUTH_HEALTH_PATH),
+        "user": (Config.USER_SERVICE_INSTANCES, Config.USER_HEALTH_PATH),
+        "data": (Config.DATA_SERVICE_INSTANCES, Config.DATA_HEALTH_PATH),
+    }
+    health_checker = HealthChecker(
+        {name: target for name, target in targets.items() if name in Config.HEALTH_CHECK_SERVICES},
+        interval=Config.HEALTH_CHECK_INTERVAL,
+        timeout=Config.HEALTH_CHECK_TIMEOUT,
+        unhealthy_threshold=Config.HEALTH_CHECK_UNHEALTHY_THRESHOLD,
+        healthy_threshold=Config.HEALTH_CHECK_HEALTHY_THRESHOLD,
+        logger=app.logger,
+    )
+    health_checker.start()
+
+
+def get_health_matrix() -> dict:
+    if health_checker is None:
+        return {"enabled": False}
+    return {"enabled": True, "interval": health_checker.interval, "services": health_checker.matrix()}
+
+
+REGISTRY.gauge_callback(
+    'upstream_healthy', 'Kết quả health check chủ động: 1=healthy, 0=unhealthy', ('service', 'upstream'),
+    lambda: health_checker.samples() if health_checker is not None else [],
+)
@@ -0,0 +1,183 @@
+"""
+hedging.py
+──────────
+Hedged request: GET tới instance đầu chậm bất thường → gửi thêm 1 bản sao
+sang instance khác của cùng service, dùng response nào về trước.
+
+Tại sao cần?
+    p99 latency của Gateway chủ yếu do thỉnh thoảng 1 instance trả lời chậm
+    (GC, lock DB, CPU bị chiếm...). Gửi bản sao sau khoảng p95 latency chỉ tốn
+    thêm ~5% request nhưng cắt được phần đuôi chậm đó.
+
+Cách hoạt động:
+    1. Gửi request tới instance do load balancer chọn (xem load_balancer.py)
+    2. Chờ tối đa delay = percentile HEDGE_PERCENTILE latency gần đây của instance chính
+       (chưa đủ mẫu → HEDGE_INITIAL_DELAY_MS)
+    3. Chưa có response (hoặc instance chính lỗi ngay) → gửi bản sao tới instance
+       khác do load balancer chọn
+    4. Response thành công về trước được dùng, response còn lại bị đóng khi về tới
+
+    Chỉ áp dụng cho method idempotent (GET/HEAD) và khi service có >= 2 instance
+    (Config.AUTH_SERVICE_URLS / USER_SERVICE_URLS).
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.config import Config
+from app.utils.access_log import record_upstream
+from app.utils.circuit_breaker import UpstreamRejectedError
+from app.utils.deadline import DEADLINE_HEADER
+from app.utils.load_balancer import choose_instance, get_service_instances, rebase_url
+from app.utils.upstream_pool import get_upstream_pool
+from app.utils.tracing import inject_trace_headers, start_client_span
+
+HEDGEABLE_METHODS = ('GET', 'HEAD')
+
+_executor = ThreadPoolExecutor(max_workers=Config.HEDGE_MAX_WORKERS, thread_name_prefix='hedge')
+
+_stats_lock = threading.Lock()
+_stats = {"hedged_requests": 0, "hedges_sent": 0, "primary_wins": 0, "hedge_wins": 0}
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _close_when_done(future) -> None:
+    """Response thua cuộc: đóng ngay khi về để trả connection cho pool."""
+    def close(f):
+        if not f.cancelled() and f.exception() is None:
+            f.result().close()
+    future.add_done_callback(close)
+
+
+def _hedge_delay(pool) -> float:
+    """Thời gian chờ (giây) trước khi gửi bản sao."""
+    if len(pool.latency) < 20:
+        delay = Config.HEDGE_INITIAL_DELAY_MS / 1000
+    else:
+        delay = pool.latency.percentile(Config.HEDGE_PERCENTILE)
+    return max(delay, Config.HEDGE_MIN_DELAY_MS / 1000)
+
+
+def send_request(service_url: str, url: str, method: str, headers: dict, **kwargs):
+    """
+    Gửi request tới upstream, có hedge nếu đủ điều kiện.
+    Mỗi lần gọi là 1 span CLIENT; traceparent của span được gửi kèm sang service.
+    Thời gian chờ (gồm cả hedge / chuyển instance) được ghi vào access log của request.
+
+    Args:
+        service_url: Base URL của service (VD: Config.USER_SERVICE_URL)
+        url:         URL đầy đủ trên instance chính (service_url + endpoint)
+        method:      HTTP method
+        headers:     Header gửi sang service
+        **kwargs:    Tham số còn lại của UpstreamPool.request (timeout, stream...)
+
+    Returns:
+        requests.Response
+
+    Raises:
+        requests.exceptions.RequestException nếu mọi lần gửi đều lỗi
+    """
+    span = start_client_span(f'{method} {url}')
+    inject_trace_headers(headers, span)
+    if span is not None:
+        span.set_attribute('http.url', url)
+    started = time.perf_counter()
+    status = None
+    try:
+        resp = _send(service_url, url, method, headers, **kwargs)
+        status = resp.status_code
+        if span is not None:
+            span.set_attribute('http.status_code', status)
+        return resp
+    except Exception as e:
+        status = type(e).__name__
+        if span is not None:
+            span.record_error(e)
+        raise
+    finally:
+        record_upstream(service_url, status, time.perf_counter() - started)
+        if span is not None:
+            span.end()
+
+
+def _request(service_url: str, instance: str, url: str, method: str, headers: dict, **kwargs):
+    """
+    Gửi tới instance đã chọn. Bị circuit / bulkhead từ chối (chưa chạm network,
+    an toàn cả với POST) → chuyển sang instance khác của service.
+    """
+    tried = set()
+    while True:
+        tried.add(instance)
+        try:
+            return get_upstream_pool(instance).request(
+                method=method, url=rebase_url(url, service_url, instance), headers=headers, **kwargs)
+        except UpstreamRejectedError:
+            instance = choose_instance(service_url, exclude=tried)
+            if instance is None:
+                raise
+
+
+def _send(service_url: str, url: str, method: str, headers: dict, **kwargs):
+    # Mọi instance đều bị loại → vẫn gửi qua instance đầu để pool trả CircuitOpenError (503 + Retry-After)
+    instance = choose_instance(service_url) or service_url
+    primary_pool = get_upstream_pool(instance)
+
+    if (not Config.HEDGE_ENABLED or method not in HEDGEABLE_METHODS
+            or len(get_service_instances(service_url)) < 2):
+        return _request(service_url, instance, url, method, headers, **kwargs)
+
+    _count("hedged_requests")
+    started = time.monotonic()
+    primary = _executor.submit(_request, service_url, instance, url, method, headers, **kwargs)
+
+    done, _ = wait([primary], timeout=_hedge_delay(primary_pool))
+    if done and primary.exception() is None:
+        _count("primary_wins")
+        return primary.result()
+
+    # Instance chính chậm hoặc đã lỗi → gửi bản sao sang instance khác do load balancer chọn
+    hedge_instance = choose_instance(service_url, exclude={instance})
+    if hedge_instance is None:
+        _count("primary_wins")
+        return primary.result()
+    hedge_headers = dict(headers)
+    if DEADLINE_HEADER in hedge_headers:
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        hedge_headers[DEADLINE_HEADER] = str(max(0, int(hedge_headers[DEADLINE_HEADER]) - elapsed_ms))
+    hedge = _executor.submit(_request, service_url, hedge_instance, url, method, hedge_headers, **kwargs)
+    _count("hedges_sent")
+
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = next((f for f in done if f.exception() is None), None)
+        if winner is None:
+            error = next(iter(done)).exception()
+            continue
+        other = hedge if winner is primary else primary
+        _close_when_done(other)
+        _count("primary_wins" if winner is primary else "hedge_wins")
+        return winner.result()
+
+    raise error
+
+
+def get_hedging_stats() -> dict:
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot.update({
+        "enabled": Config.HEDGE_ENABLED,
+        "percentile": Config.HEDGE_PERCENTILE,
+        "instances": {
+            "auth": Config.AUTH_SERVICE_INSTANCES,
+            "user": Config.USER_SERVICE_INSTANCES,
+            "data": Config.DATA_SERVICE_INSTANCES,
+        },
+    })
+    return snapshot
@@ -0,0 +1,203 @@
+"""
+load_balancer.py
+────────────────
+Chọn instance upstream cho mỗi request khi 1 service chạy nhiều instance.
+
+Tại sao cần?
+    AUTH_SERVICE_URL / USER_SERVICE_URL chỉ trỏ 1 instance → không scale ngang
+    auth-service (bcrypt tốn CPU) sau Gateway được.
+
+Cách hoạt động:
+    - Mỗi service có list instance (Config.*_SERVICE_INSTANCES, trọng số tùy chọn),
+      mỗi instance 1 UpstreamPool riêng (keep-alive + circuit breaker + bulkhead)
+    - Chiến lược (LB_STRATEGY):
+        round_robin        Lần lượt từng instance
+        weighted           Smooth weighted round robin (kiểu nginx) theo trọng số
+        least_outstanding  Instance có (request đang bay + 1) / trọng số nhỏ nhất
+                           → instance chậm tự nhận ít request hơn
+    - Instance có circuit OPEN bị loại (eject) tới khi hết recovery_timeout;
+      instance health check báo unhealthy (health_checker.py) bị loại tới khi healthy lại
+    - Slow start: instance vừa hồi phục (circuit đóng lại / healthy lại) nhận trọng số tăng dần
+      từ 10% lên 100% trong LB_SLOW_START_SECONDS → không bị dồn tải ngay khi vừa sống lại
+
+Cách dùng:
+    instance = choose_instance(Config.AUTH_SERVICE_URL)
+    url = rebase_url(url, Config.AUTH_SERVICE_URL, instance)
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+from app.config import Config
+from app.utils.health_checker import is_instance_healthy
+from app.utils.upstream_pool import get_upstream_pool
+
+STRATEGIES = ('round_robin', 'weighted', 'least_outstanding')
+
+# Trọng số tối thiểu (tỉ lệ) của instance đang slow start / đang thử lại (half-open)
+SLOW_START_MIN_FACTOR = 0.1
+
+
+class LoadBalancer:
+
+    def __init__(self, instances: list, weights: dict = None, strategy: str = None,
+                 slow_start: float = None):
+        strategy = strategy or Config.LB_STRATEGY
+        if strategy not in STRATEGIES:
+            raise ValueError(f"LB_STRATEGY không hợp lệ: {strategy!r} (chọn {STRATEGIES})")
+        self.instances = list(instances)
+        self.strategy = strategy
+        self.slow_start = Config.LB_SLOW_START_SECONDS if slow_start is None else slow_start
+        weights = weights or {}
+        self.weights = {url: (weights.get(url, 1) if strategy != 'round_robin' else 1)
+                        for url in self.instances}
+
+        self._lock = threading.Lock()
+        self._current = {url: 0.0 for url in self.instances}    # smooth WRR
+        self._recovered_at = {}     # url → monotonic lúc circuit đóng lại sau khi bị loại
+        self._ejected = set()
+        self._picks = {url: 0 for url in self.instances}
+        self._rotation = 0
+
+    def _effective_weight(self, url: str, pool, now: float) -> float:
+        weight = self.weights[url]
+        if pool.breaker.state != 'closed':
+            return weight * SLOW_START_MIN_FACTOR
+        recovered_at = self._recovered_at.get(url)
+        if recovered_at is None or self.slow_start <= 0:
+            return weight
+        progress = (now - recovered_at) / self.slow_start
+        if progress >= 1:
+            del self._recovered_at[url]
+            return weight
+        return weight * max(SLOW_START_MIN_FACTOR, progress)
+
+    def _candidates(self, exclude, now: float) -> list:
+        """(url, pool, trọng số hiệu dụng) của các instance đang nhận request."""
+        candidates = []
+        for url in self.instances:
+            if url in exclude:
+                continue
+            pool = get_upstream_pool(url)
+            healthy = is_instance_healthy(url)
+            if not healthy or pool.breaker.state != 'closed':
+                self._ejected.add(url)
+                if not healthy or not pool.breaker.available:
+                    continue
+            elif url in self._ejected:
+                # Circuit vừa đóng lại → bắt đầu slow start
+                self._ejected.discard(url)
+                self._recovered_at[url] = now
+            candidates.append((url, pool, self._effective_weight(url, pool, now)))
+        return candidates
+
+    def choose(self, exclude=()):
+        """
+        Instance cho request tiếp theo.
+
+        Returns:
+            base URL của instance; None nếu mọi instance (trừ exclude) đều đang bị loại
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = self._candidates(exclude, now)
+            if not candidates:
+                return None
+
+            if self.strategy == 'least_outstanding':
+                # Xoay điểm bắt đầu → các instance hòa điểm (tải thấp) được chọn lần lượt
+                self._rotation = (self._rotation + 1) % len(candidates)
+                rotated = candidates[self._rotation:] + candidates[:self._rotation]
+                url = min(rotated, key=lambda c: (c[1].in_flight + 1) / c[2])[0]
+            else:
+                # Smooth WRR: cộng trọng số cho mọi instance, chọn instance lớn nhất rồi trừ tổng
+                total = 0.0
+                best = None
+                for candidate_url, _, weight in candidates:
+                    self._current[candidate_url] += weight
+                    total += weight
+                    if best is None or self._current[candidate_url] > self._current[best]:
+                        best = candidate_url
+                self._current[best] -= total
+                url = best
+
+            self._picks[url] += 1
+            return url
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            instances = {}
+            for url in self.instances:
+                pool = get_upstream_pool(url)
+                instances[url] = {
+                    "weight": self.weights[url],
+                    "effective_weight": round(self._effective_weight(url, pool, now), 3),
+                    "in_flight": pool.in_flight,
+                    "circuit": pool.breaker.state,
+                    "healthy": is_instance_healthy(url),
+                    "ejected": not pool.breaker.available or not is_instance_healthy(url),
+                    "picks": self._picks[url],
+                }
+        return {"strategy": self.strategy, "instances": instances}
+
+
+# ─────────────────────────────────────────────────────────────
+# REGISTRY — 1 LoadBalancer / service
+# ─────────────────────────────────────────────────────────────
+
+_balancers = {}
+_balancers_lock = threading.Lock()
+
+
+def get_service_instances(service_url: str) -> list:
+    """Các base URL cùng phục vụ service_url, service_url luôn đứng đầu."""
+    for instances in (Config.AUTH_SERVICE_INSTANCES, Config.USER_SERVICE_INSTANCES,
+                      Config.DATA_SERVICE_INSTANCES):
+        if service_url in instances:
+            return [service_url] + [u for u in instances if u != service_url]
+    return [service_url]
+
+
+def get_load_balancer(service_url: str) -> LoadBalancer:
+    balancer = _balancers.get(service_url)
+    if balancer is None:
+        with _balancers_lock:
+            balancer = _balancers.get(service_url)
+            if balancer is None:
+                balancer = LoadBalancer(get_service_instances(service_url), Config.SERVICE_INSTANCE_WEIGHTS)
+                _balancers[service_url] = balancer
+    return balancer
+
+
+def choose_instance(service_url: str, exclude=()):
+    """Base URL instance nên nhận request; service 1 instance → luôn là service_url."""
+    instances = get_service_instances(service_url)
+    if len(instances) == 1:
+        return None if service_url in exclude else service_url
+    return get_load_balancer(service_url).choose(exclude)
+
+
+def rebase_url(url: str, service_url: str, instance: str) -> str:
+    """
+    http://auth-1:5001/api/auth/login → http://auth-2:5001/api/auth/login
+    URL cùng host nhưng ngoài prefix của service_url (VD: user-service /api/users/me/preferences
+    với USER_SERVICE_URL .../api/user) → chỉ đổi scheme + host của instance, giữ nguyên path.
+    """
+    base = service_url.rstrip('/')
+    if url.startswith(base + '/') or url == base:
+        return instance.rstrip('/') + url[len(base):]
+    return service_origin(instance) + url[len(service_origin(service_url)):]
+
+
+def service_origin(service_url: str) -> str:
+    """http://user-1:5002/api/user → http://user-1:5002"""
+    parts = urlsplit(service_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_load_balancer_stats() -> dict:
+    with _balancers_lock:
+        balancers = dict(_balancers)
+    return {service_url: balancer.stats() for service_url, balancer in balancers.items()}
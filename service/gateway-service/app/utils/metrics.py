@@ -0,0 +1,255 @@
+"""
+metrics.py
+──────────
+Metrics dạng Prometheus text cho service, đọc qua GET /metrics.
+
+Tại sao cần?
+    Trước đây chỉ có print() → không biết route nào chậm, upstream nào lỗi,
+    tỉ lệ 4xx/5xx bao nhiêu.
+
+Cách hoạt động:
+    - Counter / Histogram giữ số liệu trong RAM, ghi bằng 1 lock + vài phép cộng
+      → đủ rẻ để bật thường trực trên production
+    - CallbackGauge tính lúc scrape (VD: connection đang dùng) → không tốn gì khi ghi
+    - Label route = rule của Flask (/api/user/<id>) chứ không phải path thật
+      → số series không tăng theo dữ liệu
+
+Lưu ý: số liệu nằm trong từng process. Chạy nhiều worker thì mỗi lần scrape
+trả về số liệu của 1 worker — Prometheus nên scrape từng worker / instance.
+
+Cách dùng:
+    register_metrics(app, "gateway")   ← gọi TRƯỚC các before_request có thể trả
+                                         response sớm (rate limit...) để vẫn được đếm
+    UPSTREAM_LATENCY.observe(0.012, "http://localhost:5001", "GET", "200")
+"""
+
+import bisect
+import threading
+import time
+
+from flask import Response, g, request
+
+# Bucket latency (giây): từ 5ms tới 10s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    """Giá trị tăng / giảm được (VD: số request đang xử lý)."""
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> list:
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [count từng bucket (không cộng dồn)..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [0] * (len(self.buckets) + 3)
+                self._series[labels] = series
+            series[index] += 1          # index == len(buckets) → bucket +Inf
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_str} {_format_value(series[-2])}')
+            lines.append(f'{self.name}_count{label_str} {series[-1]}')
+        return lines
+
+
+class CallbackGauge:
+    """Gauge tính lúc scrape: fn() trả về list (label_values, value)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple, fn):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.fn = fn
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        try:
+            samples = self.fn()
+        except Exception:
+            samples = []    # Gauge lỗi không được làm hỏng cả /metrics
+        for labels, value in samples:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Đăng ký metric; tên đã tồn tại (create_app gọi nhiều lần) → trả về metric cũ."""
+        with self._lock:
+            for existing in self._metrics:
+                if existing.name == metric.name:
+                    return existing
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def gauge_callback(self, name, documentation, labelnames, fn) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, labelnames, fn))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'Số request HTTP đã xử lý', ('method', 'route', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Thời gian xử lý request (tới lúc trả headers)', ('method', 'route'))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    'http_requests_in_flight', 'Số request đang xử lý')
+HTTP_ERRORS = REGISTRY.counter(
+    'http_errors_total', 'Response lỗi (status >= 400) theo mã lỗi trong body', ('route', 'status', 'code'))
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    'upstream_request_duration_seconds', 'Thời gian gọi upstream tới lúc nhận headers',
+    ('upstream', 'method', 'status'))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    'upstream_errors_total', 'Lỗi khi gọi upstream', ('upstream', 'kind'))
+
+
+def _route_label() -> str:
+    # Route từ bảng route của Gateway (1 view chung) → nhãn theo prefix của route
+    label = g.get('route_label')
+    if label:
+        return label
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _error_code(response) -> str:
+    """
+    Mã lỗi trong body JSON: {"error": {"code": "..."}} hoặc {"error": "..."}.
+    Chỉ đọc body đã có sẵn trong RAM (không đụng response stream).
+    """
+    if response.is_streamed or not response.is_json:
+        return ''
+    body = response.get_json(silent=True)
+    error = body.get('error') if isinstance(body, dict) else None
+    if isinstance(error, dict):
+        return str(error.get('code', ''))
+    return str(error) if error else ''
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    HTTP_IN_FLIGHT.dec()
+
+    route = _route_label()
+    status = str(response.status_code)
+    HTTP_REQUESTS.inc(request.method, route, status)
+    HTTP_LATENCY.observe(time.perf_counter() - started, request.method, route)
+    if response.status_code >= 400:
+        HTTP_ERRORS.inc(route, status, _error_code(response))
+    return response
+
+
+def register_metrics(app, service_name: str) -> None:
+    """
+    Ghi metrics cho mọi request + mở endpoint GET /metrics.
+    Gọi trong create_app().
+    """
+    REGISTRY.gauge_callback('service_info', 'Thông tin service', ('service',), lambda: [((service_name,), 1)])
+
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -1,72 +1,339 @@
-import requests
-from flask import request, jsonify, make_response
-
-def forward_request(service_url, endpoint, extra_headers: dict = None):
-    """
-    Hàm trung gian để chuyển tiếp request từ Gateway sang Microservice.
-    Đảm bảo giữ nguyên JSON data và Cookies (cả 2 chiều).
-    """
-    
-    # 1. Xây dựng URL đích
-    # service_url: http://localhost:5001/api/auth
-    # endpoint: /login
-    # -> url: http://localhost:5001/api/auth/login
-    url = f"{service_url.rstrip('/')}/{endpoint.lstrip('/')}"
-    
-    method = request.method
-    
-    # 2. Lấy dữ liệu từ Frontend gửi lên
-    # json_data: Dùng cho POST/PUT (body)
-    # incoming_cookies: Dùng cho Logout hoặc các request cần xác thực (Gateway -> Service)
-    json_data = request.get_json(silent=True)
-    incoming_cookies = request.cookies
-
-    # Build headers to forward (exclude hop-by-hop headers)
-    incoming_headers = {}
-    for k, v in request.headers.items():
-        if k.lower() in ('host', 'content-length', 'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailers', 'transfer-encoding', 'upgrade'):
-            continue
-        incoming_headers[k] = v
-
-    if extra_headers:
-        incoming_headers.update(extra_headers)
-
-    try:
-        # 3. Gửi request sang Service đích
-        # Debug: log incoming cookies forwarded from browser to gateway
-        print(f"[Gateway] Forwarding to {url} with cookies: {incoming_cookies}")
-
-        resp = requests.request(
-            method=method,
-            url=url,
-            json=json_data,
-            cookies=incoming_cookies, # [QUAN TRỌNG 1]: Chuyển tiếp Cookie từ FE -> Service
-            headers=incoming_headers,
-            timeout=10 # Set timeout để tránh treo Gateway nếu Service chết
-        )
-
-        # 4. Nhận phản hồi từ Service
-        # Xử lý trường hợp Service trả về nội dung rỗng (ví dụ 204 No Content)
-        response_data = resp.json() if resp.content else {}
-
-        flask_response = make_response(
-            jsonify(response_data),
-            resp.status_code
-        )
-
-        # 5. Forward Set-Cookie headers from upstream response to client unchanged (if any)
-        # Prefer copying raw Set-Cookie header(s) instead of reconstructing cookies
-        set_cookie = resp.headers.get('Set-Cookie')
-        if set_cookie:
-            # If multiple Set-Cookie headers are present, requests may combine them; still forward what we have
-            flask_response.headers.add('Set-Cookie', set_cookie)
-
-        return flask_response
-
-    except requests.exceptions.RequestException as e:
-        # Xử lý khi Service đích bị sập hoặc timeout
-        print(f"Error forwarding request to {url}: {e}")
-        return jsonify({
-            "error": "Service Unavailable", 
-            "details": "Không thể kết nối tới Service đích"
-        }), 503
\ No newline at end of file
+import hashlib
+import math
+import requests
+from flask import request, jsonify, make_response, Response
+from app.config import Config
+from app.utils.upstream_pool import get_upstream_pool
+from app.utils.response_cache import user_response_cache
+from app.utils.single_flight import SingleFlight
+from app.utils.circuit_breaker import UpstreamRejectedError
+from app.utils.deadline import DEADLINE_HEADER, remaining_seconds
+from app.utils.hedging import send_request
+
+# Header chỉ có ý nghĩa trên 1 chặng kết nối → không forward sang chặng tiếp theo
+HOP_BY_HOP_HEADERS = (
+    'host', 'content-length', 'connection', 'keep-alive', 'proxy-authenticate',
+    'proxy-authorization', 'te', 'trailers', 'transfer-encoding', 'upgrade'
+)
+
+# Header danh tính chỉ Gateway được gán (từ token đã xác thực) → bỏ bản client tự gửi
+TRUSTED_IDENTITY_HEADERS = ('x-user-id',)
+
+# Method làm thay đổi dữ liệu → phải xóa cache response của user
+MUTATING_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# Method an toàn để gộp các request giống hệt nhau đang bay (single-flight)
+COALESCIBLE_METHODS = ('GET', 'HEAD')
+
+# Gộp GET giống hệt nhau đang chạy đồng thời thành 1 lần gọi upstream
+single_flight = SingleFlight()
+
+# Header từ upstream được trả nguyên về client ở chế độ stream
+# (Content-Length chỉ giữ khi body không bị biến đổi — xem _forward_stream)
+PASSTHROUGH_RESPONSE_HEADERS = (
+    'content-type', 'content-encoding', 'content-disposition', 'cache-control',
+    'etag', 'last-modified', 'expires', 'location', 'vary', 'www-authenticate',
+    'retry-after'
+)
+
+
+class _RequestBodyStream:
+    """
+    Bọc request.stream của Flask để requests gửi body theo từng chunk.
+
+    Có __len__ → requests đặt Content-Length thay vì Transfer-Encoding: chunked,
+    có read() → http.client đọc từng block thay vì nạp cả body vào RAM.
+    """
+
+    def __init__(self, stream, length: int, chunk_size: int):
+        self._stream = stream
+        self._length = length
+        self._chunk_size = chunk_size
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(self._chunk_size if size is None or size < 0 else size)
+
+    def __iter__(self):
+        while True:
+            chunk = self._stream.read(self._chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _build_forward_headers(extra_headers: dict = None) -> dict:
+    """
+    Header gửi sang Service: header của client trừ hop-by-hop và X-User-ID, cộng extra_headers.
+    X-User-ID chỉ đến từ extra_headers (sub của token dispatch đã xác thực) — client
+    tự gửi X-User-ID trên route auth: none thì service / cache / single-flight sẽ tin nhầm.
+    """
+    incoming_headers = {}
+    for k, v in request.headers.items():
+        if k.lower() in HOP_BY_HOP_HEADERS or k.lower() in TRUSTED_IDENTITY_HEADERS:
+            continue
+        incoming_headers[k] = v
+
+    if extra_headers:
+        incoming_headers.update(extra_headers)
+
+    return incoming_headers
+
+
+def forward_request(service_url, endpoint, extra_headers: dict = None, stream: bool = None):
+    """
+    Hàm trung gian để chuyển tiếp request từ Gateway sang Microservice.
+    Đảm bảo giữ nguyên body và Cookies (cả 2 chiều).
+
+    Args:
+        service_url:   Base URL của service (VD: Config.AUTH_SERVICE_URL)
+        endpoint:      Path phía sau base URL (VD: '/login')
+        extra_headers: Header bổ sung gửi sang service (VD: X-User-ID)
+        stream:        True  → passthrough: chuyển nguyên byte request/response
+                                theo từng chunk, giữ Content-Type gốc
+                       False → chế độ JSON cũ: parse rồi jsonify lại
+                       None  → theo Config.PROXY_STREAMING
+    """
+
+    # 1. Xây dựng URL đích
+    # service_url: http://localhost:5001/api/auth
+    # endpoint: /login
+    # -> url: http://localhost:5001/api/auth/login
+    url = f"{service_url.rstrip('/')}/{endpoint.lstrip('/')}"
+
+    if stream is None:
+        stream = Config.PROXY_STREAMING
+
+    # Build headers to forward (exclude hop-by-hop headers)
+    incoming_headers = _build_forward_headers(extra_headers)
+
+    # Deadline còn lại của request → báo cho service + giới hạn timeout upstream
+    remaining = remaining_seconds()
+    if remaining is not None and remaining <= 0:
+        return _deadline_exceeded_response()
+    timeout = _upstream_timeout(service_url, remaining)
+    if remaining is not None:
+        incoming_headers[DEADLINE_HEADER] = str(int(remaining * 1000))
+
+    try:
+        if stream:
+            return _forward_stream(service_url, url, incoming_headers, timeout)
+        return _forward_json(service_url, url, incoming_headers, timeout)
+
+    except UpstreamRejectedError as e:
+        # Circuit mở / bulkhead đầy → trả 503 ngay, không chạm network
+        response = make_response(jsonify({
+            "error": "Service Unavailable",
+            "details": f"Service đích tạm thời không nhận request: {e}"
+        }), 503)
+        response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+        return response
+
+    except (requests.exceptions.RequestException, TimeoutError) as e:
+        # Xử lý khi Service đích bị sập hoặc timeout (lỗi đã có trong access log / metrics upstream)
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            return _deadline_exceeded_response()
+        return jsonify({
+            "error": "Service Unavailable",
+            "details": "Không thể kết nối tới Service đích"
+        }), 503
+
+    finally:
+        # Request ghi của user đi qua Gateway → response GET đã cache của user đó không còn đúng.
+        # Làm cả khi lỗi/timeout vì service có thể đã ghi xong trước khi lỗi.
+        # Chỉ tin X-User-ID do dispatch gán từ token đã xác thực (extra_headers),
+        # không tin header client tự gửi → không ai xóa được cache của user khác.
+        user_id = (extra_headers or {}).get('X-User-ID')
+        if user_id and request.method in MUTATING_METHODS:
+            user_response_cache.invalidate_user(user_id)
+
+
+def _upstream_timeout(service_url, remaining) -> tuple:
+    """(connect, read) timeout của pool, không vượt quá deadline còn lại."""
+    connect_timeout, read_timeout = get_upstream_pool(service_url).timeout
+    if remaining is None:
+        return connect_timeout, read_timeout
+    return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+
+def _deadline_exceeded_response():
+    return jsonify({
+        "error": "Gateway Timeout",
+        "details": "Hết thời gian xử lý cho phép của request"
+    }), 504
+
+
+def _forward_stream(service_url, url, incoming_headers: dict, timeout: tuple):
+    """
+    Passthrough không parse: body request/response đi qua Gateway theo từng chunk.
+
+    - Không json() / jsonify() → không tốn CPU decode/encode, body không phải JSON vẫn giữ nguyên
+    - Response upstream được đọc dần trong lúc gửi về client → RAM không phụ thuộc kích thước body
+    - Body đã nén (Content-Encoding) được chuyển nguyên, không giải nén
+    """
+    chunk_size = Config.PROXY_CHUNK_SIZE
+
+    # Client không khai báo Accept-Encoding → không để upstream nén body,
+    # vì Gateway sẽ chuyển nguyên byte về client
+    if not any(k.lower() == 'accept-encoding' for k in incoming_headers):
+        incoming_headers['Accept-Encoding'] = 'identity'
+
+    # GET/HEAD giống hệt nhau đang bay → chỉ 1 request thật sự sang upstream
+    if Config.COALESCE_REQUESTS and request.method in COALESCIBLE_METHODS:
+        return _forward_coalesced(service_url, url, incoming_headers, timeout)
+
+    # 1. Body request: đọc thẳng từ wsgi.input, không qua get_json()
+    body = None
+    content_length = request.content_length
+    if content_length:
+        body = _RequestBodyStream(request.stream, content_length, chunk_size)
+    elif request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+        body = iter(lambda: request.stream.read(chunk_size), b'')
+
+    # 2. Gửi request sang Service đích (cookie nằm sẵn trong header Cookie)
+    # (GET có thể được hedge sang instance khác — xem app/utils/hedging.py)
+    resp = send_request(
+        service_url,
+        url,
+        request.method,
+        headers=incoming_headers,
+        data=body,
+        timeout=timeout,
+        stream=True,  # Chưa đọc body response, chỉ nhận status + headers
+    )
+
+    # 3. Headers trả về client
+    response_headers = _response_headers(resp.raw.headers)
+
+    # 4. Body: đọc từng chunk thô từ socket upstream, giữ nguyên nén (decode_content=False)
+    def generate():
+        try:
+            for chunk in resp.raw.stream(chunk_size, decode_content=False):
+                yield chunk
+        finally:
+            resp.close()  # Trả connection về pool
+
+    flask_response = Response(
+        generate(),
+        status=resp.status_code,
+        headers=response_headers,
+        direct_passthrough=True,
+    )
+    # Client ngắt giữa chừng → vẫn đóng response upstream
+    flask_response.call_on_close(resp.close)
+    return flask_response
+
+
+def _response_headers(raw_headers) -> list:
+    """Chọn các header của upstream trả nguyên về client (giữ nhiều giá trị cùng tên)."""
+    response_headers = []
+    for name in PASSTHROUGH_RESPONSE_HEADERS:
+        for value in raw_headers.getlist(name):
+            response_headers.append((name.title(), value))
+    if 'content-length' in raw_headers:
+        response_headers.append(('Content-Length', raw_headers['content-length']))
+
+    # [QUAN TRỌNG 2]: Forward TỪNG Set-Cookie riêng biệt (không gộp bằng dấu phẩy)
+    for set_cookie in raw_headers.getlist('Set-Cookie'):
+        response_headers.append(('Set-Cookie', set_cookie))
+
+    return response_headers
+
+
+def _coalesce_key(url: str, incoming_headers: dict) -> tuple:
+    """
+    Key xác định 2 request "giống hệt nhau": method + URL + danh tính người gọi
+    + các header làm thay đổi nội dung response.
+    Danh tính = X-User-ID nếu có (chỉ có khi dispatch đã xác thực token — header client
+    gửi bị bỏ ở _build_forward_headers), ngược lại digest của Authorization + Cookie
+    → 2 user khác nhau KHÔNG BAO GIỜ dùng chung response.
+    """
+    headers = {k.lower(): v for k, v in incoming_headers.items()}
+    identity = headers.get('x-user-id')
+    if not identity:
+        raw_identity = f"{headers.get('authorization', '')}|{headers.get('cookie', '')}"
+        identity = hashlib.sha256(raw_identity.encode('utf-8')).hexdigest()
+    return (
+        request.method,
+        url,
+        identity,
+        headers.get('accept-encoding', ''),
+        headers.get('if-none-match', ''),
+    )
+
+
+def _forward_coalesced(service_url, url, incoming_headers: dict, timeout: tuple):
+    """
+    GET/HEAD đi qua single-flight: leader đọc hết body upstream (byte thô),
+    các follower cùng key dùng chung (status, headers, body).
+    Body phải buffer để chia sẻ được giữa các thread → chỉ dùng cho GET/HEAD.
+    """
+    method = request.method
+
+    def fetch():
+        resp = send_request(
+            service_url,
+            url,
+            method,
+            headers=incoming_headers,
+            timeout=timeout,
+            stream=True,
+        )
+        try:
+            body = resp.raw.read(decode_content=False)
+        finally:
+            resp.close()
+        return resp.status_code, _response_headers(resp.raw.headers), body
+
+    # Follower không chờ lâu hơn thời gian tối đa của chính leader
+    wait_timeout = sum(timeout)
+    (status, response_headers, body), shared = single_flight.do(
+        _coalesce_key(url, incoming_headers), fetch, timeout=wait_timeout
+    )
+
+    flask_response = Response(body, status=status, headers=response_headers)
+    if shared:
+        flask_response.headers['X-Coalesced'] = 'true'
+    return flask_response
+
+
+def _forward_json(service_url, url, incoming_headers: dict, timeout: tuple):
+    """Chế độ cũ: parse JSON 2 chiều (giữ lại để tương thích, bật bằng GATEWAY_PROXY_MODE=json)."""
+
+    # 1. Lấy dữ liệu từ Frontend gửi lên
+    # json_data: Dùng cho POST/PUT (body)
+    # incoming_cookies: Dùng cho Logout hoặc các request cần xác thực (Gateway -> Service)
+    json_data = request.get_json(silent=True)
+    incoming_cookies = request.cookies
+
+    # 2. Gửi request sang Service đích
+    # Dùng Session đã pool theo upstream → tái sử dụng connection keep-alive.
+    # Timeout (connect, read) lấy từ Config, không vượt deadline còn lại của request
+    resp = send_request(
+        service_url,
+        url,
+        request.method,
+        headers=incoming_headers,
+        json=json_data,
+        cookies=incoming_cookies, # [QUAN TRỌNG 1]: Chuyển tiếp Cookie từ FE -> Service
+        timeout=timeout,
+    )
+
+    # 3. Nhận phản hồi từ Service
+    # Xử lý trường hợp Service trả về nội dung rỗng (ví dụ 204 No Content)
+    response_data = resp.json() if resp.content else {}
+
+    flask_response = make_response(
+        jsonify(response_data),
+        resp.status_code
+    )
+
+    # 4. Forward Set-Cookie headers from upstream response to client unchanged (if any)
+    # Prefer copying raw Set-Cookie header(s) instead of reconstructing cookies
+    for set_cookie in resp.raw.headers.getlist('Set-Cookie'):
+        flask_response.headers.add('Set-Cookie', set_cookie)
+
+    return flask_response
@@ -0,0 +1,194 @@
+"""
+rate_limit_store.py
+───────────────────
+Nơi lưu trạng thái token bucket cho rate limit của Gateway.
+
+Token bucket:
+    Mỗi key (IP / user / route) có 1 "xô" chứa tối đa `capacity` token,
+    được nạp thêm `rate` token mỗi giây. Mỗi request lấy 1 token;
+    xô rỗng → request bị từ chối (429).
+    → cho phép burst ngắn tới capacity, tốc độ trung bình không vượt rate.
+
+2 store:
+    MemoryBucketStore  Trong RAM của process — nhanh nhất, nhưng mỗi worker
+                       đếm riêng (N worker → giới hạn thực tế gấp N lần)
+    RedisBucketStore   Dùng chung giữa các worker / instance Gateway.
+                       Refill + consume trong 1 Lua script → atomic, 1 round-trip.
+
+Nhiều xô cho 1 request (route + user + IP):
+    consume_all() chỉ lấy token khi MỌI xô đều đủ — 1 xô thiếu thì không xô nào
+    bị trừ. Nếu trừ lần lượt rồi dừng ở xô đầu tiên từ chối, request bị chặn vẫn
+    tiêu hết token ở các xô trước → giới hạn thực tế chặt hơn cấu hình.
+
+Cách dùng:
+    store = create_bucket_store()
+    allowed, tokens_left = store.consume("ip:1.2.3.4", rate=10, capacity=20)
+    allowed, tokens_left = store.consume_all([("ip:1.2.3.4", 10, 20), ("user:7", 5, 10)])
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import Config
+
+
+class MemoryBucketStore:
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # key -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1) -> tuple:
+        """
+        Lấy `cost` token khỏi xô của key.
+
+        Returns:
+            (allowed, tokens_left)
+        """
+        allowed, tokens = self.consume_all([(key, rate, capacity)], cost)
+        return allowed, tokens[0]
+
+    def consume_all(self, buckets: list, cost: float = 1) -> tuple:
+        """
+        Lấy `cost` token ở mọi xô, hoặc không lấy ở xô nào.
+
+        Args:
+            buckets: list (key, rate, capacity)
+
+        Returns:
+            (allowed, tokens_left) — tokens_left theo thứ tự của buckets
+        """
+        now = time.monotonic()
+        with self._lock:
+            states = []
+            for key, rate, capacity in buckets:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = [capacity, now]
+                    self._buckets[key] = bucket
+                    # Quá nhiều key (VD: scan từ nhiều IP) → bỏ key lâu không dùng nhất
+                    while len(self._buckets) > self.max_keys:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                states.append(bucket)
+
+            allowed = all(bucket[0] >= cost for bucket in states)
+            if allowed:
+                for bucket in states:
+                    bucket[0] -= cost
+            tokens = [bucket[0] for bucket in states]
+        return allowed, tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"keys": len(self._buckets), "max_keys": self.max_keys}
+
+
+# Refill + consume atomic trên mọi key của request trong Redis (KEYS[i] ứng với
+# ARGV[2i], ARGV[2i+1] = rate, capacity). Dùng TIME của Redis → các instance
+# Gateway lệch đồng hồ cũng không làm sai tốc độ nạp.
+_CONSUME_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local tokens = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local capacity = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local left = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if left == nil then
+        left = capacity
+        ts = now
+    end
+    left = math.min(capacity, left + math.max(0, now - ts) * rate)
+    if left < cost then
+        allowed = 0
+    end
+    tokens[i] = left
+end
+
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local capacity = tonumber(ARGV[2 * i + 1])
+    if allowed == 1 then
+        tokens[i] = tokens[i] - cost
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'ts', tostring(now))
+    -- Xô đầy lại sau capacity / rate giây → key hết giá trị, để Redis tự xóa
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+    result[i + 1] = tostring(tokens[i])
+end
+return result
+"""
+
+
+class RedisBucketStore:
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "gw:rl:", socket_timeout: float = 0.05):
+        """
+        Args:
+            url:            redis://:password@host:port/db
+            prefix:         Prefix cho mọi key rate limit
+            socket_timeout: Timeout (giây) mỗi lệnh — Redis chậm không được làm chậm Gateway
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RATE_LIMIT_STORE=redis cần cài package 'redis'") from e
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout
+        )
+        self._script = self._client.register_script(_CONSUME_SCRIPT)
+        self._redis_error = redis.RedisError
+        self._lock = threading.Lock()
+        self._errors = 0
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1) -> tuple:
+        """Như MemoryBucketStore.consume()."""
+        allowed, tokens = self.consume_all([(key, rate, capacity)], cost)
+        return allowed, tokens[0]
+
+    def consume_all(self, buckets: list, cost: float = 1) -> tuple:
+        """
+        Như MemoryBucketStore.consume_all(), mọi key trong 1 lần gọi Lua.
+        Redis lỗi / timeout → cho qua (fail-open): mất rate limit tạm thời
+        vẫn tốt hơn chặn toàn bộ traffic.
+        """
+        args = [cost]
+        for _, rate, capacity in buckets:
+            args += [rate, capacity]
+        try:
+            allowed, *tokens = self._script(
+                keys=[self.prefix + key for key, _, _ in buckets], args=args)
+        except self._redis_error:
+            with self._lock:
+                self._errors += 1
+            return True, [capacity for _, _, capacity in buckets]
+        return bool(allowed), [float(left) for left in tokens]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"errors": self._errors, "prefix": self.prefix}
+
+
+def create_bucket_store():
+    """Tạo store theo Config.RATE_LIMIT_STORE ("memory" | "redis")."""
+    if Config.RATE_LIMIT_STORE == "redis":
+        return RedisBucketStore(Config.REDIS_URL)
+    return MemoryBucketStore(max_keys=Config.RATE_LIMIT_MAX_KEYS)
@@ -0,0 +1,156 @@
+"""
+response_cache.py
+─────────────────
+Cache response GET theo từng user tại Gateway (VD: GET /api/user/profile).
+
+Tại sao cần?
+    Profile gần như không đổi, nhưng mỗi lần gọi tốn 1 hop sang user-service
+    + 1 query DB + 1 lần validate token với auth-service.
+
+Cách hoạt động:
+    key   = (X-User-ID, path + query string)
+    value = status + headers + body (byte) của response 200 từ upstream
+    - Entry hết hạn sau TTL giây
+    - PUT/PATCH/POST/DELETE của user đó đi qua forward_request → xóa toàn bộ
+      entry của user (invalidate_user)
+    - Header X-Cache: HIT | MISS | BYPASS cho biết response lấy từ đâu
+
+Lưu ý: cache nằm trong RAM của từng process. Chạy nhiều worker thì
+invalidate chỉ có hiệu lực trong worker nhận request ghi → các worker
+khác có thể trả dữ liệu cũ tối đa TTL giây (giữ TTL ngắn).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+from app.config import Config
+
+# Header không lưu vào cache (gắn với connection hoặc với 1 client cụ thể)
+_UNCACHEABLE_HEADERS = ('set-cookie', 'content-length', 'transfer-encoding', 'connection')
+
+
+class ResponseCache:
+
+    def __init__(self, ttl: float = 30, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()   # (user_id, path) -> (status, headers, body, expires_at)
+        self._user_keys = {}            # user_id -> set các key của user đó
+        self._generations = {}          # user_id -> số lần đã invalidate
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, user_id: str, path: str):
+        """Trả về (status, headers, body) nếu còn hạn, ngược lại None."""
+        key = (user_id, path)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[:3]
+
+    def generation(self, user_id: str) -> int:
+        """Số lần user đã bị invalidate — đọc TRƯỚC khi gọi upstream, truyền lại cho put()."""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, user_id: str, path: str, status: int, headers: list, body: bytes,
+            generation: int = None) -> None:
+        """
+        Lưu response. Nếu user đã bị invalidate kể từ lúc đọc generation
+        (có request ghi chen vào giữa) thì bỏ qua — response có thể đã cũ.
+        """
+        key = (user_id, path)
+        with self._lock:
+            if generation is not None and self._generations.get(user_id, 0) != generation:
+                return
+            self._entries[key] = (status, headers, body, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Xóa mọi entry của user (gọi khi user đó ghi dữ liệu)."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            keys = self._user_keys.pop(user_id, None)
+            if not keys:
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+            self._stats["invalidations"] += 1
+
+    def _remove(self, key) -> None:
+        # Gọi khi đang giữ self._lock
+        self._entries.pop(key, None)
+        keys = self._user_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[0]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        snapshot["ttl"] = self.ttl
+        return snapshot
+
+
+# Cache dùng chung cho các route GET theo user của Gateway
+user_response_cache = ResponseCache(
+    ttl=Config.RESPONSE_CACHE_TTL,
+    max_size=Config.RESPONSE_CACHE_SIZE,
+)
+
+
+def cached_user_get(user_id: str, forward):
+    """
+    Bọc 1 lần forward GET bằng cache theo user.
+
+    Args:
+        user_id: ID user đã xác thực (payload['sub'])
+        forward: Hàm không tham số thực hiện forward_request(...) khi cache miss
+
+    Returns:
+        Flask Response có header X-Cache
+    """
+    if not Config.RESPONSE_CACHE_ENABLED or request.method != 'GET':
+        response = make_response(forward())
+        response.headers['X-Cache'] = 'BYPASS'
+        return response
+
+    path = request.full_path
+    cached = user_response_cache.get(user_id, path)
+    if cached is not None:
+        status, headers, body = cached
+        response = Response(body, status=status, headers=headers)
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    generation = user_response_cache.generation(user_id)
+    response = make_response(forward())
+    # Chỉ cache response thành công, không set cookie (cookie là của riêng phiên đó)
+    # và chưa nén (body nén phụ thuộc Accept-Encoding của từng client)
+    if (response.status_code == 200
+            and 'Set-Cookie' not in response.headers
+            and 'Content-Encoding' not in response.headers):
+        # Đọc hết body stream 1 lần vào list, response vẫn trả về client bình thường
+        response.make_sequence()
+        body = response.get_data()
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _UNCACHEABLE_HEADERS]
+        user_response_cache.put(user_id, path, response.status_code, headers, body, generation)
+    response.headers['X-Cache'] = 'MISS'
+    return response
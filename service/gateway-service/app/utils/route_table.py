@@ -0,0 +1,163 @@
+"""
+route_table.py
+──────────────
+Bảng route khai báo (JSON) cho Gateway, biên dịch lúc khởi động thành prefix trie.
+
+Tại sao cần?
+    Mỗi path proxy cần 1 view Flask viết tay (auth_routes.py, user_routes.py)
+    chỉ để gọi forward_request → thêm service mới (sensor / data) là phải sửa code.
+
+Cách hoạt động:
+    - Mỗi route: prefix path + methods + upstream + yêu cầu xác thực
+    - Lúc khởi động: prefix tách theo "/" và chèn vào trie (mỗi node = 1 segment)
+    - Request vào: đi theo các segment của path, nhớ node sâu nhất có route
+      → prefix DÀI NHẤT khớp thắng, O(số segment của path), không phụ thuộc số route
+    - Phần path sau prefix được nối vào sau "rewrite" rồi gửi tới upstream
+
+Định dạng 1 route (file GATEWAY_ROUTES_FILE, list JSON — mặc định routes.json):
+    {
+        "prefix":   "/api/user/profile",
+        "methods":  ["GET"],                    // bỏ trống → mọi method
+        "upstream": "USER_SERVICE_URL",         // tên thuộc tính Config hoặc URL
+        "rewrite":  "/me",                      // path trên upstream thay cho prefix (mặc định "")
+        "exact":    true,                       // chỉ khớp đúng prefix, không khớp path con
+        "auth":     "user",                     // none | user | admin
+        "cache":    true                        // cache response GET theo user (cần auth)
+    }
+
+Thêm service sensor / data = thêm 1 dòng vào routes.json, không sửa code:
+    {"prefix": "/api/data", "upstream": "DATA_SERVICE_URL", "rewrite": "/api/data", "auth": "user"}
+"""
+
+import json
+from urllib.parse import quote
+
+from app.config import Config
+
+AUTH_LEVELS = ('none', 'user', 'admin')
+
+
+class RouteConfigError(ValueError):
+    """Bảng route sai định dạng — phát hiện ngay lúc khởi động."""
+
+
+class Route:
+
+    __slots__ = ('prefix', 'methods', 'upstream', 'rewrite', 'exact', 'auth', 'cache')
+
+    def __init__(self, prefix: str, upstream: str, methods=None, rewrite: str = '',
+                 exact: bool = False, auth: str = 'none', cache: bool = False):
+        if not prefix.startswith('/'):
+            raise RouteConfigError(f"prefix phải bắt đầu bằng '/': {prefix!r}")
+        if auth not in AUTH_LEVELS:
+            raise RouteConfigError(f"auth không hợp lệ cho {prefix}: {auth!r} (chọn {AUTH_LEVELS})")
+        if cache and auth == 'none':
+            raise RouteConfigError(f"cache cần auth user/admin (cache theo user): {prefix}")
+        self.prefix = '/' + '/'.join(_segments(prefix))
+        self.methods = frozenset(m.upper() for m in methods) if methods else None
+        self.upstream = upstream
+        self.rewrite = rewrite.rstrip('/')
+        self.exact = exact
+        self.auth = auth
+        self.cache = cache
+
+    def allows(self, method: str) -> bool:
+        return self.methods is None or method in self.methods
+
+    def target_path(self, rest: list) -> str:
+        """Path gửi tới upstream: rewrite + phần path còn lại sau prefix."""
+        # request.path đã được decode → encode lại để "%3F", "%2F"... không đổi nghĩa URL upstream
+        return self.rewrite + ''.join('/' + quote(segment, safe='') for segment in rest) or '/'
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> 'Route':
+        try:
+            upstream = entry['upstream']
+            prefix = entry['prefix']
+        except KeyError as e:
+            raise RouteConfigError(f"Route thiếu trường {e}: {entry}")
+        # "USER_SERVICE_URL" → Config.USER_SERVICE_URL (đổi URL qua env như cũ)
+        if not upstream.startswith(('http://', 'https://')):
+            if not hasattr(Config, upstream):
+                raise RouteConfigError(f"Config không có {upstream!r} (route {prefix})")
+            upstream = getattr(Config, upstream)
+        return cls(
+            prefix, upstream,
+            methods=entry.get('methods'),
+            rewrite=entry.get('rewrite', ''),
+            exact=bool(entry.get('exact', False)),
+            auth=entry.get('auth', 'none'),
+            cache=bool(entry.get('cache', False)),
+        )
+
+
+def _segments(path: str) -> list:
+    return [segment for segment in path.split('/') if segment]
+
+
+class _Node:
+
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children = {}
+        self.routes = []
+
+
+class RouteTable:
+
+    def __init__(self, routes: list):
+        self.routes = list(routes)
+        self._root = _Node()
+        for route in self.routes:
+            node = self._root
+            for segment in _segments(route.prefix):
+                node = node.children.setdefault(segment, _Node())
+            for existing in node.routes:
+                if existing.exact == route.exact and (
+                        existing.methods is None or route.methods is None
+                        or existing.methods & route.methods):
+                    raise RouteConfigError(f"Route trùng prefix + method: {route.prefix}")
+            node.routes.append(route)
+
+    def match(self, path: str, method: str):
+        """
+        Returns:
+            (route, rest)  route khớp + các segment còn lại sau prefix
+            (None, True)   có prefix khớp nhưng không route nào nhận method này → 405
+            (None, None)   không khớp → 404
+        """
+        segments = _segments(path)
+        if '..' in segments or '.' in segments:
+            return None, None    # Không cho path thoát khỏi rewrite của route trên upstream
+        candidates = []     # (node, depth) có route, nông → sâu
+        node = self._root
+        if node.routes:
+            candidates.append((node, 0))
+        for depth, segment in enumerate(segments, 1):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.routes:
+                candidates.append((node, depth))
+
+        method_mismatch = False
+        for node, depth in reversed(candidates):
+            exact_hit = depth == len(segments)
+            for route in node.routes:
+                if route.exact and not exact_hit:
+                    continue
+                if route.allows(method):
+                    return route, segments[depth:]
+                method_mismatch = True
+        return None, (True if method_mismatch else None)
+
+
+def load_route_table(path: str = None) -> RouteTable:
+    """Đọc file JSON (mặc định Config.GATEWAY_ROUTES_FILE) và biên dịch thành RouteTable."""
+    path = path or Config.GATEWAY_ROUTES_FILE
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise RouteConfigError(f"{path}: cần 1 list route")
+    return RouteTable([Route.from_dict(entry) for entry in entries])
@@ -0,0 +1,91 @@
+"""
+single_flight.py
+────────────────
+Gộp các request GIỐNG HỆT NHAU đang chạy đồng thời thành 1 lần gọi upstream.
+
+Tại sao cần?
+    Dashboard reload → hàng chục GET giống hệt nhau của cùng 1 user đến
+    Gateway cùng lúc, mỗi cái lại gọi user-service riêng (thundering herd).
+
+Cách hoạt động:
+    - Request đầu tiên với key K là "leader": thực sự gọi fn()
+    - Các request cùng key K đến khi leader chưa xong là "follower":
+      chờ leader rồi dùng CHUNG kết quả (hoặc chung exception)
+    - Leader xong → xóa K, request sau đó lại gọi upstream bình thường
+      (đây KHÔNG phải cache, chỉ gộp các request đang bay)
+
+Cách dùng:
+    result, shared = single_flight.do(key, lambda: fetch(...))
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def do(self, key, fn, timeout: float = None):
+        """
+        Chạy fn() 1 lần cho mỗi key đang bay.
+
+        Args:
+            key:     Hashable xác định request (method, url, identity...)
+            fn:      Hàm không tham số, kết quả phải dùng chung được giữa các thread
+            timeout: Thời gian tối đa follower chờ leader (giây)
+
+        Returns:
+            (result, shared) — shared=True nếu kết quả lấy từ leader khác
+
+        Raises:
+            Exception của fn() (cả leader lẫn follower đều nhận)
+            TimeoutError nếu follower chờ quá timeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._stats["followers"] += 1
+                is_leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                is_leader = True
+
+        if not is_leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Hết thời gian chờ request đang bay cùng key")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["in_flight"] = len(self._calls)
+        return snapshot
@@ -0,0 +1,103 @@
+"""
+token_cache.py
+──────────────
+Cache LRU các access token ĐÃ verify chữ ký, dùng bởi check_user().
+
+Tại sao cần?
+    Cùng 1 access token có thể đến Gateway hàng trăm lần / phút.
+    Mỗi lần jwt.decode() phải verify HMAC-SHA256 + parse claims dù kết quả
+    không đổi cho đến khi token hết hạn.
+
+Cách hoạt động:
+    key   = SHA-256 của token (không giữ token gốc trong RAM)
+    value = payload đã verify + thời điểm hết hạn (claim exp)
+    Entry tự hết hạn đúng lúc token hết hạn → token expired không bao giờ
+    được trả từ cache. Vượt quá max_size → bỏ entry ít dùng nhất (LRU).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+
+    def __init__(self, max_size: int = 10000, max_ttl: float = 300):
+        """
+        Args:
+            max_size: Số token tối đa giữ trong cache
+            max_ttl:  Thời gian tối đa (giây) 1 entry được giữ, kể cả khi exp còn xa
+        """
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()  # digest -> (payload, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str):
+        """Trả về payload nếu token đã verify và chưa hết hạn, ngược lại None."""
+        key = self.digest(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            # Bản sao nông → caller có sửa payload cũng không làm hỏng cache
+            return dict(payload)
+
+    def peek(self, token: str):
+        """Như get() nhưng không tính vào hit/miss và không đổi thứ tự LRU (dùng cho rate limit)."""
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return dict(entry[0])
+
+    def put(self, token: str, payload: dict) -> None:
+        """Lưu payload đã verify, hết hạn tại min(exp, now + max_ttl)."""
+        now = time.time()
+        expires_at = now + self.max_ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= now:
+            return
+
+        key = self.digest(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+        snapshot["max_size"] = self.max_size
+        return snapshot
@@ -0,0 +1,270 @@
+"""
+tracing.py
+──────────
+Distributed tracing tối giản theo chuẩn W3C Trace Context (header traceparent).
+
+Tại sao cần?
+    /api/user/profile đi qua gateway → user-service → auth-service → MySQL.
+    Khi chậm, metrics chỉ cho biết "chậm", không cho biết chậm ở chặng nào.
+
+Cách hoạt động:
+    - Mỗi request vào tạo 1 span SERVER. Có header traceparent → dùng chung
+      trace_id + quyết định sampling của chặng trước; không có → tạo trace mới,
+      sampling theo TRACE_SAMPLE_RATE
+    - Gọi sang service khác → span CLIENT con + gửi traceparent của span đó
+    - Span kết thúc (đã sampled) → đưa vào queue, thread nền ghi theo lô
+      ra file JSON lines hoặc POST tới collector (định dạng Zipkin v2, đọc được
+      bằng Zipkin / Jaeger) → request không phải chờ I/O của tracing
+    - Response có header X-Trace-Id để tra cứu trace từ phía client
+
+Cấu hình (app.config):
+    TRACE_EXPORTER       none | file | http
+    TRACE_SAMPLE_RATE    0.0 - 1.0
+    TRACE_FILE           Đường dẫn file khi exporter = file
+    TRACE_COLLECTOR_URL  VD: http://zipkin:9411/api/v2/spans khi exporter = http
+"""
+
+import json
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+
+from flask import g, has_request_context, request
+
+TRACEPARENT_HEADER = 'traceparent'
+TRACE_ID_RESPONSE_HEADER = 'X-Trace-Id'
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+def _new_trace_id() -> str:
+    return f'{random.getrandbits(128):032x}'
+
+
+def _new_span_id() -> str:
+    return f'{random.getrandbits(64):016x}'
+
+
+def parse_traceparent(value: str):
+    """"00-<trace_id>-<span_id>-<flags>" → (trace_id, span_id, sampled) hoặc None nếu sai định dạng."""
+    match = _TRACEPARENT_RE.match((value or '').strip().lower())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 0x01)
+
+
+class Span:
+
+    __slots__ = ('tracer', 'name', 'kind', 'trace_id', 'span_id', 'parent_id',
+                 'sampled', 'start', 'attributes', 'ended')
+
+    def __init__(self, tracer, name: str, kind: str, trace_id: str, parent_id, sampled: bool):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start = time.time()
+        self.attributes = {}
+        self.ended = False
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = str(value)
+
+    def record_error(self, error: Exception) -> None:
+        self.set_attribute('error', f'{type(error).__name__}: {error}')
+
+    def end(self) -> None:
+        if self.ended:
+            return
+        self.ended = True
+        if self.sampled:
+            self.tracer.export(self, time.time())
+
+
+class _BatchExporter:
+    """Thread nền gom span theo lô rồi ghi ra ngoài. Queue đầy → bỏ span (không chặn request)."""
+
+    def __init__(self, logger, max_queue: int = 10000, batch_size: int = 200, flush_interval: float = 1.0):
+        self.logger = logger    # app.logger — thread nền không có app context
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        threading.Thread(target=self._run, name='trace-exporter', daemon=True).start()
+
+    def submit(self, record: dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                self.logger.warning(f"[Tracing] Không ghi được {len(batch)} span: {e}")
+
+    def write(self, batch: list) -> None:
+        raise NotImplementedError
+
+
+class FileExporter(_BatchExporter):
+
+    def __init__(self, path: str, logger):
+        self.path = path
+        super().__init__(logger)
+
+    def write(self, batch: list) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in batch:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class HttpExporter(_BatchExporter):
+
+    def __init__(self, url: str, logger, timeout: float = 2.0):
+        self.url = url
+        self.timeout = timeout
+        super().__init__(logger)
+
+    def write(self, batch: list) -> None:
+        body = json.dumps(batch).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class Tracer:
+
+    def __init__(self, service_name: str, sample_rate: float, exporter):
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def start_span(self, name: str, kind: str, parent=None) -> Span:
+        """
+        Args:
+            parent: Span cha, hoặc tuple (trace_id, span_id, sampled) từ traceparent,
+                    None → bắt đầu trace mới
+        """
+        if isinstance(parent, Span):
+            return Span(self, name, kind, parent.trace_id, parent.span_id, parent.sampled)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            return Span(self, name, kind, trace_id, parent_id, sampled)
+        sampled = random.random() < self.sample_rate
+        return Span(self, name, kind, _new_trace_id(), None, sampled)
+
+    def export(self, span: Span, end: float) -> None:
+        if self.exporter is None:
+            return
+        # Định dạng Zipkin v2 (timestamp / duration tính bằng micro giây)
+        record = {
+            'traceId': span.trace_id,
+            'id': span.span_id,
+            'name': span.name,
+            'kind': span.kind,
+            'timestamp': int(span.start * 1_000_000),
+            'duration': max(1, int((end - span.start) * 1_000_000)),
+            'localEndpoint': {'serviceName': self.service_name},
+            'tags': span.attributes,
+        }
+        if span.parent_id:
+            record['parentId'] = span.parent_id
+        self.exporter.submit(record)
+
+
+# Khởi tạo trong register_tracing()
+tracer = None
+
+
+def current_span():
+    """Span SERVER của request hiện tại (None nếu ngoài request / chưa bật tracing)."""
+    if tracer is None or not has_request_context():
+        return None
+    return g.get('trace_span')
+
+
+def start_client_span(name: str):
+    """Span CLIENT con của request hiện tại cho 1 lần gọi ra ngoài, None nếu không có trace."""
+    parent = current_span()
+    if parent is None:
+        return None
+    return tracer.start_span(name, 'CLIENT', parent)
+
+
+def inject_trace_headers(headers: dict, span) -> None:
+    """Gắn traceparent của span vào header gửi đi (span None → không làm gì)."""
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent
+
+
+def _start_server_span():
+    parent = parse_traceparent(request.headers.get(TRACEPARENT_HEADER))
+    rule = g.get('route_label') or (request.url_rule.rule if request.url_rule is not None else request.path)
+    span = tracer.start_span(f'{request.method} {rule}', 'SERVER', parent)
+    span.set_attribute('http.method', request.method)
+    span.set_attribute('http.path', request.path)
+    g.trace_span = span
+
+
+def _end_server_span(response):
+    span = g.pop('trace_span', None)
+    if span is not None:
+        span.set_attribute('http.status_code', response.status_code)
+        response.headers[TRACE_ID_RESPONSE_HEADER] = span.trace_id
+        span.end()
+    return response
+
+
+def _create_exporter(app):
+    config = app.config
+    kind = str(config.get('TRACE_EXPORTER', 'none')).lower()
+    if kind == 'file':
+        return FileExporter(config.get('TRACE_FILE', 'traces.jsonl'), app.logger)
+    if kind == 'http' and config.get('TRACE_COLLECTOR_URL'):
+        return HttpExporter(config['TRACE_COLLECTOR_URL'], app.logger)
+    return None
+
+
+def register_tracing(app, service_name: str) -> None:
+    """
+    Bật tracing cho app. Gọi trong create_app(), TRƯỚC các before_request khác
+    để span bao trọn cả request.
+    Exporter = none → vẫn truyền traceparent (kèm quyết định sampling) / X-Trace-Id
+    nhưng không ghi span nào.
+    """
+    global tracer
+    if tracer is None:
+        tracer = Tracer(
+            service_name,
+            float(app.config.get('TRACE_SAMPLE_RATE', 0.1)),
+            _create_exporter(app),
+        )
+    app.before_request(_start_server_span)
+    app.after_request(_end_server_span)
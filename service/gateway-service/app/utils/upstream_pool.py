@@ -0,0 +1,297 @@
+"""
+upstream_pool.py
+────────────────
+Connection pool keep-alive cho các upstream service (auth-service, user-service...).
+
+Tại sao cần?
+    requests.request(...) ở module-level tạo Session mới cho MỖI lần gọi
+    → mỗi request proxy phải mở TCP connection mới rồi đóng ngay.
+    Khi login burst, thời gian connect + cạn ephemeral port chiếm phần lớn
+    latency của Gateway.
+
+    UpstreamPool giữ 1 requests.Session / upstream với HTTPAdapter có pool
+    connection keep-alive → các request sau tái sử dụng connection cũ.
+
+    Mỗi pool có thêm circuit breaker + bulkhead (xem circuit_breaker.py):
+    upstream chết / quá tải → pool.request() raise UpstreamRejectedError
+    ngay lập tức, không mở connection.
+
+Cách dùng:
+    pool = get_upstream_pool(Config.USER_SERVICE_URL)
+    resp = pool.request("GET", url, headers=...)
+"""
+
+import threading
+import time
+from collections import deque
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import Config
+from app.utils.circuit_breaker import Bulkhead, CircuitBreaker, UpstreamRejectedError
+from app.utils.metrics import REGISTRY, UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+# Status upstream trả về khi chính nó đang sập / quá tải → tính là lỗi cho circuit breaker.
+# 500 thường là lỗi logic của 1 endpoint nên không làm mở circuit cả service.
+BREAKER_FAILURE_STATUSES = (502, 503, 504)
+
+
+class LatencyWindow:
+    """Giữ N mẫu latency gần nhất (giây) để tính percentile (dùng cho hedging)."""
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, p: float):
+        """Percentile p (0-100) của cửa sổ hiện tại, None nếu chưa có mẫu."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p / 100 * len(samples))) - 1))
+        return samples[index]
+
+
+class UpstreamPool:
+    """
+    Pool connection cho 1 upstream (xác định bởi scheme + host + port).
+
+    Metrics:
+        requests        Tổng số request đã gửi
+        errors          Số request lỗi (connect error, timeout...)
+        in_flight       Số request đang chờ phản hồi
+        peak_in_flight  Số request đồng thời cao nhất từng ghi nhận
+        pool_exhausted  Số lần request đến khi pool đã dùng hết connection
+                        (request đó phải chờ hoặc mở connection ngoài pool)
+        rejected        Số request bị circuit breaker / bulkhead từ chối
+    """
+
+    def __init__(self, base_url: str, pool_size: int = None,
+                 connect_timeout: float = None, read_timeout: float = None,
+                 pool_block: bool = None):
+        self.base_url = base_url
+        self.pool_size = pool_size or Config.UPSTREAM_POOL_SIZE
+        self.connect_timeout = connect_timeout or Config.UPSTREAM_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.UPSTREAM_READ_TIMEOUT
+        self.pool_block = Config.UPSTREAM_POOL_BLOCK if pool_block is None else pool_block
+
+        self.session = requests.Session()
+        # Gateway tự quyết định header gửi đi, không để Session thêm mặc định
+        self.session.headers.clear()
+        # Không đọc proxy từ biến môi trường — tránh lookup env mỗi request
+        self.session.trust_env = False
+        # Session dùng chung cho MỌI user → tuyệt đối không lưu cookie từ response,
+        # nếu không cookie của user A sẽ bị gửi kèm request của user B
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = HTTPAdapter(
+            pool_connections=1,          # 1 host / pool
+            pool_maxsize=self.pool_size,
+            pool_block=self.pool_block,  # True: chờ connection rảnh thay vì mở thêm
+            max_retries=0,               # Không tự retry (POST không idempotent)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.breaker = CircuitBreaker(
+            base_url,
+            failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=Config.BREAKER_RECOVERY_TIMEOUT,
+            half_open_max_calls=Config.BREAKER_HALF_OPEN_MAX_CALLS,
+        )
+        # Latency tới lúc nhận xong headers của các request thành công
+        self.latency = LatencyWindow(Config.LATENCY_WINDOW_SIZE)
+
+        # Bulkhead chỉ giữ slot đến khi nhận xong status + headers;
+        # body stream về client sau đó không còn chiếm slot
+        self.bulkhead = Bulkhead(base_url, Config.BULKHEAD_MAX_CONCURRENT)
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "pool_exhausted": 0,
+            "rejected": 0,
+        }
+
+    @property
+    def in_flight(self) -> int:
+        """Số request đang chờ upstream trả lời (dùng cho least-outstanding)."""
+        with self._lock:
+            return self._stats["in_flight"]
+
+    @property
+    def timeout(self) -> tuple:
+        """(connect_timeout, read_timeout) truyền cho requests."""
+        return (self.connect_timeout, self.read_timeout)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Gửi request qua Session đã pool.
+
+        Nhận các tham số giống requests.request(); nếu không truyền
+        timeout thì dùng (connect_timeout, read_timeout) của pool.
+
+        Raises:
+            CircuitOpenError / BulkheadFullError (UpstreamRejectedError) — không gửi request
+            requests.exceptions.RequestException — lỗi kết nối / timeout
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        # Fail-fast: kiểm tra circuit + bulkhead TRƯỚC khi chạm network
+        try:
+            probe = self.breaker.before_call()
+            try:
+                self.bulkhead.acquire()
+            except UpstreamRejectedError:
+                self.breaker.release(probe)
+                raise
+        except UpstreamRejectedError as e:
+            UPSTREAM_ERRORS.inc(self.base_url, type(e).__name__)
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise
+
+        with self._lock:
+            self._stats["requests"] += 1
+            if self._stats["in_flight"] >= self.pool_size:
+                self._stats["pool_exhausted"] += 1
+            self._stats["in_flight"] += 1
+            if self._stats["in_flight"] > self._stats["peak_in_flight"]:
+                self._stats["peak_in_flight"] = self._stats["in_flight"]
+
+        started = time.perf_counter()
+        try:
+            resp = self.session.request(method=method, url=url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            UPSTREAM_ERRORS.inc(self.base_url, _error_kind(e))
+            self.breaker.on_failure(probe)
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            self.bulkhead.release()
+            with self._lock:
+                self._stats["in_flight"] -= 1
+
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.observe(elapsed, self.base_url, method, str(resp.status_code))
+        if resp.status_code in BREAKER_FAILURE_STATUSES:
+            self.breaker.on_failure(probe)
+        else:
+            self.breaker.on_success(probe)
+            self.latency.record(elapsed)
+        return resp
+
+    def stats(self) -> dict:
+        """Snapshot metrics của pool (dùng cho endpoint quản trị)."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot.update({
+            "base_url": self.base_url,
+            "pool_size": self.pool_size,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "pool_block": self.pool_block,
+            "latency_p50_ms": _ms(self.latency.percentile(50)),
+            "latency_p99_ms": _ms(self.latency.percentile(99)),
+        })
+        return snapshot
+
+
+def _error_kind(error) -> str:
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    return "other"
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+# ─────────────────────────────────────────────────────────────
+# REGISTRY — 1 pool / upstream, dùng chung cho mọi thread
+# ─────────────────────────────────────────────────────────────
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(service_url: str) -> str:
+    """http://localhost:5001/api/auth → http://localhost:5001"""
+    parts = urlsplit(service_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_upstream_pool(service_url: str) -> UpstreamPool:
+    """Lấy (hoặc tạo) pool cho upstream chứa service_url."""
+    key = _pool_key(service_url)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = UpstreamPool(key)
+                _pools[key] = pool
+    return pool
+
+
+def init_upstream_pools() -> None:
+    """Tạo sẵn pool cho các upstream khai báo trong Config (gọi trong create_app)."""
+    for service_url in (*Config.AUTH_SERVICE_INSTANCES, *Config.USER_SERVICE_INSTANCES,
+                        *Config.DATA_SERVICE_INSTANCES):
+        get_upstream_pool(service_url)
+
+
+def get_pool_stats() -> dict:
+    """Metrics của tất cả pool, key = base URL upstream."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.base_url: pool.stats() for pool in pools}
+
+
+def get_breaker_stats() -> dict:
+    """Trạng thái circuit breaker + bulkhead của tất cả upstream."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {
+        pool.base_url: {
+            "breaker": pool.breaker.stats(),
+            "bulkhead": pool.bulkhead.stats(),
+        }
+        for pool in pools
+    }
+
+
+# Gauge đọc lúc scrape /metrics (xem app/utils/metrics.py)
+_BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _all_pools() -> list:
+    with _pools_lock:
+        return list(_pools.values())
+
+
+REGISTRY.gauge_callback(
+    'upstream_in_flight', 'Request đang chờ upstream trả lời', ('upstream',),
+    lambda: [((p.base_url,), p.in_flight) for p in _all_pools()],
+)
+REGISTRY.gauge_callback(
+    'upstream_circuit_state', 'Trạng thái circuit breaker: 0=closed, 1=half_open, 2=open', ('upstream',),
+    lambda: [((p.base_url,), _BREAKER_STATE_VALUES[p.breaker.state]) for p in _all_pools()],
+)
@@ -0,0 +1,145 @@
+"""
+bench_async_vs_sync.py
+──────────────────────
+So sánh throughput Gateway: chế độ sync (gunicorn sync workers, như Dockerfile
+của các service) và chế độ async (run_async.py, gevent).
+
+Kịch bản:
+    - 2 stub upstream (auth, user) trả lời sau --latency-ms
+    - Gateway trỏ vào stub qua AUTH_SERVICE_URL / USER_SERVICE_URL
+    - --concurrency client bắn liên tục POST /api/auth/login trong --duration giây
+
+Cách chạy (từ thư mục gateway-service):
+    python benchmarks/bench_async_vs_sync.py --latency-ms 100 --concurrency 200
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB = os.path.join(GATEWAY_DIR, "benchmarks", "stub_upstream.py")
+
+# Tắt các thành phần làm sai lệch số đo (như bench_gateway.py): rate limit login
+# mặc định chỉ 0.2 req/s → không tắt thì bench chỉ đo tốc độ trả 429
+DEFAULT_GATEWAY_ENV = {
+    "RATE_LIMIT_ENABLED": "false",
+    "HEALTH_CHECK_ENABLED": "false",
+    "OUTBOX_WORKER_ENABLED": "false",
+}
+
+
+def _wait_port(url: str, timeout: float = 15.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=0.5)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} không khởi động được")
+
+
+def _start_gateway(mode: str, port: int, env: dict, sync_workers: int) -> subprocess.Popen:
+    if mode == "sync":
+        cmd = [sys.executable, "-m", "gunicorn", "-w", str(sync_workers),
+               "-b", f"127.0.0.1:{port}", "--log-level", "warning", "run:app"]
+    else:
+        cmd = [sys.executable, "run_async.py"]
+        env = dict(env, GATEWAY_PORT=str(port))
+    return subprocess.Popen(cmd, cwd=GATEWAY_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _drive(url: str, concurrency: int, duration: float) -> dict:
+    """Mỗi client lặp POST url đến hết duration, trả về rps + latency (không phải 2xx = lỗi)."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local, local_errors = [], 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                resp = session.post(url, json={"username": "bench", "password": "x"}, timeout=30)
+                if not 200 <= resp.status_code < 300:
+                    local_errors += 1
+            except requests.exceptions.RequestException:
+                local_errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pick(0.50), 2),
+        "p99_ms": round(pick(0.99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Gateway sync vs async")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Độ trễ của stub upstream")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="Giây / chế độ")
+    parser.add_argument("--sync-workers", type=int, default=2, help="Số gunicorn sync worker")
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    auth_port, user_port, gateway_port = 15001, 15002, 15000
+    stubs = [
+        subprocess.Popen([sys.executable, STUB, "--port", str(p), "--latency-ms", str(args.latency_ms)])
+        for p in (auth_port, user_port)
+    ]
+    env = dict(
+        os.environ,
+        **DEFAULT_GATEWAY_ENV,
+        AUTH_SERVICE_URL=f"http://127.0.0.1:{auth_port}/api/auth",
+        USER_SERVICE_URL=f"http://127.0.0.1:{user_port}/api/user",
+    )
+
+    results = {}
+    try:
+        _wait_port(f"http://127.0.0.1:{auth_port}/")
+        _wait_port(f"http://127.0.0.1:{user_port}/")
+
+        for mode in args.modes.split(","):
+            gateway = _start_gateway(mode, gateway_port, env, args.sync_workers)
+            try:
+                _wait_port(f"http://127.0.0.1:{gateway_port}/")
+                results[mode] = _drive(f"http://127.0.0.1:{gateway_port}/api/auth/login",
+                                       args.concurrency, args.duration)
+            finally:
+                gateway.terminate()
+                gateway.wait()
+    finally:
+        for stub in stubs:
+            stub.terminate()
+
+    print(f"upstream latency={args.latency_ms}ms concurrency={args.concurrency} duration={args.duration}s")
+    for mode, r in results.items():
+        print(f"  {mode:<6} rps={r['rps']:<8} p50={r['p50_ms']}ms p99={r['p99_ms']}ms "
+              f"requests={r['requests']} errors={r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
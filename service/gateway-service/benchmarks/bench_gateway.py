@@ -0,0 +1,361 @@
+"""
+bench_gateway.py
+────────────────
+Load test Gateway (create_app() thật) với upstream giả lập chạy local.
+
+Tại sao cần?
+    Chưa có cách đo throughput / latency đuôi của Gateway trước khi deploy:
+    bật thêm 1 tính năng (nén, access log, rate limit...) không biết p99 đổi bao nhiêu.
+
+Cách hoạt động:
+    - Process 1: stub auth-service + user-service (werkzeug threaded), latency giả lập
+      = --latency-ms ± --jitter-ms, --error-rate tỉ lệ request trả 500.
+      Stub login ký JWT thật bằng SECRET_KEY của Gateway → check_user chạy đủ đường verify
+    - Process 2: Gateway create_app() trên werkzeug threaded, trỏ AUTH_SERVICE_URL /
+      USER_SERVICE_URL sang stub. Rate limit / health check / outbox worker / access log
+      tắt mặc định (bật lại bằng --env KEY=VALUE)
+    - Process chính: --concurrency worker, mỗi worker 1 user + 1 Session keep-alive lặp
+      kịch bản login → profile × --profiles-per-login → logout trong --duration giây
+      (bỏ --warmup giây đầu)
+    - Process tách riêng → client, Gateway, stub không tranh nhau GIL
+
+Kết quả:
+    - Bảng p50 / p95 / p99 / req/s / lỗi theo route + tổng, mỗi mức concurrency 1 bảng
+    - JSON (--output, mặc định benchmarks/results/gateway-<thời gian>.json) gồm cấu hình,
+      commit git, môi trường chạy → so sánh giữa các lần chạy:
+        python benchmarks/bench_gateway.py --compare benchmarks/results/gateway-A.json
+
+Cách chạy (từ thư mục gateway-service, không cần service thật):
+    python benchmarks/bench_gateway.py --concurrency 8 32 --duration 15
+    python benchmarks/bench_gateway.py --latency-ms 20 --jitter-ms 10 --error-rate 0.01
+    python benchmarks/bench_gateway.py --env RESPONSE_CACHE_ENABLED=false --env ACCESS_LOG_LEVEL=all
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(GATEWAY_DIR, 'benchmarks', 'results')
+
+# SECRET_KEY của Gateway (app/config.py) — stub login ký access token bằng key này
+GATEWAY_SECRET_KEY = 'SECRET_KEY'
+
+# Tắt các thành phần làm sai lệch số đo (bật lại bằng --env)
+DEFAULT_GATEWAY_ENV = {
+    'RATE_LIMIT_ENABLED': 'false',
+    'HEALTH_CHECK_ENABLED': 'false',
+    'OUTBOX_WORKER_ENABLED': 'false',
+    'ACCESS_LOG_LEVEL': 'off',
+    'TRACE_EXPORTER': 'none',
+}
+
+ROUTES = ('login', 'profile', 'logout')
+PERCENTILES = (50, 95, 99)
+
+
+# ─────────────────────────────────────────────────────────────
+# UPSTREAM GIẢ LẬP
+# ─────────────────────────────────────────────────────────────
+
+def _stub_app(latency_ms: float, jitter_ms: float, error_rate: float):
+    import jwt
+    from flask import Flask, jsonify, request
+
+    app = Flask('bench-stub')
+
+    @app.before_request
+    def simulate():
+        delay = max(0.0, random.gauss(latency_ms, jitter_ms) if jitter_ms else latency_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        if error_rate and random.random() < error_rate:
+            return jsonify({"success": False, "error": {"code": "STUB_ERROR", "message": "lỗi giả lập"}}), 500
+        return None
+
+    @app.route('/api/auth/login', methods=['POST'])
+    def login():
+        body = request.get_json(silent=True) or {}
+        user_id = str(body.get('username', 'bench'))
+        token = jwt.encode(
+            {'sub': user_id, 'type': 'access', 'role': 'user', 'exp': int(time.time()) + 3600},
+            GATEWAY_SECRET_KEY, algorithm='HS256')
+        response = jsonify({"success": True, "data": {"access_token": token}})
+        response.set_cookie('access_token_cookie', token, httponly=True)
+        return response
+
+    @app.route('/api/auth/logout', methods=['POST'])
+    def logout():
+        response = jsonify({"success": True, "message": "Đăng xuất thành công."})
+        response.delete_cookie('access_token_cookie')
+        return response
+
+    # GET /api/user/profile của Gateway → user-service /api/user/me (routes.json)
+    @app.route('/api/user/me', methods=['GET'])
+    def profile():
+        user_id = request.headers.get('X-User-ID', '0')
+        return jsonify({"success": True, "data": {
+            "id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+            "full_name": "Bench User", "phone": "0900000000", "role": "user",
+        }})
+
+    @app.route('/api/auth/health')
+    @app.route('/health')
+    def health():
+        return jsonify({"status": "ok"})
+
+    return app
+
+
+def _quiet_werkzeug() -> None:
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+
+def _serve_stub(ready, latency_ms: float, jitter_ms: float, error_rate: float) -> None:
+    from werkzeug.serving import make_server
+
+    _quiet_werkzeug()
+    server = make_server('127.0.0.1', 0, _stub_app(latency_ms, jitter_ms, error_rate), threaded=True)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def _serve_gateway(ready, env: dict) -> None:
+    # Config đọc biến môi trường lúc import → gán env TRƯỚC khi import app
+    os.environ.update(env)
+    os.chdir(GATEWAY_DIR)
+    sys.path.insert(0, GATEWAY_DIR)
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    _quiet_werkzeug()
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def _start(target, *args) -> tuple:
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=target, args=(ready, *args), daemon=True)
+    process.start()
+    return process, ready.get(timeout=60)
+
+
+# ─────────────────────────────────────────────────────────────
+# TẠO TẢI
+# ─────────────────────────────────────────────────────────────
+
+class _Recorder:
+    """Latency (ms) + số lỗi theo route của 1 worker — không khóa, gộp lại sau khi chạy xong."""
+
+    def __init__(self):
+        self.latencies = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+
+
+def _worker(base_url: str, worker_id: int, profiles_per_login: int, measure_from: float,
+            stop_at: float, recorder: _Recorder) -> None:
+    import requests
+
+    session = requests.Session()
+
+    def call(route: str, method: str, path: str, **kwargs) -> None:
+        started = time.perf_counter()
+        try:
+            ok = session.request(method, base_url + path, timeout=10, **kwargs).status_code < 400
+        except requests.RequestException:
+            ok = False
+        if started >= measure_from:
+            recorder.latencies[route].append((time.perf_counter() - started) * 1000)
+            if not ok:
+                recorder.errors[route] += 1
+
+    credentials = {'username': f'{worker_id + 1}', 'password': 'bench-password'}
+    while time.perf_counter() < stop_at:
+        call('login', 'POST', '/api/auth/login', json=credentials)
+        for _ in range(profiles_per_login):
+            call('profile', 'GET', '/api/user/profile')
+        call('logout', 'POST', '/api/auth/logout')
+
+
+def _percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile trên list đã sắp xếp."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * p / 100))
+    return sorted_values[rank - 1]
+
+
+def _summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    summary = {
+        "requests": len(values),
+        "errors": errors,
+        "error_rate": round(errors / len(values), 4) if values else 0.0,
+        "rps": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "max_ms": round(values[-1], 2) if values else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(_percentile(values, p), 2)
+    return summary
+
+
+def run_load(base_url: str, concurrency: int, duration: float, warmup: float,
+             profiles_per_login: int) -> dict:
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    recorders = [_Recorder() for _ in range(concurrency)]
+    threads = [
+        threading.Thread(target=_worker, args=(base_url, i, profiles_per_login, measure_from, stop_at, recorders[i]),
+                         daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Request cuối có thể kết thúc sau stop_at → tính theo thời điểm worker cuối dừng
+    elapsed = time.perf_counter() - measure_from
+
+    routes = {}
+    all_latencies, all_errors = [], 0
+    for route in ROUTES:
+        latencies = [ms for r in recorders for ms in r.latencies[route]]
+        errors = sum(r.errors[route] for r in recorders)
+        routes[route] = _summarize(latencies, errors, elapsed)
+        all_latencies.extend(latencies)
+        all_errors += errors
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "total": _summarize(all_latencies, all_errors, elapsed),
+        "routes": routes,
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# BÁO CÁO
+# ─────────────────────────────────────────────────────────────
+
+def _print_run(run: dict, baseline: dict = None) -> None:
+    print(f"\nconcurrency={run['concurrency']}  ({run['duration_s']}s)")
+    print(f"  {'route':<8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'lỗi':>7}")
+    rows = [(route, run['routes'][route], (baseline or {}).get('routes', {}).get(route)) for route in ROUTES]
+    rows.append(('total', run['total'], (baseline or {}).get('total')))
+    for name, stats, base in rows:
+        print(f"  {name:<8} {stats['rps']:>9.1f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+              f"{stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f} {stats['errors']:>7}")
+        if base:
+            deltas = [_delta(stats[key], base[key]) for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')]
+            print(f"  {'  vs cũ':<8} " + ' '.join(f"{d:>{w}}" for d, w in zip(deltas, (9, 8, 8, 8, 8))))
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return '-'
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=GATEWAY_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _parse_env(items: list) -> dict:
+    env = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep or not key:
+            raise SystemExit(f"--env phải có dạng KEY=VALUE: {item!r}")
+        env[key] = value
+    return env
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16],
+                        help='Số worker chạy đồng thời (nhiều giá trị → chạy lần lượt từng mức)')
+    parser.add_argument('--duration', type=float, default=10, help='Giây đo cho mỗi mức concurrency')
+    parser.add_argument('--warmup', type=float, default=2, help='Giây chạy trước khi bắt đầu đo')
+    parser.add_argument('--profiles-per-login', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=5, help='Latency trung bình của stub')
+    parser.add_argument('--jitter-ms', type=float, default=1, help='Độ lệch chuẩn latency của stub')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Tỉ lệ request stub trả 500')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Biến môi trường cho Gateway (VD: RESPONSE_CACHE_ENABLED=false)')
+    parser.add_argument('--output', help='File JSON kết quả (mặc định benchmarks/results/gateway-<thời gian>.json)')
+    parser.add_argument('--compare', help='File JSON của lần chạy trước để so sánh')
+    args = parser.parse_args()
+
+    baseline_runs = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline_runs = {run['concurrency']: run for run in json.load(f)['runs']}
+
+    stub_process, stub_port = _start(_serve_stub, args.latency_ms, args.jitter_ms, args.error_rate)
+    stub_url = f'http://127.0.0.1:{stub_port}'
+    saga_dir = tempfile.mkdtemp(prefix='bench-gateway-')
+    gateway_env = {
+        **DEFAULT_GATEWAY_ENV,
+        'AUTH_SERVICE_URL': f'{stub_url}/api/auth',
+        'USER_SERVICE_URL': f'{stub_url}/api/user',
+        'SAGA_DB_PATH': os.path.join(saga_dir, 'saga.sqlite3'),
+        **_parse_env(args.env),
+    }
+    gateway_process, gateway_port = _start(_serve_gateway, gateway_env)
+    base_url = f'http://127.0.0.1:{gateway_port}'
+
+    try:
+        runs = []
+        for concurrency in args.concurrency:
+            run = run_load(base_url, concurrency, args.duration, args.warmup, args.profiles_per_login)
+            _print_run(run, baseline_runs.get(concurrency))
+            runs.append(run)
+    finally:
+        gateway_process.terminate()
+        stub_process.terminate()
+
+    result = {
+        "benchmark": "gateway",
+        "started_at": datetime.now().isoformat(timespec='seconds'),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "profiles_per_login": args.profiles_per_login,
+            "stub_latency_ms": args.latency_ms,
+            "stub_jitter_ms": args.jitter_ms,
+            "stub_error_rate": args.error_rate,
+            "gateway_env": {k: v for k, v in gateway_env.items() if k != 'SAGA_DB_PATH'},
+        },
+        "runs": runs,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"gateway-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nĐã lưu kết quả: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+bench_route_table.py
+────────────────────
+Đo chi phí tìm route của bảng route (prefix trie, app/utils/route_table.py) so với:
+    - werkzeug Map (cách Flask khớp view viết tay: mỗi route 1 rule)
+    - quét tuần tự list regex (cách "đơn giản" hay gặp ở proxy tự viết)
+
+Kịch bản:
+    - routes.json + N route giả /api/svc<i>/... để xem chi phí tăng theo số route
+    - Mỗi lần đo: khớp lần lượt 1 tập path cố định (trúng route thật, trúng route
+      giả cuối bảng, và không khớp) --iterations lần, in ns / lần khớp
+
+Cách chạy (từ thư mục gateway-service, không cần upstream):
+    python benchmarks/bench_route_table.py --routes 10 100 1000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GATEWAY_DIR)
+
+from werkzeug.exceptions import MethodNotAllowed, NotFound  # noqa: E402
+from werkzeug.routing import Map, Rule  # noqa: E402
+
+from app.utils.route_table import Route, RouteTable, load_route_table  # noqa: E402
+
+
+def _build_routes(extra: int) -> list:
+    routes = list(load_route_table().routes)
+    for i in range(extra):
+        routes.append(Route(f'/api/svc{i}/items', 'http://localhost:6000', methods=['GET']))
+    return routes
+
+
+def _bench(name: str, match, paths: list, iterations: int) -> None:
+    for path, method in paths:  # warm-up
+        match(path, method)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for path, method in paths:
+            match(path, method)
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<12} {elapsed / (iterations * len(paths)) * 1e9:8.0f} ns / lần khớp")
+
+
+def _werkzeug_matcher(routes: list):
+    rules = []
+    for index, route in enumerate(routes):
+        methods = sorted(route.methods) if route.methods else None
+        rules.append(Rule(route.prefix, endpoint=index, methods=methods))
+        if not route.exact:
+            rules.append(Rule(route.prefix + '/<path:rest>', endpoint=index, methods=methods))
+    adapter = Map(rules).bind('gateway')
+
+    def match(path, method):
+        try:
+            return adapter.match(path, method)
+        except (NotFound, MethodNotAllowed):
+            return None
+    return match
+
+
+def _regex_matcher(routes: list):
+    # Prefix dài trước để giữ quy tắc "prefix dài nhất thắng"
+    compiled = sorted(
+        ((re.compile(re.escape(r.prefix) + ('$' if r.exact else '(/.*)?$')), r) for r in routes),
+        key=lambda item: -len(item[1].prefix),
+    )
+
+    def match(path, method):
+        for pattern, route in compiled:
+            if pattern.match(path) and route.allows(method):
+                return route
+        return None
+    return match
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--routes', type=int, nargs='+', default=[0, 100, 1000],
+                        help='Số route giả thêm vào bảng')
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    for extra in args.routes:
+        routes = _build_routes(extra)
+        paths = [
+            ('/api/auth/login', 'POST'),
+            ('/api/user/profile', 'GET'),
+            (f'/api/svc{max(extra - 1, 0)}/items/42', 'GET'),
+            ('/api/unknown/path', 'GET'),
+        ]
+        print(f"{len(routes)} route:")
+        _bench('trie', RouteTable(routes).match, paths, args.iterations)
+        _bench('werkzeug', _werkzeug_matcher(routes), paths, args.iterations)
+        _bench('regex list', _regex_matcher(routes), paths, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+stub_upstream.py
+────────────────
+Upstream giả (thay cho auth-service / user-service) dùng khi benchmark Gateway.
+
+Trả JSON cho MỌI path sau một độ trễ cấu hình được, chạy trên gevent nên
+bản thân stub không bao giờ là nút thắt cổ chai.
+
+Cách chạy:
+    python benchmarks/stub_upstream.py --port 5001 --latency-ms 50
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import json
+
+import gevent
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+
+def make_stub_app(latency_ms: float = 0.0):
+    """WSGI app tối giản: ngủ latency_ms rồi trả {"success": true, "path": ...}."""
+
+    def app(environ, start_response):
+        # Đọc hết body để connection keep-alive dùng lại được
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        if length:
+            environ["wsgi.input"].read(length)
+
+        if latency_ms:
+            gevent.sleep(latency_ms / 1000.0)
+
+        body = json.dumps({"success": True, "path": environ.get("PATH_INFO")}).encode("utf-8")
+        start_response("200 OK", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+        ])
+        return [body]
+
+    return app
+
+
+def serve(port: int, latency_ms: float = 0.0) -> None:
+    server = WSGIServer(("127.0.0.1", port), make_stub_app(latency_ms), spawn=Pool(10000), log=None)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub upstream cho benchmark Gateway")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    serve(args.port, args.latency_ms)
@@ -0,0 +1,43 @@
+# backend\gateway-service\run_async.py
+"""
+Chạy Gateway ở chế độ bất đồng bộ (event loop gevent).
+
+Khác gì run.py?
+    run.py / gunicorn sync: mỗi worker thread bị block suốt thời gian
+    chờ upstream trả lời (tối đa UPSTREAM_READ_TIMEOUT) → user-service chậm
+    là chiếm hết worker.
+
+    run_async.py: monkey-patch socket → mọi I/O (requests, pool keep-alive)
+    trở thành non-blocking, mỗi request proxy là 1 greenlet rẻ.
+    Cùng bảng route (routes.json) và forward_request,
+    1 process giữ được hàng nghìn request đang chờ upstream.
+
+Cách chạy:
+    python run_async.py
+    # hoặc với gunicorn:
+    gunicorn -k gevent --worker-connections 2000 -b 0.0.0.0:5000 run:app
+"""
+from gevent import monkey
+
+# PHẢI patch trước khi import requests/urllib3/socket
+monkey.patch_all()
+
+import os
+
+# Nhiều request đồng thời hơn → cần nhiều connection keep-alive hơn / upstream
+os.environ.setdefault('UPSTREAM_POOL_SIZE', '200')
+
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+from app import create_app
+
+app = create_app()
+
+if __name__ == "__main__":
+    port = int(os.getenv('GATEWAY_PORT', 5000))
+    # Giới hạn số greenlet (connection client) đồng thời để tránh cạn RAM/FD
+    max_connections = int(os.getenv('GATEWAY_ASYNC_MAX_CONNECTIONS', 2000))
+
+    print(f"🚀 Gateway (async/gevent) running on port {port} [max {max_connections} connections]")
+    server = WSGIServer(("0.0.0.0", port), app, spawn=Pool(max_connections), log=None)
+    server.serve_forever()
@@ -1,7 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
-
-db = SQLAlchemy()
-jwt = JWTManager()
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
+
+db = SQLAlchemy()
+jwt = JWTManager()
 migrate = Migrate()
\ No newline at end of file
@@ -1,64 +1,104 @@
-import requests
-from functools import wraps
-from flask import request, jsonify, g
-from flask_jwt_extended import get_jwt
-
-def validate_token_with_auth_service(token: str) -> dict:
-    """
-    Gọi auth-service endpoint POST api/auth/validate-token
-    để xác thực token của user có hợp lệ hay không.
-    returns:
-        {
-            "valid": True/False,
-            "user_id": 123,
-            "username": "john_doe",
-            "roles": ["admin", "user"]
-        }
-    """
-    auth_service_url = "http://auth-service:5001/api/auth/validate-token"
-    headers = {"Authorization": f"Bearer {token}"}
-    try:
-        response = requests.get(auth_service_url, headers=headers, timeout=5)
-        if response.status_code == 200:
-            return response.json()  # Trả về thông tin user nếu token hợp lệ
-        else:
-            return None  # Token không hợp lệ
-    except Exception as e:
-        print(f"Error validating token with auth service: {e}")
-        return None
-
-def requires_auth(f):
-    """
-    Decorator để bảo vệ các endpoint cần xác thực.
-    Sử dụng validate_token_with_auth_service để kiểm tra token.
-    Nếu token hợp lệ, thông tin user sẽ được truyền vào hàm view.
-    Nếu không, trả về 401 Unauthorized.
-    """
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", None)
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({
-                "success": False,
-                "error": {"code": "MISSING_TOKEN", "message": "Thiếu token."}
-            }), 401
-        
-        token = auth_header.split(" ")[1]
-
-        #Validate token với auth-service
-        user_info = validate_token_with_auth_service(token)
-        if not user_info:
-            return jsonify({
-                "success": False, 
-                "error": {"code": "INVALID_TOKEN", "message": "Token đã hết hạn hoặc không hợp lệ."}
-                }), 401
-        
-        # Lưu user_info vào g (global) để controller có thể truy cập thông tin user
-        g.current_user_id = user_info.get("user_id")
-        g.current_username = user_info.get("username")
-        g.current_user_roles = user_info.get("roles")
-
-        # Truyền thông tin user vào hàm view
-        return f(user_info=user_info, *args, **kwargs)
-
+import time
+import requests
+from functools import wraps
+from flask import request, jsonify, g
+from flask_jwt_extended import get_jwt
+from app.utils.access_log import record_upstream
+from app.utils.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+from app.utils.tracing import inject_trace_headers, start_client_span
+from app.middleware.deadline_middleware import (
+    DEADLINE_HEADER, DEADLINE_EXCEEDED_RESPONSE, deadline_exceeded, remaining_seconds
+)
+
+def validate_token_with_auth_service(token: str) -> dict:
+    """
+    Gọi auth-service endpoint POST api/auth/validate-token
+    để xác thực token của user có hợp lệ hay không.
+    returns:
+        {
+            "valid": True,
+            "user_id": 123,
+            "username": "john_doe",
+            "role": "admin",
+            "email": "john@example.com"
+        }
+        hoặc None nếu token không hợp lệ / auth-service lỗi
+    """
+    auth_service_url = "http://auth-service:5001/api/auth/validate-token"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Không chờ auth-service lâu hơn deadline còn lại của request
+    timeout = 5
+    remaining = remaining_seconds()
+    if remaining is not None:
+        if remaining <= 0:
+            return None
+        timeout = min(timeout, remaining)
+        headers[DEADLINE_HEADER] = str(int(remaining * 1000))
+
+    # Span CLIENT cho lần gọi auth-service, traceparent gửi kèm để auth-service nối vào cùng trace
+    span = start_client_span("POST auth-service /validate-token")
+    inject_trace_headers(headers, span)
+
+    started = time.perf_counter()
+    try:
+        response = requests.post(auth_service_url, headers=headers, timeout=timeout)
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.observe(elapsed, "auth-service", "POST", str(response.status_code))
+        record_upstream("auth-service", response.status_code, elapsed)
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+        if response.status_code == 200:
+            # auth-service trả {"success": true, "data": {user_id, username, role, email}}
+            return response.json().get("data")
+        else:
+            return None  # Token không hợp lệ
+    except Exception as e:
+        UPSTREAM_ERRORS.inc("auth-service", type(e).__name__)
+        record_upstream("auth-service", type(e).__name__, time.perf_counter() - started)
+        if span is not None:
+            span.record_error(e)
+        return None
+    finally:
+        if span is not None:
+            span.end()
+
+def requires_auth(f):
+    """
+    Decorator để bảo vệ các endpoint cần xác thực.
+    Sử dụng validate_token_with_auth_service để kiểm tra token.
+    Nếu token hợp lệ, thông tin user được lưu vào g (g.current_user_id...).
+    Nếu không, trả về 401 Unauthorized.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get("Authorization", None)
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return jsonify({
+                "success": False,
+                "error": {"code": "MISSING_TOKEN", "message": "Thiếu token."}
+            }), 401
+        
+        token = auth_header.split(" ")[1]
+
+        # Gateway đã hết deadline → không gọi auth-service nữa
+        if deadline_exceeded():
+            return jsonify(DEADLINE_EXCEEDED_RESPONSE), 504
+
+        #Validate token với auth-service
+        user_info = validate_token_with_auth_service(token)
+        if not user_info:
+            return jsonify({
+                "success": False, 
+                "error": {"code": "INVALID_TOKEN", "message": "Token đã hết hạn hoặc không hợp lệ."}
+                }), 401
+        
+        # Lưu user_info vào g (global) để controller có thể truy cập thông tin user
+        g.current_user_id = user_info.get("user_id")
+        g.current_username = user_info.get("username")
+        g.current_user_roles = user_info.get("role")   # require_role so sánh với role này
+
+        # View đọc thông tin user từ g, không nhận thêm tham số
+        return f(*args, **kwargs)
+
     return decorated
\ No newline at end of file
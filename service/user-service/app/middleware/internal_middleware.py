@@ -0,0 +1,38 @@
+"""
+internal_middleware.py
+──────────────────────
+Decorator bảo vệ endpoint nội bộ (/api/user/internal/*) chỉ dành cho service khác gọi.
+
+Tại sao cần?
+    Saga đăng ký của Gateway tạo profile cho user mới — chưa có JWT của user đó.
+    Không kiểm tra gì thì ai gọi thẳng tới user-service cũng sửa được profile người khác.
+
+Dùng như sau:
+    @user_bp.post("/internal/users")
+    @require_internal_key      ← header X-Internal-Key phải khớp INTERNAL_API_KEY
+    def create_profile(): ...
+"""
+
+import hmac
+from functools import wraps
+from flask import current_app, jsonify, request
+
+INTERNAL_KEY_HEADER = "X-Internal-Key"
+
+
+def require_internal_key(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get("INTERNAL_API_KEY") or ""
+        provided = request.headers.get(INTERNAL_KEY_HEADER, "")
+        # compare_digest: thời gian so sánh không lộ số ký tự đúng
+        if not expected or not hmac.compare_digest(provided.encode(), expected.encode()):
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "INTERNAL_ONLY",
+                    "message": "Endpoint chỉ dành cho service nội bộ.",
+                },
+            }), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -1,4 +1,4 @@
-from .audit_log import AuditLog
-from .user_model import User
-from .user_preferences_model import UserPreferences
+from .audit_log import AuditLog
+from .user_model import User
+from .user_preferences_model import UserPreferences
 __all__ = ["AuditLog", "User", "UserPreferences"]
\ No newline at end of file
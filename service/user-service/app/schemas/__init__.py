@@ -1,3 +1,3 @@
-from .preferences_schema import PreferencesSchema
-from .user_schema import UpdateProfileSchema, UserQuerySchema, ChangePasswordSchema
-__all__ = ["PreferencesSchema", "UpdateProfileSchema", "UserQuerySchema", "ChangePasswordSchema"]
\ No newline at end of file
+from .preferences_schema import PreferencesSchema
+from .user_schema import UpdateProfileSchema, UserQuerySchema, ChangePasswordSchema, CreateProfileSchema
+__all__ = ["PreferencesSchema", "UpdateProfileSchema", "UserQuerySchema", "ChangePasswordSchema", "CreateProfileSchema"]
\ No newline at end of file
@@ -1,6 +1,6 @@
-from marshmallow import Schema, fields, validate, ValidationError
-
-class PreferencesSchema(Schema):
-    """ Validate khi update preferences """
-    email_alerts = fields.Boolean(required = False)
+from marshmallow import Schema, fields, validate, ValidationError
+
+class PreferencesSchema(Schema):
+    """ Validate khi update preferences """
+    email_alerts = fields.Boolean(required = False)
     sms_alerts = fields.Boolean(required = False)
\ No newline at end of file
@@ -1,3 +1,3 @@
-from .audit_service import AuditService
-from .preferences_service import PreferencesService
+from .audit_service import AuditService
+from .preferences_service import PreferencesService
 from .user_service import UserService
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+etag.py
+───────
+ETag mạnh tính từ updated_at của bản ghi + trả 304 khi If-None-Match khớp.
+
+Tại sao cần?
+    Client poll profile / preferences liên tục. Tính ETag bằng hash body vẫn phải
+    query đủ cột + serialize JSON mỗi lần → tốn gần bằng trả response đầy đủ.
+
+Cách hoạt động:
+    - updated_at đổi mỗi lần UPDATE (onupdate=datetime.utcnow) → ETag chỉ cần
+      id + updated_at, lấy bằng 1 query 1 cột, KHÔNG load object / to_dict()
+    - Cột updated_at phải lưu tới micro giây (MySQL: DATETIME(6), xem migration
+      b7e4d2a91c05 của auth-service). DATETIME thường cắt về giây → 2 lần UPDATE trong
+      cùng 1 giây cho cùng ETag, client giữ bản cũ nhận 304 và không thấy thay đổi
+    - REPRESENTATION_VERSION: tăng khi đổi định dạng JSON trả về (thêm / bớt field)
+      → ETag cũ của client tự hết hiệu lực dù dữ liệu không đổi
+    - If-None-Match khớp → 304 không body, bỏ qua toàn bộ phần đọc dữ liệu
+
+Cách dùng (trong controller):
+    etag = record_etag("user", user_id, UserService.get_profile_updated_at(user_id))
+    if etag and is_not_modified(etag):
+        return not_modified(etag)
+    ...
+    return with_etag(jsonify(result), status, etag)
+"""
+
+from flask import make_response, request
+
+REPRESENTATION_VERSION = 1
+
+# Client phải hỏi lại server (If-None-Match) trước khi dùng bản đã lưu;
+# private → proxy / CDN dùng chung không được cache dữ liệu của từng user
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def record_etag(kind: str, record_id, updated_at):
+    """ETag (chưa có dấu nháy) cho 1 bản ghi; updated_at None (không tìm thấy) → None."""
+    if updated_at is None:
+        return None
+    # strftime thay vì timestamp(): datetime naive (UTC) → không phụ thuộc timezone của máy chạy
+    return f"{kind}-{record_id}-{updated_at.strftime('%Y%m%d%H%M%S%f')}-v{REPRESENTATION_VERSION}"
+
+
+def is_not_modified(etag: str) -> bool:
+    """If-None-Match chứa etag (so sánh yếu theo RFC 7232) hoặc là "*"."""
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag: str):
+    response = make_response("", 304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def with_etag(body, status: int, etag):
+    """Gắn ETag + Cache-Control cho response 200; status khác giữ nguyên."""
+    response = make_response(body, status)
+    if status == 200 and etag:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return response
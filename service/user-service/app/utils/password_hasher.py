@@ -0,0 +1,287 @@
+"""
+password_hasher.py
+──────────────────
+Thuật toán hash password cắm được (bcrypt / pbkdf2_sha256 / scrypt) + đo cost theo phần cứng.
+
+Tại sao cần?
+    Cost bcrypt bị hard-code rounds=12 ở nhiều nơi. Máy production nhanh / chậm hơn máy
+    dev → login tốn quá nhiều CPU hoặc hash quá yếu, muốn đổi phải sửa code + reset
+    password hàng loạt.
+
+Cách hoạt động:
+    - Mỗi thuật toán 1 lớp PasswordHasher với 1 tham số "cost" duy nhất:
+        bcrypt          cost = rounds (log2 số vòng), mặc định 12
+        pbkdf2_sha256   cost = số iteration, mặc định 600000
+        scrypt          cost = log2(N) (r=8, p=1), mặc định 15 (~32MB RAM / lần hash)
+    - Hash lưu kèm thuật toán + cost trong chuỗi ($2b$12$..., $pbkdf2-sha256$600000$...,
+      $scrypt$ln=15,r=8,p=1$...) → verify tự nhận ra thuật toán, hash cũ vẫn dùng được
+    - needs_rehash(): hash khác thuật toán / cost đang cấu hình → auth-service hash lại
+      khi login thành công, không cần reset hàng loạt
+    - calibrate(): đo thời gian hash thật trên máy đang chạy, chọn cost lớn nhất
+      không vượt latency mục tiêu (lệnh `flask hasher calibrate` của auth-service)
+
+Bảng users dùng chung với auth-service → file này giữ giống bản của auth-service để
+verify được mọi hash do 2 bên tạo ra.
+
+Thêm thuật toán: viết lớp con PasswordHasher (hash / verify / identify / cost_of) rồi
+thêm vào HASHERS.
+
+Cấu hình (app.config):
+    PASSWORD_HASH_ALGORITHM   bcrypt | pbkdf2_sha256 | scrypt
+    PASSWORD_HASH_COST        0 → cost mặc định của thuật toán
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import statistics
+import time
+
+import bcrypt
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class PasswordHasher:
+    """Lớp gốc: 1 thuật toán + 1 cost. Hàm hash / verify chạy trong hash executor."""
+
+    algorithm = ""
+    default_cost = 0
+    min_cost = 1
+    max_cost = 1
+    # True: cost là log2 (tăng 1 = gấp đôi thời gian), False: tuyến tính theo cost
+    log_cost = True
+
+    def __init__(self, cost: int = 0):
+        cost = cost or self.default_cost
+        if not self.min_cost <= cost <= self.max_cost:
+            raise ValueError(
+                f"Cost {cost} không hợp lệ cho {self.algorithm} ({self.min_cost} - {self.max_cost})")
+        self.cost = cost
+
+    def hash(self, password: bytes) -> str:
+        raise NotImplementedError
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        raise NotImplementedError
+
+    @classmethod
+    def identify(cls, encoded: str) -> bool:
+        """Chuỗi hash có phải do thuật toán này tạo ra không."""
+        raise NotImplementedError
+
+    @classmethod
+    def cost_of(cls, encoded: str):
+        """Cost lưu trong chuỗi hash (None nếu không đọc được)."""
+        raise NotImplementedError
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return not self.identify(encoded) or self.cost_of(encoded) != self.cost
+
+
+class BcryptHasher(PasswordHasher):
+
+    algorithm = "bcrypt"
+    default_cost = 12
+    min_cost = 4
+    max_cost = 31
+
+    def hash(self, password: bytes) -> str:
+        return bcrypt.hashpw(password, bcrypt.gensalt(rounds=self.cost)).decode("utf-8")
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        return bcrypt.checkpw(password, encoded.encode("utf-8"))
+
+    @classmethod
+    def identify(cls, encoded: str) -> bool:
+        return encoded.startswith(("$2a$", "$2b$", "$2y$"))
+
+    @classmethod
+    def cost_of(cls, encoded: str):
+        # $2b$12$<salt + hash>
+        parts = encoded.split("$")
+        return int(parts[2]) if len(parts) > 3 and parts[2].isdigit() else None
+
+
+class Pbkdf2Sha256Hasher(PasswordHasher):
+
+    algorithm = "pbkdf2_sha256"
+    default_cost = 600_000      # khuyến nghị OWASP cho PBKDF2-HMAC-SHA256
+    min_cost = 10_000
+    max_cost = 100_000_000
+    log_cost = False
+    prefix = "$pbkdf2-sha256$"
+
+    def hash(self, password: bytes) -> str:
+        salt = os.urandom(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password, salt, self.cost)
+        return f"{self.prefix}{self.cost}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        # $pbkdf2-sha256$<iterations>$<salt>$<digest>
+        _, _, iterations, salt, digest = encoded.split("$")
+        expected = _b64decode(digest)
+        actual = hashlib.pbkdf2_hmac("sha256", password, _b64decode(salt), int(iterations), len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    @classmethod
+    def identify(cls, encoded: str) -> bool:
+        return encoded.startswith(cls.prefix)
+
+    @classmethod
+    def cost_of(cls, encoded: str):
+        parts = encoded.split("$")
+        return int(parts[2]) if len(parts) == 5 and parts[2].isdigit() else None
+
+
+class ScryptHasher(PasswordHasher):
+
+    algorithm = "scrypt"
+    default_cost = 15           # N = 2^15, r=8 → 128 * r * N = 32MB RAM mỗi lần hash
+    min_cost = 10
+    max_cost = 20
+    block_size = 8
+    parallelism = 1
+    prefix = "$scrypt$"
+
+    @classmethod
+    def _derive(cls, password: bytes, salt: bytes, ln: int, r: int, p: int, length: int = 32) -> bytes:
+        n = 1 << ln
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * r * n * p, dklen=length)
+
+    def hash(self, password: bytes) -> str:
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.cost, self.block_size, self.parallelism)
+        params = f"ln={self.cost},r={self.block_size},p={self.parallelism}"
+        return f"{self.prefix}{params}${_b64encode(salt)}${_b64encode(digest)}"
+
+    @staticmethod
+    def _params(encoded: str) -> dict:
+        # $scrypt$ln=15,r=8,p=1$<salt>$<digest>
+        return {key: int(value) for key, value in
+                (item.split("=") for item in encoded.split("$")[2].split(","))}
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        params = self._params(encoded)
+        _, _, _, salt, digest = encoded.split("$")
+        expected = _b64decode(digest)
+        actual = self._derive(password, _b64decode(salt), params["ln"], params["r"], params["p"], len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    @classmethod
+    def identify(cls, encoded: str) -> bool:
+        return encoded.startswith(cls.prefix)
+
+    @classmethod
+    def cost_of(cls, encoded: str):
+        try:
+            return cls._params(encoded)["ln"]
+        except (IndexError, KeyError, ValueError):
+            return None
+
+    def needs_rehash(self, encoded: str) -> bool:
+        if super().needs_rehash(encoded):
+            return True
+        params = self._params(encoded)
+        return params.get("r") != self.block_size or params.get("p") != self.parallelism
+
+
+HASHERS = {cls.algorithm: cls for cls in (BcryptHasher, Pbkdf2Sha256Hasher, ScryptHasher)}
+
+
+def get_hasher(algorithm: str, cost: int = 0) -> PasswordHasher:
+    try:
+        return HASHERS[algorithm](cost)
+    except KeyError:
+        raise ValueError(f"PASSWORD_HASH_ALGORITHM không hỗ trợ: {algorithm!r} (chọn {tuple(HASHERS)})")
+
+
+def identify_hasher(encoded: str):
+    """Lớp hasher đã tạo ra chuỗi hash, None nếu không nhận ra."""
+    for cls in HASHERS.values():
+        if cls.identify(encoded):
+            return cls
+    return None
+
+
+def verify_encoded(password: bytes, encoded: str) -> bool:
+    """Verify theo thuật toán ghi trong hash; hash hỏng / không nhận ra → False."""
+    cls = identify_hasher(encoded)
+    if cls is None:
+        return False
+    cost = cls.cost_of(encoded)
+    try:
+        return cls(cost if cost and cls.min_cost <= cost <= cls.max_cost else 0).verify(password, encoded)
+    except (ValueError, TypeError):
+        return False
+
+
+# ─────────────────────────────────────────────────────────────
+# CALIBRATION
+# ─────────────────────────────────────────────────────────────
+
+CALIBRATION_PASSWORD = b"calibration-Password123!"
+
+
+def measure(hasher: PasswordHasher, samples: int = 3) -> float:
+    """Thời gian hash trung vị (giây) của hasher trên máy hiện tại."""
+    timings = []
+    for _ in range(max(1, samples)):
+        started = time.perf_counter()
+        hasher.hash(CALIBRATION_PASSWORD)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate(algorithm: str, target_seconds: float, samples: int = 3, on_measure=None) -> tuple:
+    """
+    Cost lớn nhất của thuật toán mà 1 lần hash không vượt target_seconds.
+
+    Args:
+        on_measure: callback(cost, seconds) sau mỗi lần đo (in tiến trình)
+
+    Returns:
+        (cost, giây / lần hash); cả cost nhỏ nhất cũng vượt target → trả cost nhỏ nhất
+    """
+    cls = HASHERS[algorithm]
+
+    def timed(cost: int) -> float:
+        seconds = measure(cls(cost), samples)
+        if on_measure:
+            on_measure(cost, seconds)
+        return seconds
+
+    if not cls.log_cost:
+        # Thời gian tỉ lệ thuận với cost → đo 1 mốc rồi ngoại suy (chừa 10% sai số đo), đo lại để kiểm tra
+        def scaled(cost: int, seconds: float) -> int:
+            cost = int(cost * target_seconds * 0.9 / seconds) // 1000 * 1000
+            return min(cls.max_cost, max(cls.min_cost, cost))
+
+        base_cost = max(cls.min_cost, 100_000)
+        cost = scaled(base_cost, timed(base_cost))
+        seconds = timed(cost)
+        if seconds > target_seconds and cost > cls.min_cost:
+            cost = scaled(cost, seconds)
+            seconds = timed(cost)
+        return cost, seconds
+
+    # Cost là log2: tăng dần tới khi vượt target, lấy mức ngay trước đó
+    cost = cls.min_cost
+    seconds = timed(cost)
+    while cost < cls.max_cost:
+        # Ước lượng trước: mức tiếp theo chắc chắn vượt target thì không cần đo
+        if seconds * 2 > target_seconds * 1.5:
+            break
+        next_seconds = timed(cost + 1)
+        if next_seconds > target_seconds:
+            break
+        cost, seconds = cost + 1, next_seconds
+    return cost, seconds
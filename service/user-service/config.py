@@ -1,57 +1,83 @@
-import os
-from datetime import timedelta
-from dotenv import load_dotenv
-
-load_dotenv()
-
-
-class Config:
-    # Flask
-    SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
-    DEBUG = False
-    TESTING = False
-
-    # Database (SQLAlchemy)
-    DB_HOST = os.getenv("DB_HOST", "localhost")
-    DB_PORT = os.getenv("DB_PORT", "3306")
-    DB_NAME = os.getenv("DB_NAME", "iot_monitoring")
-    DB_USER = os.getenv("DB_USER", "root")
-    DB_PASSWORD = os.getenv("DB_PASSWORD", "RootPassword123!")
-    SQLALCHEMY_DATABASE_URI = (
-        f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    )
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_POOL_SIZE = 5
-    SQLALCHEMY_POOL_RECYCLE = 300  # reconnect after 5 phút (tránh timeout)
-
-    # JWT
-    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-change-me")
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
-    JWT_TOKEN_LOCATION = ["headers"]
-    JWT_HEADER_NAME = "Authorization"
-    JWT_HEADER_TYPE = "Bearer"
-
-    # CORS
-    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
-
-
-class DevelopmentConfig(Config):
-    DEBUG = True
-
-
-class TestingConfig(Config):
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"  # dùng SQLite khi test
-
-
-class ProductionConfig(Config):
-    DEBUG = False
-
-
-config = {
-    "development": DevelopmentConfig,
-    "testing": TestingConfig,
-    "production": ProductionConfig,
-    "default": DevelopmentConfig,
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Config:
+    # Flask
+    SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
+    DEBUG = False
+    TESTING = False
+
+    # Database (SQLAlchemy)
+    DB_HOST = os.getenv("DB_HOST", "localhost")
+    DB_PORT = os.getenv("DB_PORT", "3306")
+    DB_NAME = os.getenv("DB_NAME", "iot_monitoring")
+    DB_USER = os.getenv("DB_USER", "root")
+    DB_PASSWORD = os.getenv("DB_PASSWORD", "RootPassword123!")
+    SQLALCHEMY_DATABASE_URI = (
+        f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_POOL_SIZE = 5
+    SQLALCHEMY_POOL_RECYCLE = 300  # reconnect after 5 phút (tránh timeout)
+
+    # JWT
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-change-me")
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    JWT_TOKEN_LOCATION = ["headers"]
+    JWT_HEADER_NAME = "Authorization"
+    JWT_HEADER_TYPE = "Bearer"
+
+    # CORS
+    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+
+    # Tracing W3C traceparent (xem app/utils/tracing.py)
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()    # none | file | http
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.1))   # chỉ áp dụng khi không có traceparent
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces-user.jsonl")
+    TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "")      # VD: http://zipkin:9411/api/v2/spans
+
+    # Executor riêng cho bcrypt (xem app/utils/hash_executor.py)
+    HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread").lower()    # thread | process (chỉ khi chạy gunicorn) | inline
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 0))                 # 0 → số core / WEB_CONCURRENCY
+    HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 32))          # việc chờ tối đa, quá → 503
+    # Thuật toán hash password (xem app/utils/password_hasher.py). Bảng users dùng chung → đặt giống auth-service
+    PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "bcrypt").lower()  # bcrypt | pbkdf2_sha256 | scrypt
+    PASSWORD_HASH_COST = int(os.getenv("PASSWORD_HASH_COST", 0))     # 0 → mặc định của thuật toán (bcrypt: 12)
+
+    # Access log JSON lines, ghi bằng thread nền (xem app/utils/access_log.py)
+    ACCESS_LOG_LEVEL = os.getenv("ACCESS_LOG_LEVEL", "all").lower()          # off | errors | all
+    ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", 1000))        # level errors: vẫn ghi request chậm hơn ngưỡng
+    ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE", "")                       # rỗng / "-" → stdout
+    ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))   # đầy → bỏ dòng log, không chặn request
+    ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", 500))
+    ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", 1.0))  # giây
+
+    # Endpoint /api/user/internal/* (saga đăng ký của Gateway) chỉ nhận header X-Internal-Key khớp key này
+    INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "change-me-internal")
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"  # dùng SQLite khi test
+    HASH_EXECUTOR = "inline"
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+
+
+config = {
+    "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
+    "default": DevelopmentConfig,
 }
\ No newline at end of file